@@ -1,19 +1,75 @@
 """
 Compute suggested free calendar slots from explicit busy intervals.
 Expects calendarFetchOutcome \"ok\" and busyIntervals[{start,end}] (ISO with offset).
+With busyIntervalsByMailbox, computes all mailboxes in one call (see availabilityMode).
+With availabilityIndex / busyDelta, updates the previous run's index incrementally.
 """
 from __future__ import annotations
 
 import logging
 from typing import Any, Dict
 
-from slot_math import build_calendar_availability_from_busy_intervals
+from scheduling_core import (
+    build_calendar_availability_batch,
+    build_calendar_availability_from_busy_intervals,
+    build_calendar_availability_incremental,
+    cache_stats,
+)
 
 logger = logging.getLogger(__name__)
 
 
+def _batch_handler(raw: Dict[str, Any]) -> Dict[str, Any]:
+    logger.info(
+        "calendar-slots-from-busy-intervals: start batch outcome=%s mode=%s horizon=%s tz=%s",
+        raw.get("calendarFetchOutcome"),
+        raw.get("availabilityMode") or "perMailbox",
+        raw.get("appointmentHorizonDays"),
+        raw.get("appointmentTimeZone"),
+    )
+    out = build_calendar_availability_batch(raw)
+    by_mailbox = out.get("calendarAvailabilityByMailbox") or {}
+    cal = out.get("calendarAvailability")
+    logger.info(
+        "calendar-slots-from-busy-intervals: done batch mailboxes=%d intersection_slots=%s "
+        "calendarError=%s",
+        len(by_mailbox),
+        len(cal.get("slots") or []) if isinstance(cal, dict) else None,
+        out.get("calendarError"),
+    )
+    return out
+
+
+def _incremental_handler(raw: Dict[str, Any]) -> Dict[str, Any]:
+    delta = raw.get("busyDelta") if isinstance(raw.get("busyDelta"), dict) else {}
+    logger.info(
+        "calendar-slots-from-busy-intervals: start incremental outcome=%s has_index=%s "
+        "delta_added=%d delta_removed=%d",
+        raw.get("calendarFetchOutcome"),
+        isinstance(raw.get("availabilityIndex"), dict),
+        len(delta.get("added") or []),
+        len(delta.get("removed") or []),
+    )
+    out = build_calendar_availability_incremental(raw)
+    cal = out.get("calendarAvailability")
+    logger.info(
+        "calendar-slots-from-busy-intervals: done incremental slots=%d calendarError=%s",
+        len((cal or {}).get("slots") or []) if isinstance(cal, dict) else 0,
+        out.get("calendarError"),
+    )
+    return out
+
+
 def handler(inputs: Dict[str, Any]) -> Dict[str, Any]:
     raw = inputs or {}
+    if raw.get("busyIntervalsByMailbox") is not None:
+        return _batch_handler(raw)
+    if (
+        raw.get("availabilityIndex") is not None
+        or raw.get("busyDelta") is not None
+        or raw.get("buildAvailabilityIndex")
+    ):
+        return _incremental_handler(raw)
     busy = raw.get("busyIntervals") or []
     busy_n = len(busy) if isinstance(busy, list) else 0
     logger.info(
@@ -27,8 +83,9 @@ def handler(inputs: Dict[str, Any]) -> Dict[str, Any]:
     cal = out.get("calendarAvailability")
     slot_n = len((cal or {}).get("slots") or []) if isinstance(cal, dict) else 0
     logger.info(
-        "calendar-slots-from-busy-intervals: done slots=%d calendarError=%s",
+        "calendar-slots-from-busy-intervals: done slots=%d calendarError=%s caches=[%s]",
         slot_n,
         out.get("calendarError"),
+        cache_stats(),
     )
     return out
@@ -1,18 +1,22 @@
 """
 Fetch listing context for copilot replies: Airtable lookup by URL, scrape + cache on miss.
-Uses stdlib only (urllib, re, json, html).
+HTTP goes through copilot_http (pooled keep-alive connections); parsing is stdlib only
+(re, json, html).
 """
 
 from __future__ import annotations
 
 import html as html_module
 import json
+import logging
 import re
-import urllib.error
 import urllib.parse
-import urllib.request
 from typing import Any, Dict, List, Optional, Tuple
 
+from copilot_http import HTTPError, Timeouts, default_client, timeouts_from_inputs
+
+logger = logging.getLogger(__name__)
+
 _USER_AGENT = (
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
     "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
@@ -72,86 +76,97 @@ def _extract_url_from_messages(messages: Any, url_regex: str) -> str:
 
 
 def _airtable_get(
-    base: str, table: str, token: str, filter_field: str, listing_url: str
+    base: str,
+    table: str,
+    token: str,
+    filter_field: str,
+    listing_url: str,
+    timeouts: Timeouts = Timeouts(10.0, 60.0),
 ) -> Tuple[Dict[str, Any], Optional[str]]:
     esc = listing_url.replace("\\", "\\\\").replace("'", "\\'")
     formula = "AND(LEN('%s') > 0, {%s} = '%s')" % (esc, filter_field, esc)
     q = urllib.parse.urlencode({"filterByFormula": formula})
     url = "https://api.airtable.com/v0/%s/%s?%s" % (base, table, q)
-    req = urllib.request.Request(url, headers={"Authorization": "Bearer " + token})
     try:
-        with urllib.request.urlopen(req, timeout=60) as resp:
-            return json.loads(resp.read().decode()), None
-    except urllib.error.HTTPError as e:
-        detail = e.read().decode() if e.fp else str(e)
-        return {"records": []}, "http_" + str(getattr(e, "code", "")) + ":" + detail[:500]
+        resp = default_client().request(
+            "GET", url, headers={"Authorization": "Bearer " + token}, timeouts=timeouts
+        )
+        return resp.json(), None
+    except HTTPError as e:
+        return {"records": []}, "http_" + str(e.code) + ":" + e.text[:500]
     except Exception as e:
         return {"records": []}, str(e)[:500]
 
 
 def _airtable_create(
-    base: str, table: str, token: str, fields: Dict[str, Any]
+    base: str,
+    table: str,
+    token: str,
+    fields: Dict[str, Any],
+    timeouts: Timeouts = Timeouts(10.0, 60.0),
 ) -> Tuple[Dict[str, Any], Optional[str]]:
     url = "https://api.airtable.com/v0/%s/%s" % (base, table)
-    body = json.dumps({"fields": fields}).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=body,
-        headers={
-            "Authorization": "Bearer " + token,
-            "Content-Type": "application/json",
-        },
-        method="POST",
-    )
     try:
-        with urllib.request.urlopen(req, timeout=60) as resp:
-            record = json.loads(resp.read().decode())
-            return {"records": [record]}, None
-    except urllib.error.HTTPError as e:
-        detail = e.read().decode() if e.fp else str(e)
-        return {"records": []}, "create_" + str(getattr(e, "code", "")) + ":" + detail[:500]
+        resp = default_client().request(
+            "POST",
+            url,
+            headers={"Authorization": "Bearer " + token},
+            json_body={"fields": fields},
+            timeouts=timeouts,
+        )
+        return {"records": [resp.json()]}, None
+    except HTTPError as e:
+        return {"records": []}, "create_" + str(e.code) + ":" + e.text[:500]
     except Exception as e:
         return {"records": []}, str(e)[:500]
 
 
-def _fetch_html_direct(url: str) -> Optional[str]:
-    req = urllib.request.Request(
-        url,
-        headers={
-            "User-Agent": _USER_AGENT,
-            "Accept": "text/html,application/xhtml+xml",
-            "Accept-Language": "de-DE,de;q=0.9,en;q=0.8",
-        },
-    )
+def _fetch_html_direct(url: str, timeouts: Timeouts = Timeouts(10.0, 45.0)) -> Optional[str]:
     try:
-        with urllib.request.urlopen(req, timeout=45) as resp:
-            raw = resp.read()
-            charset = resp.headers.get_content_charset() or "utf-8"
-            return raw.decode(charset, errors="replace")
+        resp = default_client().request(
+            "GET",
+            url,
+            headers={
+                "User-Agent": _USER_AGENT,
+                "Accept": "text/html,application/xhtml+xml",
+                "Accept-Language": "de-DE,de;q=0.9,en;q=0.8",
+            },
+            timeouts=timeouts,
+        )
+        return resp.text(errors="replace")
     except Exception:
         return None
 
 
-def _fetch_html_crawlbase(url: str, token: str) -> Optional[str]:
+def _fetch_html_crawlbase(
+    url: str, token: str, timeouts: Timeouts = Timeouts(10.0, 90.0)
+) -> Optional[str]:
     if not token:
         return None
     api = "https://api.crawlbase.com/?" + urllib.parse.urlencode(
         {"token": token, "url": url, "format": "json"}
     )
-    req = urllib.request.Request(api, headers={"User-Agent": _USER_AGENT})
     try:
-        with urllib.request.urlopen(req, timeout=90) as resp:
-            payload = json.loads(resp.read().decode())
-            body = payload.get("body")
-            return body if isinstance(body, str) else None
+        resp = default_client().request(
+            "GET", api, headers={"User-Agent": _USER_AGENT}, timeouts=timeouts
+        )
+        body = resp.json().get("body")
+        return body if isinstance(body, str) else None
     except Exception:
         return None
 
 
-def _fetch_listing_html(url: str, crawl_password: str) -> Optional[str]:
-    html_text = _fetch_html_crawlbase(url, crawl_password) if crawl_password else None
+def _fetch_listing_html(
+    url: str, crawl_password: str, inputs: Optional[Dict[str, Any]] = None
+) -> Optional[str]:
+    inputs = inputs or {}
+    html_text = (
+        _fetch_html_crawlbase(url, crawl_password, timeouts_from_inputs(inputs, read_default=90))
+        if crawl_password
+        else None
+    )
     if not html_text:
-        html_text = _fetch_html_direct(url)
+        html_text = _fetch_html_direct(url, timeouts_from_inputs(inputs, read_default=45))
     return html_text
 
 
@@ -268,13 +283,14 @@ def handler(inputs: Dict[str, Any]) -> Dict[str, Any]:
             "scraped": False,
         }
 
-    body, err = _airtable_get(base, table, token, filter_field, listing_url)
+    airtable_timeouts = timeouts_from_inputs(inputs, read_default=60)
+    body, err = _airtable_get(base, table, token, filter_field, listing_url, airtable_timeouts)
     if body.get("records"):
         if err:
             body["_lookup_warning"] = err
         return {"response": {"data": body}, "listingUrl": listing_url, "scraped": False}
 
-    html_text = _fetch_listing_html(listing_url, crawl_password)
+    html_text = _fetch_listing_html(listing_url, crawl_password, inputs)
     if not html_text:
         out = _empty_response("fetch_failed")
         out["listingUrl"] = listing_url
@@ -285,13 +301,14 @@ def handler(inputs: Dict[str, Any]) -> Dict[str, Any]:
     fields = _parse_listing_page(html_text, listing_url)
     fields[filter_field] = listing_url
 
-    created, create_err = _airtable_create(base, table, token, fields)
+    created, create_err = _airtable_create(base, table, token, fields, airtable_timeouts)
     if create_err and not created.get("records"):
         out = _empty_response(create_err)
         out["listingUrl"] = listing_url
         out["response"]["data"]["_scraped_fields"] = fields
         return out
 
+    logger.info("get-listing-data: scraped and cached listing http=[%s]", default_client().stats())
     return {
         "response": {"data": created},
         "listingUrl": listing_url,
@@ -13,17 +13,38 @@ freely would risk breaking `parseResponseToJson` downstream.
 
 Avoid `${...}` patterns inside prompt strings that live in YAML — the workflow engine
 treats them as dependency references. Use `{user.email}` style placeholders in examples.
+
+With a `threads` list, handler() answers many threads in one invocation: the threads run
+concurrently in a bounded pool (maxConcurrency). A worker takes one thread through both calls
+(classify, then reply), so there is no batch-wide classify stage to wait for: each reply
+starts as soon as its own classification returns. Responses come back in input order.
+
+replyMode "speculative" skips the separate classification call: the reply prompt is sent
+right away (with the free slots when there are any) and the model also returns
+needsSchedulingContext. Only when slots were offered and the model does not confirm that the
+conversation is about scheduling (false, or a missing/non-boolean key) is the reply generated
+again without them.
 """
 from __future__ import annotations
 
+import functools
+import hashlib
 import json
 import logging
-import urllib.error
-import urllib.request
-from typing import Any, Dict, List, Optional, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from copilot_http import HTTPError, Timeouts, default_client, timeouts_from_inputs
+
+from response_cache import ResponseCache, cache_from_inputs, cache_stats
 
 logger = logging.getLogger(__name__)
 
+# Threads answered at once by the batch handler (two LLM calls each, mostly waiting).
+DEFAULT_MAX_CONCURRENCY = 8
+
 # Defaults for the overridable long-form prompts.
 DEFAULT_CLASSIFY_SYSTEM = (
     "Du klassifizierst E-Mail-Konversationen. Entscheide, ob es um Termine, Uhrzeiten, Treffen, Besichtigungen, "
@@ -92,6 +113,33 @@ JSON_RULES = {
     ),
 }
 
+# replyMode "speculative": the classification rides along with the reply, so the schema
+# gets a fourth (or third) key instead of JSON_RULES' "only these keys".
+_NEEDS_SCHEDULING_KEY = (
+    '"needsSchedulingContext" (boolean: true, wenn es in der Konversation um Termine, Uhrzeiten, Treffen, '
+    "Besichtigungen, Rückrufzeiten, Verfügbarkeit oder Kalender geht, auch indirekt; sonst false)"
+)
+SPECULATIVE_JSON_RULES = {
+    (True, True): (
+        'Antworte ausschließlich mit einem JSON-Objekt mit genau vier Schlüsseln: "reply" (string), '
+        '"categories" (Objekt mit Kategoriename als Schlüssel und gewähltem Wert als String), '
+        '"scheduling" (Objekt oder null) und ' + _NEEDS_SCHEDULING_KEY + "."
+    ),
+    (False, True): (
+        'Antworte ausschließlich mit einem JSON-Objekt mit genau drei Schlüsseln: "reply" (string), '
+        '"scheduling" (Objekt oder null) und ' + _NEEDS_SCHEDULING_KEY + "."
+    ),
+    (True, False): (
+        'Antworte ausschließlich mit einem JSON-Objekt mit genau vier Schlüsseln: "reply" (Antworttext), "categories" '
+        '(Objekt mit Kategoriename als Schlüssel und gewähltem Wert als String), "scheduling" (immer null) und '
+        + _NEEDS_SCHEDULING_KEY + "."
+    ),
+    (False, False): (
+        'Antworte ausschließlich mit einem JSON-Objekt mit genau drei Schlüsseln: "reply" (Antworttext), '
+        '"scheduling" (immer null) und ' + _NEEDS_SCHEDULING_KEY + "."
+    ),
+}
+
 TRAILER_RULES = "\n".join(
     [
         "Wichtig: Gib nur das reine JSON-Objekt aus, ohne Markdown, ohne Code-Blöcke (keine ```) und ohne weiteren Text davor oder danach.",
@@ -101,6 +149,86 @@ TRAILER_RULES = "\n".join(
 )
 
 
+class _SpeculationStats:
+    """Process-wide speculative reply counters for the "done" log line."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.replies = 0
+        self.fallbacks = 0
+        # Fallbacks because needsSchedulingContext was missing or not a boolean.
+        self.invalid = 0
+
+    def record(self, fallback: bool, invalid: bool = False) -> None:
+        with self._lock:
+            self.replies += 1
+            self.fallbacks += int(fallback)
+            self.invalid += int(invalid)
+
+    def summary(self) -> str:
+        with self._lock:
+            rate = self.fallbacks / self.replies if self.replies else 0.0
+            return "replies=%d fallbacks=%d invalid=%d fallback_rate=%.2f" % (
+                self.replies,
+                self.fallbacks,
+                self.invalid,
+                rate,
+            )
+
+
+_SPECULATION = _SpeculationStats()
+
+
+def _usage_tokens(parsed: Any) -> Tuple[Optional[int], Optional[int]]:
+    """(prompt tokens, cached prompt tokens) from an upstream usage block, if the API passes one on."""
+    usage = parsed.get("usage") if isinstance(parsed, dict) else None
+    if not isinstance(usage, dict):
+        return None, None
+    details = usage.get("prompt_tokens_details") or usage.get("input_tokens_details") or {}
+    cached = usage.get("cache_read_input_tokens")
+    if cached is None:
+        cached = usage.get("cached_tokens", details.get("cached_tokens") if isinstance(details, dict) else None)
+    prompt = usage.get("prompt_tokens", usage.get("input_tokens"))
+    if prompt is not None and usage.get("cache_read_input_tokens") is not None:
+        # Anthropic-style usage counts cache reads/writes apart from input_tokens.
+        prompt += usage["cache_read_input_tokens"] + (usage.get("cache_creation_input_tokens") or 0)
+    try:
+        return (None if prompt is None else int(prompt)), (None if cached is None else int(cached))
+    except (TypeError, ValueError):
+        return None, None
+
+
+class _TokenStats:
+    """Process-wide prompt/cached token totals for the "done" log line."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt = 0
+        self.cached = 0
+
+    def record(self, prompt: Optional[int], cached: Optional[int]) -> None:
+        if prompt is None and cached is None:
+            return
+        with self._lock:
+            self.calls += 1
+            self.prompt += prompt or 0
+            self.cached += cached or 0
+
+    def summary(self) -> str:
+        with self._lock:
+            share = self.cached / self.prompt if self.prompt else 0.0
+            return "calls=%d prompt_tokens=%d cached_tokens=%d cached_share=%.2f" % (
+                self.calls,
+                self.prompt,
+                self.cached,
+                share,
+            )
+
+
+_TOKENS = _TokenStats()
+
+
 def _override(value: Any, default: str) -> str:
     """Return `value` if it's a non-empty string, otherwise the default."""
     if isinstance(value, str) and value.strip():
@@ -113,43 +241,65 @@ def _post_generate_response(
     token: str,
     system_message: str,
     message: str,
-    timeout: int = 120,
+    timeouts: Timeouts = Timeouts(10.0, 120.0),
+    cache: Optional[ResponseCache] = None,
+    kind: str = "reply",
+    prefix_chars: Optional[int] = None,
 ) -> Dict[str, Any]:
+    """
+    POST one prompt. With prefix_chars, a cacheControl hint tells the API that the first
+    prefix_chars characters of systemMessage are shared with other requests (and under which
+    key), so it can mark them for the provider's prompt cache.
+    """
     url = api_base.rstrip("/") + "/copilot/generate-response"
-    body = json.dumps(
-        {
-            "systemMessage": system_message,
-            "message": message,
-            "parseResponseToJson": True,
-        },
-        ensure_ascii=False,
-    ).encode("utf-8")
-    req = urllib.request.Request(
+    body: Dict[str, Any] = {
+        "systemMessage": system_message,
+        "message": message,
+        "parseResponseToJson": True,
+    }
+    if prefix_chars:
+        prefix = system_message[:prefix_chars]
+        body["cacheControl"] = {
+            "type": "ephemeral",
+            "systemPrefixChars": prefix_chars,
+            "key": hashlib.sha256(prefix.encode()).hexdigest()[:32],
+        }
+    key = None
+    if cache is not None:
+        key = cache.key(url, body)
+        cached = cache.get(kind, key)
+        if cached is not None:
+            logger.info("message-reply-generator: POST %s %s served from cache key=%s", url, kind, key[:12])
+            return cached
+    try:
+        resp = default_client().request(
+            "POST",
+            url,
+            headers={"Authorization": "Bearer " + token.strip()},
+            json_body=body,
+            timeouts=timeouts,
+        )
+    except HTTPError as e:
+        raise RuntimeError("generate-response HTTP %s: %s" % (e.code, e.text[:2000])) from e
+    parsed = resp.json()
+    prompt_tokens, cached_tokens = _usage_tokens(parsed)
+    _TOKENS.record(prompt_tokens, cached_tokens)
+    logger.info(
+        "message-reply-generator: POST %s ok status=%s top_keys=%s body_len=%d total_ms=%d "
+        "wait_ms=%d reused_conn=%s prompt_tokens=%s cached_tokens=%s",
         url,
-        data=body,
-        headers={
-            "Authorization": "Bearer " + token.strip(),
-            "Content-Type": "application/json",
-        },
-        method="POST",
+        resp.status,
+        list(parsed.keys()) if isinstance(parsed, dict) else type(parsed).__name__,
+        len(resp.body),
+        resp.timing.total_ms,
+        resp.timing.wait_ms,
+        resp.timing.reused,
+        prompt_tokens,
+        cached_tokens,
     )
-    try:
-        with urllib.request.urlopen(req, timeout=timeout) as resp:
-            body = resp.read().decode("utf-8")
-            parsed = json.loads(body)
-            logger.info(
-                "message-reply-generator: POST %s ok status=%s top_keys=%s body_len=%d",
-                url,
-                getattr(resp, "status", "?"),
-                list(parsed.keys()) if isinstance(parsed, dict) else type(parsed).__name__,
-                len(body),
-            )
-            return parsed
-    except urllib.error.HTTPError as e:
-        detail = e.read().decode("utf-8", errors="replace") if e.fp else str(e)
-        raise RuntimeError(
-            "generate-response HTTP %s: %s" % (getattr(e, "code", "?"), detail[:2000])
-        ) from e
+    if cache is not None and isinstance(parsed, dict) and isinstance(parsed.get("parsedJson"), dict):
+        cache.put(kind, key, parsed)
+    return parsed
 
 
 def _normalize_categories(raw: Any) -> Optional[List[Dict[str, Any]]]:
@@ -175,6 +325,19 @@ def _normalize_categories(raw: Any) -> Optional[List[Dict[str, Any]]]:
     return out or None
 
 
+def _categories_key(raw: Any) -> str:
+    """customCategories as canonical JSON text (a JSON string input is kept as is)."""
+    if isinstance(raw, str):
+        return raw
+    return json.dumps(raw, sort_keys=True, ensure_ascii=False, default=str)
+
+
+@functools.lru_cache(maxsize=64)
+def _categories_for(categories_key: str) -> Optional[List[Dict[str, Any]]]:
+    """_normalize_categories once per distinct customCategories; treat the result as read-only."""
+    return _normalize_categories(categories_key)
+
+
 def _format_category_value_label(v: Any) -> str:
     if isinstance(v, dict) and v.get("name") is not None:
         name = str(v.get("name"))
@@ -349,25 +512,117 @@ def _build_unified_system_prompt(
     include_scheduling: bool,
     reply_base: str,
     scheduling_instructions: str,
+    classify: bool = False,
 ) -> str:
+    """
+    reply guidelines, categories, [scheduling instructions], JSON shape rule (with
+    needsSchedulingContext when classify is set), trailer rules. Everything up to the
+    scheduling instructions is the same for every thread, so it forms the cacheable prefix.
+    The constant trailer rules are not moved in front of it: the scheduling section is item 3
+    after replyBase (1.) and categories (2.), the JSON rule describes the "scheduling" object
+    it defines, and the output rules are meant to be the last thing the model reads.
+    """
+    return "\n".join(
+        [
+            _stable_prompt_prefix(listener_settings, reply_base),
+            _variable_prompt_suffix(has_categories, include_scheduling, scheduling_instructions, classify),
+        ]
+    )
+
+
+def _stable_prompt_prefix(listener_settings: Dict[str, Any], reply_base: str) -> str:
+    """Reply guidelines and category block: the same for every thread of a listener."""
     lang = _normalize_lang(listener_settings.get("lang"))
     lines: List[str] = [reply_base]
     cat_lines, _ = _category_block_lines(listener_settings, lang)
     lines.extend(cat_lines)
+    return "\n".join(lines)
 
+
+def _variable_prompt_suffix(
+    has_categories: bool, include_scheduling: bool, scheduling_instructions: str, classify: bool
+) -> str:
+    """The sections after the cacheable prefix, in their usual order (trailer rules last)."""
+    lines: List[str] = []
     if include_scheduling:
         lines.append(scheduling_instructions)
-    lines.append(JSON_RULES[(has_categories, include_scheduling)])
+    rules = SPECULATIVE_JSON_RULES if classify else JSON_RULES
+    lines.append(rules[(has_categories, include_scheduling)])
     lines.append(TRAILER_RULES)
     return "\n".join(lines)
 
 
+class PromptTemplate(NamedTuple):
+    """Everything of the reply prompt that does not depend on the thread."""
+
+    system_message: str
+    include_scheduling: bool
+    # Length of the leading part shared by every thread with these settings.
+    prefix_chars: int
+
+
+@functools.lru_cache(maxsize=128)
+def _compile_prompt(
+    categories_key: str,
+    lang: str,
+    include_scheduling: bool,
+    reply_base: str,
+    scheduling_instructions: str,
+    classify: bool,
+) -> PromptTemplate:
+    normalized_cats = _categories_for(categories_key)
+    listener_settings = {"customCategories": normalized_cats or [], "lang": lang}
+    system_message = _build_unified_system_prompt(
+        bool(normalized_cats),
+        listener_settings,
+        include_scheduling,
+        reply_base,
+        scheduling_instructions,
+        classify,
+    )
+    prefix = _stable_prompt_prefix(listener_settings, reply_base)
+    return PromptTemplate(system_message, include_scheduling, len(prefix))
+
+
+def prompt_template(
+    inputs: Dict[str, Any],
+    include_scheduling: bool,
+    reply_base: str,
+    scheduling_instructions: str,
+    classify: bool = False,
+) -> PromptTemplate:
+    """
+    Compiled system prompt for (customCategories, lang, include_scheduling, prompt overrides,
+    classify), built once per process and reused by every thread with the same settings;
+    the system message stays byte-identical across threads.
+    """
+    return _compile_prompt(
+        _categories_key(inputs.get("customCategories")),
+        _normalize_lang(inputs.get("lang")),
+        include_scheduling,
+        reply_base,
+        scheduling_instructions,
+        classify,
+    )
+
+
+def _prompt_cache_stats() -> str:
+    info = _compile_prompt.cache_info()
+    return "prompts=%d/%d" % (info.hits, info.misses)
+
+
 def _build_single_shot_messages(
     inputs: Dict[str, Any],
     detection_response: Dict[str, Any],
     reply_base: str,
     scheduling_instructions: str,
+    classify: bool = False,
 ) -> Dict[str, str]:
+    """
+    systemMessage + userMessage for the reply. With classify, the model is also asked for
+    needsSchedulingContext (replyMode "speculative"). With promptCacheHints, prefixChars is
+    the length of the system message prefix that is stable across threads.
+    """
     combined = (inputs.get("combinedText") or "").strip()
     if not combined:
         return {"systemMessage": "", "userMessage": ""}
@@ -377,32 +632,152 @@ def _build_single_shot_messages(
     needs_sched = dpj.get("needsSchedulingContext") is True
     cal = inputs.get("calendarAvailability")
     has_slots = isinstance(cal, dict) and bool(cal.get("slots") or [])
-    include_scheduling = needs_sched and schedule_on and has_slots
-
-    user_info = inputs.get("customInfo") or ""
-    primary_key = (inputs.get("primaryKey") or "").strip()
-    airtable_data = inputs.get("airtableData")
-    normalized_cats = _normalize_categories(inputs.get("customCategories"))
-    lang = _normalize_lang(inputs.get("lang"))
-    listener_settings = {"customCategories": normalized_cats or [], "lang": lang}
-    has_categories = bool(normalized_cats)
+    template = prompt_template(
+        inputs, needs_sched and schedule_on and has_slots, reply_base, scheduling_instructions, classify
+    )
 
-    user_message = _build_user_message(combined, user_info, airtable_data, primary_key)
-    if include_scheduling:
+    user_message = _build_user_message(
+        combined,
+        inputs.get("customInfo") or "",
+        inputs.get("airtableData"),
+        (inputs.get("primaryKey") or "").strip(),
+    )
+    if template.include_scheduling:
         slot_block = _format_free_slots_section(cal)
         user_message = user_message + "\n\n---\n\n" + (slot_block or "(keine Slots)")
+    msgs = {"systemMessage": template.system_message, "userMessage": user_message}
+    if _as_bool(inputs.get("promptCacheHints")):
+        msgs["prefixChars"] = template.prefix_chars
+    return msgs
 
-    system_message = _build_unified_system_prompt(
-        has_categories,
-        listener_settings,
-        include_scheduling,
-        reply_base,
-        scheduling_instructions,
+
+def _include_scheduling(inputs: Dict[str, Any], needs_sched: bool) -> bool:
+    cal = inputs.get("calendarAvailability")
+    has_slots = isinstance(cal, dict) and bool(cal.get("slots") or [])
+    return needs_sched and _as_bool(inputs.get("scheduleAppointments")) and has_slots
+
+
+def _speculative_reply(
+    api: str,
+    token: str,
+    inputs: Dict[str, Any],
+    reply_base: str,
+    scheduling_instructions: str,
+    cache: Optional[ResponseCache] = None,
+) -> Optional[Dict[str, Any]]:
+    """
+    One reply call that assumes scheduling context is needed (it only matters when slots
+    are offered) and returns needsSchedulingContext alongside. A second call without the
+    slots is made unless the model confirms the conversation is about scheduling; a missing
+    or non-boolean needsSchedulingContext counts as "not confirmed".
+    """
+    assumed = _include_scheduling(inputs, True)
+    msgs = _build_single_shot_messages(
+        inputs, {"parsedJson": {"needsSchedulingContext": True}}, reply_base, scheduling_instructions, True
+    )
+    if not (msgs.get("systemMessage") or "").strip():
+        logger.info("message-reply-generator: empty systemMessage after build -> empty response")
+        return None
+    generated = _post_generate_response(
+        api,
+        token,
+        msgs["systemMessage"],
+        msgs["userMessage"],
+        timeouts_from_inputs(inputs, read_default=120),
+        cache,
+        prefix_chars=msgs.get("prefixChars"),
+    )
+    pj = generated.get("parsedJson") if isinstance(generated.get("parsedJson"), dict) else {}
+    needs_sched = pj.pop("needsSchedulingContext", None)
+    invalid = not isinstance(needs_sched, bool)
+    # Without slots in the prompt the answer cannot change the reply, whatever it says.
+    fallback = assumed and needs_sched is not True
+    _SPECULATION.record(fallback, assumed and invalid)
+    log = logger.warning if assumed and invalid else logger.info
+    log(
+        "message-reply-generator: speculative needsSchedulingContext=%r include_scheduling_in_prompt=%s "
+        "fallback=%s system_len=%d user_len=%d",
+        needs_sched,
+        assumed,
+        fallback,
+        len(msgs["systemMessage"]),
+        len(msgs["userMessage"]),
+    )
+    if not fallback:
+        return generated
+    msgs = _build_single_shot_messages(
+        inputs, {"parsedJson": {"needsSchedulingContext": False}}, reply_base, scheduling_instructions
+    )
+    return _post_generate_response(
+        api,
+        token,
+        msgs["systemMessage"],
+        msgs["userMessage"],
+        timeouts_from_inputs(inputs, read_default=120),
+        cache,
+        prefix_chars=msgs.get("prefixChars"),
     )
-    return {"systemMessage": system_message, "userMessage": user_message}
 
 
-def handler(inputs: Dict[str, Any]) -> Dict[str, Any]:
+def _classify_then_reply(
+    api: str,
+    token: str,
+    inputs: Dict[str, Any],
+    combined: str,
+    classify_system: str,
+    reply_base: str,
+    scheduling_instructions: str,
+    cache: Optional[ResponseCache] = None,
+) -> Optional[Dict[str, Any]]:
+    """needsSchedulingContext classification call, then the reply call (default replyMode)."""
+    classify = _post_generate_response(
+        api,
+        token,
+        classify_system,
+        combined,
+        timeouts_from_inputs(inputs, read_default=90),
+        cache,
+        "classify",
+        # The classifier's system message is the same for every thread.
+        len(classify_system) if _as_bool(inputs.get("promptCacheHints")) else None,
+    )
+    dpj = classify.get("parsedJson") if isinstance(classify.get("parsedJson"), dict) else {}
+    needs_sched = dpj.get("needsSchedulingContext") is True
+    cal2 = inputs.get("calendarAvailability")
+    has_slots = isinstance(cal2, dict) and bool(cal2.get("slots") or [])
+    include_sched = needs_sched and _as_bool(inputs.get("scheduleAppointments")) and has_slots
+    logger.info(
+        "message-reply-generator: after classify needsSchedulingContext=%s has_slots=%s "
+        "include_scheduling_in_prompt=%s classify_keys=%s",
+        needs_sched,
+        has_slots,
+        include_sched,
+        list(classify.keys()) if isinstance(classify, dict) else type(classify).__name__,
+    )
+
+    msgs = _build_single_shot_messages(inputs, classify, reply_base, scheduling_instructions)
+    if not (msgs.get("systemMessage") or "").strip():
+        logger.info("message-reply-generator: empty systemMessage after build -> empty response")
+        return None
+
+    logger.info(
+        "message-reply-generator: second call system_len=%d user_len=%d",
+        len(msgs.get("systemMessage") or ""),
+        len(msgs.get("userMessage") or ""),
+    )
+
+    return _post_generate_response(
+        api,
+        token,
+        msgs["systemMessage"],
+        msgs["userMessage"],
+        timeouts_from_inputs(inputs, read_default=120),
+        cache,
+        prefix_chars=msgs.get("prefixChars"),
+    )
+
+
+def _handle_thread(inputs: Dict[str, Any]) -> Dict[str, Any]:
     api = (inputs.get("apiUrl") or "").strip()
     token = (inputs.get("executionToken") or "").strip()
     combined = (inputs.get("combinedText") or "").strip()
@@ -453,40 +828,16 @@ def handler(inputs: Dict[str, Any]) -> Dict[str, Any]:
     if not api or not token:
         raise ValueError("apiUrl and executionToken are required")
 
-    classify = _post_generate_response(api, token, classify_system, combined, timeout=90)
-    dpj = classify.get("parsedJson") if isinstance(classify.get("parsedJson"), dict) else {}
-    needs_sched = dpj.get("needsSchedulingContext") is True
-    cal2 = inputs.get("calendarAvailability")
-    has_slots = isinstance(cal2, dict) and bool(cal2.get("slots") or [])
-    include_sched = needs_sched and _as_bool(inputs.get("scheduleAppointments")) and has_slots
-    logger.info(
-        "message-reply-generator: after classify needsSchedulingContext=%s has_slots=%s "
-        "include_scheduling_in_prompt=%s classify_keys=%s",
-        needs_sched,
-        has_slots,
-        include_sched,
-        list(classify.keys()) if isinstance(classify, dict) else type(classify).__name__,
-    )
-
-    msgs = _build_single_shot_messages(inputs, classify, reply_base, scheduling_instructions)
-    if not (msgs.get("systemMessage") or "").strip():
-        logger.info("message-reply-generator: empty systemMessage after build -> empty response")
+    cache = cache_from_inputs(inputs)
+    if (inputs.get("replyMode") or "").strip() == "speculative":
+        generated = _speculative_reply(api, token, inputs, reply_base, scheduling_instructions, cache)
+    else:
+        generated = _classify_then_reply(
+            api, token, inputs, combined, classify_system, reply_base, scheduling_instructions, cache
+        )
+    if generated is None:
         return empty_out
-
-    logger.info(
-        "message-reply-generator: second call system_len=%d user_len=%d",
-        len(msgs.get("systemMessage") or ""),
-        len(msgs.get("userMessage") or ""),
-    )
-
-    generated = _post_generate_response(
-        api,
-        token,
-        msgs["systemMessage"],
-        msgs["userMessage"],
-        timeout=120,
-    )
-    normalized_cats = _normalize_categories(inputs.get("customCategories"))
+    normalized_cats = _categories_for(_categories_key(inputs.get("customCategories")))
     lang = _normalize_lang(inputs.get("lang"))
     g_pj = generated.get("parsedJson") if isinstance(generated.get("parsedJson"), dict) else {}
     if isinstance(g_pj, dict) and normalized_cats and "categories" in g_pj:
@@ -503,9 +854,75 @@ def handler(inputs: Dict[str, Any]) -> Dict[str, Any]:
     sched = g_pj.get("scheduling") if isinstance(g_pj, dict) else None
     reply_len = len(str((g_pj or {}).get("reply") or generated.get("reply") or ""))
     logger.info(
-        "message-reply-generator: done reply_len=%s scheduling_type=%s wantsScheduling=%s",
+        "message-reply-generator: done reply_len=%s scheduling_type=%s wantsScheduling=%s http=[%s] "
+        "speculative=[%s] cache=[%s %s] tokens=[%s]",
         reply_len,
         type(sched).__name__,
         (sched or {}).get("wantsScheduling") if isinstance(sched, dict) else None,
+        default_client().stats(),
+        _SPECULATION.summary(),
+        cache_stats(),
+        _prompt_cache_stats(),
+        _TOKENS.summary(),
     )
     return {"response": {"data": generated}}
+
+
+def _batch_handler(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    {"response": <empty reply>, "responses": [...]} for inputs["threads"], in input order.
+    Each entry of `threads` holds the per-thread inputs (combinedText, primaryKey,
+    airtableData, ...) on top of the shared top-level ones. Each pool task handles one
+    thread end to end (_handle_thread: classify, then reply), not one stage of it. A failing
+    thread gets an empty reply plus "error"; the others are kept. `response` is the empty
+    reply so the output still satisfies the single-thread contract.
+    """
+    shared = {k: v for k, v in inputs.items() if k != "threads"}
+    threads = [{**shared, **t} if isinstance(t, dict) else shared for t in inputs["threads"]]
+    try:
+        workers = int(inputs.get("maxConcurrency") or DEFAULT_MAX_CONCURRENCY)
+    except (TypeError, ValueError):
+        workers = DEFAULT_MAX_CONCURRENCY
+    workers = max(1, min(workers, len(threads)))
+    t0 = time.monotonic()
+    thread_ms: List[float] = []
+
+    def empty() -> Dict[str, Any]:
+        return {"data": {"reply": "", "parsedJson": {"reply": "", "scheduling": None}}}
+
+    def run(item: Tuple[int, Dict[str, Any]]) -> Dict[str, Any]:
+        index, thread_inputs = item
+        started = time.monotonic()
+        try:
+            return _handle_thread(thread_inputs)
+        except Exception as e:
+            logger.exception(
+                "message-reply-generator: thread failed index=%d error=%s", index, str(e)[:500]
+            )
+            return {"response": empty(), "error": str(e)[:500]}
+        finally:
+            thread_ms.append((time.monotonic() - started) * 1000)
+
+    if not threads:
+        responses: List[Dict[str, Any]] = []
+    else:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="reply") as pool:
+            responses = list(pool.map(run, enumerate(threads)))
+    logger.info(
+        "message-reply-generator: batch done threads=%d workers=%d errors=%d elapsed_ms=%d "
+        "sum_thread_ms=%d max_thread_ms=%d",
+        len(threads),
+        workers,
+        sum(1 for r in responses if "error" in r),
+        (time.monotonic() - t0) * 1000,
+        sum(thread_ms),
+        max(thread_ms, default=0),
+    )
+    return {"response": empty(), "responses": responses}
+
+
+def handler(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    inputs = inputs or {}
+    if isinstance(inputs.get("threads"), list):
+        return _batch_handler(inputs)
+    return _handle_thread(inputs)
@@ -0,0 +1,224 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import index
+from index import handler
+
+_SLOTS = {
+    "timeZone": "UTC",
+    "slots": [
+        {"start": "2026-10-20T09:00:00+00:00", "end": "2026-10-20T09:30:00+00:00"},
+        {"start": "2026-10-20T11:00:00+00:00", "end": "2026-10-20T11:30:00+00:00"},
+    ],
+}
+
+
+class _StubLLM(BaseHTTPRequestHandler):
+    # Bodies of every generate-response request, in arrival order.
+    requests = []
+    # needsSchedulingContext of the classifier, and of a speculative reply ("missing" leaves it out).
+    classify_answer = True
+    speculative_answer = True
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, body):
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append(body)
+        if self.path != "/copilot/generate-response" or self.headers.get("Authorization") != "Bearer exec":
+            self._send_json(404, {"error": "not found"})
+            return
+        if "SLOW" in body["message"]:
+            time.sleep(0.2)
+        if "FAIL" in body["message"]:
+            self._send_json(500, {"error": "upstream failed"})
+            return
+        if body["systemMessage"].startswith("Du klassifizierst"):
+            parsed = {"needsSchedulingContext": self.classify_answer}
+        else:
+            # The reply names the thread, so tests can tell answers apart.
+            parsed = {"reply": "Antwort auf " + body["message"].split("\n")[0], "scheduling": None}
+            if "needsSchedulingContext" in body["systemMessage"] and self.speculative_answer != "missing":
+                parsed["needsSchedulingContext"] = self.speculative_answer
+        self._send_json(200, {"reply": parsed.get("reply", ""), "parsedJson": parsed})
+
+
+class TestHandlerFunction(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubLLM)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.api_url = "http://127.0.0.1:%d" % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        del _StubLLM.requests[:]
+
+    def _inputs(self, **overrides):
+        inputs = {
+            "apiUrl": self.api_url,
+            "executionToken": "exec",
+            "combinedText": "Kunde: Passt Ihnen Dienstag für eine Besichtigung?",
+            "scheduleAppointments": True,
+            "calendarAvailability": _SLOTS,
+        }
+        inputs.update(overrides)
+        return inputs
+
+    def _speculative(self, answer):
+        _StubLLM.speculative_answer = answer
+        self.addCleanup(setattr, _StubLLM, "speculative_answer", True)
+        return handler(self._inputs(replyMode="speculative"))
+
+    def test_speculative_reply_keeps_the_first_answer(self):
+        fallbacks = index._SPECULATION.fallbacks
+        out = self._speculative(True)
+        self.assertEqual(len(_StubLLM.requests), 1)
+        first = _StubLLM.requests[0]
+        self.assertIn("Freie Zeitfenster", first["message"])
+        # The speculative prompt has its own schema, not JSON_RULES plus an extra key.
+        self.assertIn(index.SPECULATIVE_JSON_RULES[(False, True)], first["systemMessage"])
+        self.assertNotIn(index.JSON_RULES[(False, True)], first["systemMessage"])
+        parsed = out["response"]["data"]["parsedJson"]
+        self.assertNotIn("needsSchedulingContext", parsed)
+        self.assertTrue(parsed["reply"].startswith("Antwort auf Kunde"))
+        self.assertEqual(index._SPECULATION.fallbacks, fallbacks)
+
+    def test_speculative_reply_falls_back_without_slots(self):
+        for answer, invalid in ((False, 0), ("missing", 1), ("yes", 1)):
+            del _StubLLM.requests[:]
+            counts = (index._SPECULATION.fallbacks, index._SPECULATION.invalid)
+            self._speculative(answer)
+            self.assertEqual(len(_StubLLM.requests), 2, answer)
+            retry = _StubLLM.requests[1]
+            self.assertNotIn("Freie Zeitfenster", retry["message"])
+            self.assertNotIn("needsSchedulingContext", retry["systemMessage"])
+            self.assertEqual(index._SPECULATION.fallbacks - counts[0], 1)
+            self.assertEqual(index._SPECULATION.invalid - counts[1], invalid)
+
+    def test_speculative_reply_without_slots_never_falls_back(self):
+        _StubLLM.speculative_answer = "missing"
+        self.addCleanup(setattr, _StubLLM, "speculative_answer", True)
+        handler(self._inputs(replyMode="speculative", calendarAvailability=None))
+        self.assertEqual(len(_StubLLM.requests), 1)
+
+    def test_batch_keeps_input_order_and_isolates_failures(self):
+        texts = ["SLOW eins", "zwei", "FAIL drei", "vier", "SLOW fünf"]
+        out = handler(
+            self._inputs(
+                combinedText=None,
+                maxConcurrency=5,
+                threads=[{"combinedText": t} for t in texts],
+            )
+        )
+        self.assertEqual(out["response"]["data"]["reply"], "")
+        responses = out["responses"]
+        self.assertEqual(len(responses), len(texts))
+        for text, entry in zip(texts, responses):
+            reply = entry["response"]["data"]["parsedJson"]["reply"]
+            if text.startswith("FAIL"):
+                self.assertEqual(reply, "")
+                self.assertIn("500", entry["error"])
+            else:
+                self.assertEqual(reply, "Antwort auf " + text)
+                self.assertNotIn("error", entry)
+
+    def test_response_cache_hits_misses_and_expires(self):
+        sqlite_store = "sqlite:" + os.path.join(tempfile.mkdtemp(), "responses.sqlite3")
+        for store in ("memory", sqlite_store):
+            del _StubLLM.requests[:]
+            inputs = self._inputs(
+                responseCache=store,
+                cacheScope="ttl-" + store,
+                responseCacheTtlSeconds=0.3,
+                classifyCacheTtlSeconds=0.3,
+            )
+            first = handler(inputs)
+            self.assertEqual(len(_StubLLM.requests), 2)
+            self.assertEqual(handler(inputs), first)
+            self.assertEqual(len(_StubLLM.requests), 2, store)
+            # Another conversation misses.
+            handler(dict(inputs, combinedText=inputs["combinedText"] + " Oder Mittwoch?"))
+            self.assertEqual(len(_StubLLM.requests), 4, store)
+            time.sleep(0.4)
+            self.assertEqual(handler(inputs), first)
+            self.assertEqual(len(_StubLLM.requests), 6, store)
+
+    def test_response_cache_is_scoped_and_optional(self):
+        inputs = self._inputs(responseCache="memory", combinedText="Kunde: Wann passt es?")
+        handler(dict(inputs, cacheScope="ann"))
+        handler(dict(inputs, cacheScope="bob"))
+        self.assertEqual(len(_StubLLM.requests), 4)
+        handler(dict(inputs, cacheScope="ann"))
+        self.assertEqual(len(_StubLLM.requests), 4)
+        # Without responseCache every run calls the API.
+        handler(dict(inputs, responseCache=None, cacheScope="ann"))
+        self.assertEqual(len(_StubLLM.requests), 6)
+
+    def test_prompt_is_compiled_once_per_settings(self):
+        def categories():
+            return [{"name": "Interesse", "values": ["hoch", "niedrig"]}]
+
+        args = (index.DEFAULT_REPLY_BASE, index.DEFAULT_SCHEDULING_INSTRUCTIONS)
+        first = index.prompt_template({"customCategories": categories(), "lang": "de"}, True, *args)
+        again = index.prompt_template({"customCategories": categories(), "lang": "DE"}, True, *args)
+        self.assertIs(again, first)
+        self.assertIs(again.system_message, first.system_message)
+        other = index.prompt_template({"customCategories": categories(), "lang": "de"}, False, *args)
+        self.assertIsNot(other, first)
+        self.assertIn("Interesse", first.system_message)
+
+    def test_stable_prefix_is_shared_and_marked_for_caching(self):
+        categories = [{"name": "Interesse", "values": ["hoch", "niedrig"]}]
+        _StubLLM.classify_answer = True
+        self.addCleanup(setattr, _StubLLM, "classify_answer", True)
+        for text in ("Kunde: Wann passt es?", "Kunde: Was kostet das?"):
+            handler(self._inputs(combinedText=text, customCategories=categories, promptCacheHints=True))
+        _StubLLM.classify_answer = False
+        handler(self._inputs(combinedText="Kunde: Danke!", customCategories=categories, promptCacheHints=True))
+        replies = [r for r in _StubLLM.requests if not r["systemMessage"].startswith("Du klassifizierst")]
+        self.assertEqual(len(replies), 3)
+        prefixes = set()
+        for body in replies:
+            control = body["cacheControl"]
+            prefix = body["systemMessage"][: control["systemPrefixChars"]]
+            prefixes.add(prefix)
+            self.assertEqual(control["key"], hashlib.sha256(prefix.encode()).hexdigest()[:32])
+            # Only the stable part is marked: no scheduling or output rules inside the prefix.
+            self.assertIn("Interesse", prefix)
+            self.assertNotIn("Terminfindung", prefix)
+            self.assertNotIn("JSON-Objekt", prefix)
+        self.assertEqual(len(prefixes), 1)
+        # The sections keep their usual order: ..., scheduling, JSON rule, trailer rules last.
+        scheduled = replies[0]["systemMessage"]
+        self.assertLess(scheduled.index("Terminfindung"), scheduled.index(index.JSON_RULES[(True, True)]))
+        self.assertTrue(scheduled.endswith(index.TRAILER_RULES))
+        self.assertTrue(replies[2]["systemMessage"].endswith(index.TRAILER_RULES))
+        # Without promptCacheHints no hint is sent.
+        del _StubLLM.requests[:]
+        handler(self._inputs(customCategories=categories))
+        self.assertFalse(any("cacheControl" in r for r in _StubLLM.requests))
+
+
+if __name__ == '__main__':
+    unittest.main()
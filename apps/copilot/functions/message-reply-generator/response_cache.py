@@ -0,0 +1,220 @@
+"""
+Content-addressed cache for POST /copilot/generate-response (opt-in via responseCache).
+
+The key is a hash of the cache scope (cacheScope, e.g. the user or tenant id; else a hash of
+the executionToken) and of everything that determines the answer: route, systemMessage,
+message and the request settings (parseResponseToJson). The scope keeps a store shared by
+several mailboxes from answering one with another's replies. Re-runs of an unchanged thread (retries,
+re-runs after draft failures) therefore reuse both LLM answers, while any change to the
+conversation, prompts, categories or offered slots misses. Classifications are kept longer
+(classifyCacheTtlSeconds) than replies (responseCacheTtlSeconds).
+
+Backends (responseCache): "memory" (LRU for the process lifetime) or "sqlite:<path>"
+(survives warm container reuse and restarts on the same disk). Both are size-bounded,
+evicting the least recently used entries; expired entries count as misses. Values are
+stored as JSON text, so callers may modify what they get back.
+"""
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time as _time
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL_SECONDS = {"classify": 7 * 24 * 3600.0, "reply": 24 * 3600.0}
+_MEMORY_MAX_ENTRIES = 2048
+_SQLITE_MAX_ENTRIES = 20000
+
+
+def cache_key(scope: str, url: str, body: Dict[str, Any]) -> str:
+    raw = json.dumps([scope, url, body], sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class MemoryResponseStore:
+    def __init__(self, maxsize: int = _MEMORY_MAX_ENTRIES) -> None:
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= _time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def put(self, key: str, value: str, ttl: float) -> None:
+        with self._lock:
+            self._data[key] = (_time.time() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+
+class SQLiteResponseStore:
+    """Same interface as MemoryResponseStore."""
+
+    def __init__(self, path: str, maxsize: int = _SQLITE_MAX_ENTRIES) -> None:
+        self.path = path
+        self.maxsize = maxsize
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL, used_at REAL NOT NULL)"
+            )
+            db.execute("CREATE INDEX IF NOT EXISTS response_cache_used ON response_cache (used_at)")
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One transaction (committed on success, rolled back on error); closes the connection."""
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def get(self, key: str) -> Optional[str]:
+        now = _time.time()
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT value FROM response_cache WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row is not None:
+                db.execute("UPDATE response_cache SET used_at = ? WHERE key = ?", (now, key))
+        return row[0] if row else None
+
+    def put(self, key: str, value: str, ttl: float) -> None:
+        now = _time.time()
+        with self._connect() as db:
+            db.execute(
+                "INSERT OR REPLACE INTO response_cache (key, value, expires_at, used_at) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now),
+            )
+            db.execute("DELETE FROM response_cache WHERE expires_at <= ?", (now,))
+            db.execute(
+                "DELETE FROM response_cache WHERE key IN ("
+                "SELECT key FROM response_cache ORDER BY used_at DESC LIMIT -1 OFFSET ?)",
+                (self.maxsize,),
+            )
+
+
+_MEMORY_STORE = MemoryResponseStore()
+_SQLITE_STORES: Dict[str, SQLiteResponseStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def open_store(spec: Optional[str]):
+    """None/"" (no caching), "memory" or "sqlite:<path>"."""
+    spec = (spec or "").strip()
+    if not spec or spec == "off":
+        return None
+    if spec == "memory":
+        return _MEMORY_STORE
+    if spec.startswith("sqlite:"):
+        path = spec[len("sqlite:") :]
+        with _STORES_LOCK:
+            if path not in _SQLITE_STORES:
+                _SQLITE_STORES[path] = SQLiteResponseStore(path)
+            return _SQLITE_STORES[path]
+    raise ValueError("unknown responseCache %r (use memory or sqlite:<path>)" % spec)
+
+
+class _CacheStats:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: Dict[str, list] = {}
+
+    def record(self, kind: str, hit: bool) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(kind, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def summary(self) -> str:
+        """e.g. "classify=3/1 reply=2/2 hit_rate=0.62" (hits/misses, process-wide)."""
+        with self._lock:
+            counts = {k: list(v) for k, v in sorted(self._counts.items())}
+        hits = sum(v[0] for v in counts.values())
+        total = sum(v[0] + v[1] for v in counts.values())
+        parts = ["%s=%d/%d" % (k, v[0], v[1]) for k, v in counts.items()]
+        parts.append("hit_rate=%.2f" % (hits / total if total else 0.0))
+        return " ".join(parts)
+
+
+_STATS = _CacheStats()
+
+
+def cache_stats() -> str:
+    return _STATS.summary()
+
+
+class ResponseCache:
+    """A store plus the scope and per-kind TTLs of one invocation."""
+
+    def __init__(self, store, scope: str, ttl: Optional[Dict[str, float]] = None) -> None:
+        self.store = store
+        self.scope = scope
+        self.ttl = dict(DEFAULT_TTL_SECONDS, **(ttl or {}))
+
+    def key(self, url: str, body: Dict[str, Any]) -> str:
+        return cache_key(self.scope, url, body)
+
+    def get(self, kind: str, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = self.store.get(key)
+        except sqlite3.Error as e:
+            logger.warning("message-reply-generator: response cache read failed error=%s", e)
+            raw = None
+        _STATS.record(kind, raw is not None)
+        return json.loads(raw) if raw is not None else None
+
+    def put(self, kind: str, key: str, value: Dict[str, Any]) -> None:
+        try:
+            self.store.put(key, json.dumps(value, ensure_ascii=False), self.ttl[kind])
+        except sqlite3.Error as e:
+            logger.warning("message-reply-generator: response cache write failed error=%s", e)
+
+
+def _seconds(raw: Any) -> Optional[float]:
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def cache_scope(inputs: Dict[str, Any]) -> str:
+    """cacheScope, or a hash of the executionToken (safe, but only hits within that token)."""
+    scope = str(inputs.get("cacheScope") or "").strip()
+    if scope:
+        return "scope:" + scope
+    token = (inputs.get("executionToken") or "").strip()
+    return "token:" + hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+def cache_from_inputs(inputs: Dict[str, Any]) -> Optional[ResponseCache]:
+    """
+    responseCache / cacheScope / responseCacheTtlSeconds / classifyCacheTtlSeconds, or None
+    when off.
+    """
+    store = open_store(inputs.get("responseCache"))
+    if store is None:
+        return None
+    ttl = {}
+    for kind, name in (("reply", "responseCacheTtlSeconds"), ("classify", "classifyCacheTtlSeconds")):
+        seconds = _seconds(inputs.get(name))
+        if seconds is not None:
+            ttl[kind] = seconds
+    return ResponseCache(store, cache_scope(inputs), ttl)
@@ -0,0 +1,275 @@
+"""
+calendarView/delta sync for outlook-calendar-free-slots.
+
+The first run in a sync window pages through /calendarView/delta and stores one busy
+interval per event plus the final deltaLink; later runs only request the deltaLink and apply
+the changed/removed events. The window is widened to whole weeks so it (and the deltaLink)
+stays valid while "today" moves through the week.
+
+Stores are pluggable (calendarSyncStore): "sqlite:<path>" (default, survives warm
+container reuse and process restarts on the same disk) or "memory" (process lifetime).
+State is scoped per user and timezone, and one scope holds exactly one window. A scope not
+synced for longer than its window is deleted on the next sync of any scope: by then the whole
+window has passed, so neither its rows nor its deltaLink can be used again.
+"""
+from __future__ import annotations
+
+import contextlib
+import logging
+import sqlite3
+import threading
+import time as _time
+import urllib.parse
+from datetime import date, datetime, time, timedelta
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from copilot_http import HTTPError, Timeouts
+
+from graph_calendar import GRAPH_BASE_URL, _stream_page, graph_time
+from graph_retry import RetryPolicy
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORE = "sqlite:/tmp/outlook-calendar-sync.sqlite3"
+_PAGE_SIZE = 100
+# Expired or unknown delta tokens; the window is synced from scratch.
+_RESYNC_STATUSES = (400, 404, 410)
+
+Busy = Tuple[str, str]
+
+
+class SyncStats(NamedTuple):
+    full: bool
+    pages: int
+    upserts: int
+    removed: int
+    pruned: int
+    elapsed_ms: int
+
+
+class MemoryEventStore:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._state: Dict[str, Tuple[str, Optional[str]]] = {}
+        self._busy: Dict[str, Dict[str, Busy]] = {}
+        self._updated: Dict[str, float] = {}
+
+    def load_state(self, scope: str) -> Optional[Tuple[str, str]]:
+        """(window, deltaLink) of the last completed sync, or None."""
+        with self._lock:
+            state = self._state.get(scope)
+        return state if state and state[1] else None
+
+    def busy(self, scope: str) -> List[Busy]:
+        with self._lock:
+            return sorted(self._busy.get(scope, {}).values())
+
+    def apply(
+        self,
+        scope: str,
+        window: str,
+        delta_link: Optional[str],
+        upserts: Dict[str, Busy],
+        removed: Iterable[str],
+        reset: bool,
+    ) -> None:
+        with self._lock:
+            rows = {} if reset else dict(self._busy.get(scope, {}))
+            for ev_id in removed:
+                rows.pop(ev_id, None)
+            rows.update(upserts)
+            self._busy[scope] = rows
+            self._state[scope] = (window, delta_link)
+            self._updated[scope] = _time.time()
+
+    def prune(self, max_age: float) -> int:
+        """Drop scopes not synced for max_age seconds; returns how many."""
+        cutoff = _time.time() - max_age
+        with self._lock:
+            stale = [scope for scope, at in self._updated.items() if at < cutoff]
+            for scope in stale:
+                self._state.pop(scope, None)
+                self._busy.pop(scope, None)
+                del self._updated[scope]
+        return len(stale)
+
+
+class SQLiteEventStore:
+    """Same interface as MemoryEventStore, one transaction per apply()."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                "scope TEXT PRIMARY KEY, window TEXT NOT NULL, delta_link TEXT, updated_at REAL)"
+            )
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS busy ("
+                "scope TEXT NOT NULL, event_id TEXT NOT NULL, start TEXT NOT NULL, end TEXT NOT NULL, "
+                "PRIMARY KEY (scope, event_id))"
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """One transaction (committed on success, rolled back on error); closes the connection."""
+        db = sqlite3.connect(self.path, timeout=30)
+        try:
+            with db:
+                yield db
+        finally:
+            db.close()
+
+    def load_state(self, scope: str) -> Optional[Tuple[str, str]]:
+        with self._connect() as db:
+            row = db.execute(
+                "SELECT window, delta_link FROM sync_state WHERE scope = ?", (scope,)
+            ).fetchone()
+        return (row[0], row[1]) if row and row[1] else None
+
+    def busy(self, scope: str) -> List[Busy]:
+        with self._connect() as db:
+            return [
+                (s, e)
+                for s, e in db.execute(
+                    "SELECT start, end FROM busy WHERE scope = ? ORDER BY start, end", (scope,)
+                )
+            ]
+
+    def apply(
+        self,
+        scope: str,
+        window: str,
+        delta_link: Optional[str],
+        upserts: Dict[str, Busy],
+        removed: Iterable[str],
+        reset: bool,
+    ) -> None:
+        with self._connect() as db:
+            if reset:
+                db.execute("DELETE FROM busy WHERE scope = ?", (scope,))
+            db.executemany(
+                "DELETE FROM busy WHERE scope = ? AND event_id = ?",
+                [(scope, ev_id) for ev_id in removed],
+            )
+            db.executemany(
+                "INSERT OR REPLACE INTO busy (scope, event_id, start, end) VALUES (?, ?, ?, ?)",
+                [(scope, ev_id, s, e) for ev_id, (s, e) in upserts.items()],
+            )
+            db.execute(
+                "INSERT OR REPLACE INTO sync_state (scope, window, delta_link, updated_at) "
+                "VALUES (?, ?, ?, ?)",
+                (scope, window, delta_link, _time.time()),
+            )
+
+    def prune(self, max_age: float) -> int:
+        cutoff = _time.time() - max_age
+        with self._connect() as db:
+            db.execute(
+                "DELETE FROM busy WHERE scope IN (SELECT scope FROM sync_state WHERE updated_at < ?)",
+                (cutoff,),
+            )
+            return db.execute("DELETE FROM sync_state WHERE updated_at < ?", (cutoff,)).rowcount
+
+
+_MEMORY_STORE = MemoryEventStore()
+_SQLITE_STORES: Dict[str, SQLiteEventStore] = {}
+
+
+def open_store(spec: Optional[str]):
+    """"memory" or "sqlite:<path>" (default DEFAULT_STORE)."""
+    spec = (spec or DEFAULT_STORE).strip()
+    if spec == "memory":
+        return _MEMORY_STORE
+    if spec.startswith("sqlite:"):
+        path = spec[len("sqlite:") :]
+        if path not in _SQLITE_STORES:
+            _SQLITE_STORES[path] = SQLiteEventStore(path)
+        return _SQLITE_STORES[path]
+    raise ValueError("unknown calendarSyncStore %r (use memory or sqlite:<path>)" % spec)
+
+
+def sync_window(start_day: date, end_day: date, tz: ZoneInfo) -> Tuple[datetime, datetime]:
+    """[Monday of start_day's week, end of end_day's week) in tz."""
+    first = start_day - timedelta(days=start_day.weekday())
+    last = end_day + timedelta(days=7 - end_day.weekday())
+    return (
+        datetime.combine(first, time.min, tzinfo=tz),
+        datetime.combine(last, time.min, tzinfo=tz),
+    )
+
+
+def sync_busy_intervals(
+    store,
+    scope: str,
+    token: str,
+    tz_name: str,
+    window: Tuple[datetime, datetime],
+    to_busy: Callable[[dict], Optional[Busy]],
+    base_url: str = GRAPH_BASE_URL,
+    calendar_path: str = "/me",
+    timeouts: Optional[Timeouts] = None,
+    retry: Optional[RetryPolicy] = None,
+) -> Tuple[List[Busy], SyncStats]:
+    """
+    Bring the store up to date for `scope` and return all stored busy intervals.
+    `to_busy` turns a Graph event into (start, end) or None for free/unusable events.
+    """
+    t0 = _time.monotonic()
+    window_key = graph_time(window[0]) + "/" + graph_time(window[1])
+    initial = (
+        base_url.rstrip("/")
+        + calendar_path
+        + "/calendarView/delta?"
+        + urllib.parse.urlencode(
+            {"startDateTime": graph_time(window[0]), "endDateTime": graph_time(window[1])}
+        )
+    )
+    state = store.load_state(scope)
+    reset = state is None or state[0] != window_key
+    url = initial if reset else state[1]
+
+    upserts: Dict[str, Busy] = {}
+    removed: set = set()
+    pages = 0
+    delta_link: Optional[str] = None
+
+    def on_event(ev: dict) -> None:
+        ev_id = ev.get("id")
+        if not ev_id:
+            return
+        busy = None if "@removed" in ev else to_busy(ev)
+        if busy is None:
+            upserts.pop(ev_id, None)
+            removed.add(ev_id)
+        else:
+            removed.discard(ev_id)
+            upserts[ev_id] = busy
+
+    while url:
+        try:
+            # No rewind needed: replaying a page re-applies the same changes in the same order.
+            rest, _ = _stream_page(
+                url, token, tz_name, on_event, page_size=_PAGE_SIZE, timeouts=timeouts, retry=retry
+            )
+        except HTTPError as e:
+            if reset or e.code not in _RESYNC_STATUSES:
+                raise
+            logger.warning(
+                "outlook-calendar-free-slots: deltaLink rejected status=%d — full resync", e.code
+            )
+            reset, url = True, initial
+            upserts.clear()
+            removed.clear()
+            continue
+        pages += 1
+        url = rest.get("@odata.nextLink")
+        delta_link = rest.get("@odata.deltaLink") or delta_link
+
+    store.apply(scope, window_key, delta_link, upserts, removed, reset)
+    pruned = store.prune((window[1] - window[0]).total_seconds())
+    stats = SyncStats(
+        reset, pages, len(upserts), len(removed), pruned, int((_time.monotonic() - t0) * 1000)
+    )
+    return store.busy(scope), stats
@@ -0,0 +1,728 @@
+"""
+Microsoft Graph calendar fetching for outlook-calendar-free-slots: calendarView events and
+getSchedule free/busy.
+
+The requested range is split into time shards that are fetched concurrently, each following
+its own @odata.nextLink pages. Shards are ordered by start/dateTime and concatenated in shard
+order; events spanning a shard boundary are returned by both shards and kept once (first
+shard wins), so the merged list has the same order as a single ordered calendarView.
+Pages are parsed while they stream in (copilot_http.parse_json_stream), one event at a time.
+
+Free events are filtered by the server ($filter=showAs ne 'free', dropped for the rest of the
+process if a Graph endpoint rejects it) and only the fields slot computation needs are
+selected. $top adapts to what earlier pages of the run cost (see PageSizer). Throttled or
+failed requests are retried page by page (see graph_retry).
+"""
+from __future__ import annotations
+
+import base64
+import functools
+import hashlib
+import json
+import logging
+import threading
+import time as _time
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from copilot_http import HTTPError, StreamingResponse, Timeouts, default_client, parse_json_stream
+
+from graph_retry import RetryPolicy, call_with_retries
+
+logger = logging.getLogger(__name__)
+
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+DEFAULT_SHARD_DAYS = 7
+DEFAULT_MAX_WORKERS = 4
+# id is what boundary-spanning events are deduplicated by; showAs is re-checked client-side.
+_SELECT = "id,start,end,showAs"
+_FREE_FILTER = "showAs ne 'free'"
+_PAGE_SIZE = 100
+DEFAULT_TIMEOUTS = Timeouts(10.0, 60.0)
+
+# Base URLs whose calendarView answered $filter on showAs with 400.
+_FILTER_REJECTED: set = set()
+
+
+class FetchStats(NamedTuple):
+    shards: int
+    workers: int
+    pages: int
+    duplicates: int
+    elapsed_ms: int
+    # Events received, before to_item() dropped any.
+    events: int
+    server_filter: bool
+    # PageSizer.summary()
+    paging: str
+
+
+# Page size bounds and the budget one calendarView page should stay within.
+_MIN_PAGE = 25
+_MAX_PAGE = 1000
+_PAGE_TARGET_MS = 2000.0
+_PAGE_MAX_BYTES = 4 * 1024 * 1024
+
+
+class PageSizer:
+    """
+    $top for the next calendarView request, from the per-event time and wire bytes of the
+    pages seen so far in this run (exponentially weighted). Larger pages save round trips
+    until a page would take longer than _PAGE_TARGET_MS or transfer more than _PAGE_MAX_BYTES;
+    the size at most doubles per page. Shared by the shard threads.
+    """
+
+    def __init__(self, initial: int = _PAGE_SIZE) -> None:
+        self._lock = threading.Lock()
+        self._top = initial
+        self._ms_per_event: Optional[float] = None
+        self._bytes_per_event: Optional[float] = None
+        self._pages = 0
+        self._chosen: List[int] = [initial]
+
+    def top(self) -> int:
+        with self._lock:
+            return self._top
+
+    def observe(self, events: int, wire_bytes: int, total_ms: float) -> None:
+        if events <= 0:
+            return
+        with self._lock:
+            self._pages += 1
+            ms, size = total_ms / events, wire_bytes / events
+            if self._ms_per_event is None:
+                self._ms_per_event, self._bytes_per_event = ms, size
+            else:
+                self._ms_per_event = 0.5 * self._ms_per_event + 0.5 * ms
+                self._bytes_per_event = 0.5 * self._bytes_per_event + 0.5 * size
+            fit = min(
+                _PAGE_TARGET_MS / max(self._ms_per_event, 1e-3),
+                _PAGE_MAX_BYTES / max(self._bytes_per_event, 1.0),
+            )
+            top = int(max(_MIN_PAGE, min(_MAX_PAGE, fit, 2 * self._top)))
+            if top != self._top:
+                self._top = top
+                self._chosen.append(top)
+
+    def summary(self) -> str:
+        """e.g. "top=100>200>400 ms_per_event=0.9 bytes_per_event=310"."""
+        with self._lock:
+            return "top=%s ms_per_event=%.1f bytes_per_event=%d" % (
+                ">".join(str(t) for t in self._chosen),
+                self._ms_per_event or 0.0,
+                self._bytes_per_event or 0,
+            )
+
+
+def _with_top(url: str, top: int) -> str:
+    """nextLink with its $top replaced; links paging by opaque $skiptoken are left alone."""
+    parts = urllib.parse.urlsplit(url)
+    query = urllib.parse.parse_qsl(parts.query, keep_blank_values=True)
+    if any(k == "$skiptoken" for k, _ in query) or not any(k == "$top" for k, _ in query):
+        return url
+    query = [(k, str(top) if k == "$top" else v) for k, v in query]
+    return urllib.parse.urlunsplit(parts._replace(query=urllib.parse.urlencode(query)))
+
+
+def graph_time(dt: datetime) -> str:
+    return dt.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+def time_shards(
+    start: datetime, end: datetime, shard_days: int
+) -> List[Tuple[datetime, datetime]]:
+    """[start, end) cut into consecutive shards of at most shard_days days."""
+    step = timedelta(days=max(1, shard_days))
+    out: List[Tuple[datetime, datetime]] = []
+    cursor = start
+    while cursor < end:
+        out.append((cursor, min(cursor + step, end)))
+        cursor += step
+    return out or [(start, end)]
+
+
+def _token_claims(token: str) -> Dict[str, Any]:
+    """The (unverified) JWT payload, or {} when the token is opaque."""
+    try:
+        payload = token.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (IndexError, ValueError):
+        return {}
+    return claims if isinstance(claims, dict) else {}
+
+
+def token_identity(token: str) -> str:
+    """
+    Stable per-user key for caches: "<tid>:<oid>" from the (unverified) JWT payload, or a hash
+    of the token when it is opaque.
+    """
+    claims = _token_claims(token)
+    if claims.get("oid"):
+        return "%s:%s" % (claims.get("tid") or "", claims["oid"])
+    return "token:" + hashlib.sha256(token.encode()).hexdigest()[:16]
+
+
+def token_upn(token: str) -> Optional[str]:
+    """The signed-in user's address (upn / preferred_username claim, lower case), if known."""
+    claims = _token_claims(token)
+    for claim in ("upn", "preferred_username", "unique_name"):
+        value = claims.get(claim)
+        if isinstance(value, str) and "@" in value:
+            return value.strip().lower()
+    return None
+
+
+@functools.lru_cache(maxsize=64)
+def _tenant(token: str) -> str:
+    """Throttling scope: the tenant id when the token carries one, else the token's identity."""
+    identity = token_identity(token)
+    tid = identity.split(":")[0]
+    return identity if identity.startswith("token:") or not tid else tid
+
+
+def _graph_headers(token: str, tz_name: str, page_size: Optional[int] = None) -> Dict[str, str]:
+    prefer = 'outlook.timezone="' + tz_name.replace('"', "") + '"'
+    if page_size:
+        # Delta queries take the page size from here instead of $top.
+        prefer += ", odata.maxpagesize=%d" % page_size
+    return {"Authorization": "Bearer " + token, "Prefer": prefer}
+
+
+def _request_json(
+    url: str,
+    token: str,
+    tz_name: str,
+    body: Optional[Dict[str, Any]] = None,
+    page_size: Optional[int] = None,
+    timeouts: Optional[Timeouts] = None,
+    retry: Optional[RetryPolicy] = None,
+) -> Dict[str, Any]:
+    """
+    GET (or POST when body is given) with the bearer token and outlook.timezone preference,
+    over the shared keep-alive pool, retried per `retry`. Raises copilot_http.HTTPError for
+    status >= 400 once retries are used up (at once for other 4xx). The only POST is the
+    read-only getSchedule query, so a stale pooled connection is resent for it too.
+    """
+
+    def op() -> Dict[str, Any]:
+        resp = default_client().request(
+            "GET" if body is None else "POST",
+            url,
+            headers=_graph_headers(token, tz_name, page_size),
+            json_body=body,
+            timeouts=timeouts or DEFAULT_TIMEOUTS,
+            retry_stale=True,
+        )
+        return resp.json()
+
+    return call_with_retries(op, _tenant(token), urllib.parse.urlsplit(url).path, retry)
+
+
+def _stream_page(
+    url: str,
+    token: str,
+    tz_name: str,
+    on_item: Callable[[Dict[str, Any]], None],
+    page_size: Optional[int] = None,
+    timeouts: Optional[Timeouts] = None,
+    retry: Optional[RetryPolicy] = None,
+    rewind: Optional[Callable[[], None]] = None,
+) -> Tuple[Dict[str, Any], StreamingResponse]:
+    """
+    GET one collection page and hand its `value` entries to on_item while the body streams
+    in; returns the remaining members (@odata.nextLink / @odata.deltaLink) and the closed
+    response (timing, wire_bytes). A failed attempt may already have delivered some entries:
+    rewind() is called before the page is requested again. Raises like _request_json, plus
+    ValueError for a malformed body.
+    """
+
+    def op() -> Tuple[Dict[str, Any], StreamingResponse]:
+        with default_client().stream(
+            "GET",
+            url,
+            headers=_graph_headers(token, tz_name, page_size),
+            timeouts=timeouts or DEFAULT_TIMEOUTS,
+        ) as resp:
+            rest = parse_json_stream(resp.iter_bytes(), "value", on_item)
+        return rest, resp
+
+    return call_with_retries(op, _tenant(token), urllib.parse.urlsplit(url).path, retry, rewind)
+
+
+def _shard_url(
+    base_url: str,
+    calendar_path: str,
+    shard: Tuple[datetime, datetime],
+    top: int,
+    server_filter: bool,
+    select: str = _SELECT,
+    type_filter: Optional[str] = None,
+) -> str:
+    query = {
+        "startDateTime": graph_time(shard[0]),
+        "endDateTime": graph_time(shard[1]),
+        "$select": select,
+        "$orderby": "start/dateTime",
+        "$top": str(top),
+    }
+    filters = ([_FREE_FILTER] if server_filter else []) + ([type_filter] if type_filter else [])
+    if filters:
+        query["$filter"] = " and ".join(filters)
+    return base_url.rstrip("/") + calendar_path + "/calendarView?" + urllib.parse.urlencode(query)
+
+
+def _fetch_shard(
+    base_url: str,
+    token: str,
+    tz_name: str,
+    shard: Tuple[datetime, datetime],
+    label: str,
+    calendar_path: str = "/me",
+    timeouts: Optional[Timeouts] = None,
+    to_item: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    sizer: Optional[PageSizer] = None,
+    retry: Optional[RetryPolicy] = None,
+    select: str = _SELECT,
+    type_filter: Optional[str] = None,
+    on_page: Optional[Callable[[List[Any]], bool]] = None,
+) -> Tuple[List[Tuple[Any, Any]], int, int]:
+    """
+    (event id, to_item(event) or the event) for all events of one shard, following nextLink;
+    None items are dropped. Returns (items, pages, events received). on_page(items of the
+    page) runs after every page; when it returns True, no further page is requested.
+    """
+    sizer = sizer or PageSizer()
+    # Free exceptions must still replace their busy occurrence, so no free filter then.
+    server_filter = type_filter is None and base_url not in _FILTER_REJECTED
+
+    def shard_url(server_filter: bool) -> str:
+        return _shard_url(
+            base_url, calendar_path, shard, sizer.top(), server_filter, select, type_filter
+        )
+
+    url: Optional[str] = shard_url(server_filter)
+    items: List[Tuple[Any, Any]] = []
+    pages = 0
+    received = 0
+
+    def on_event(ev: Dict[str, Any]) -> None:
+        nonlocal batch
+        batch += 1
+        item = to_item(ev) if to_item is not None else ev
+        if item is not None:
+            items.append((ev.get("id"), item))
+
+    def rewind() -> None:
+        nonlocal batch
+        del items[mark:]
+        batch = 0
+
+    while url:
+        batch = 0
+        mark = len(items)
+        try:
+            rest, resp = _stream_page(
+                url, token, tz_name, on_event, timeouts=timeouts, retry=retry, rewind=rewind
+            )
+        except HTTPError as e:
+            if not (server_filter and pages == 0 and e.code == 400):
+                raise
+            logger.warning(
+                "outlook-calendar-free-slots: calendarView rejected $filter=%s status=400 — "
+                "filtering free events client-side",
+                _FREE_FILTER,
+            )
+            _FILTER_REJECTED.add(base_url)
+            server_filter = False
+            url = shard_url(False)
+            continue
+        received += batch
+        pages += 1
+        sizer.observe(batch, resp.wire_bytes, resp.timing.total_ms)
+        url = rest.get("@odata.nextLink")
+        if url:
+            url = _with_top(url, sizer.top())
+        logger.info(
+            "outlook-calendar-free-slots: graph page shard=%s events=%d total_so_far=%d has_next=%s "
+            "ms=%d kb=%d",
+            label,
+            batch,
+            received,
+            bool(url),
+            resp.timing.total_ms,
+            resp.wire_bytes // 1024,
+        )
+        if on_page is not None and on_page([item for _, item in items[mark:]]):
+            break
+    return items, pages, received
+
+
+def fetch_calendar_view(
+    token: str,
+    tz_name: str,
+    start: datetime,
+    end: datetime,
+    base_url: str = GRAPH_BASE_URL,
+    shard_days: int = DEFAULT_SHARD_DAYS,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    calendar_path: str = "/me",
+    timeouts: Optional[Timeouts] = None,
+    to_item: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    retry: Optional[RetryPolicy] = None,
+    select: str = _SELECT,
+    type_filter: Optional[str] = None,
+) -> Tuple[List[Any], FetchStats]:
+    """
+    Events of <calendar_path>/calendarView in [start, end), fetched as concurrent time shards.
+    With to_item, each event is converted while its page is parsed and only the non-None
+    results are kept, so full event dicts never pile up. Free events may or may not be
+    included (server-side filtering is best effort); callers check showAs themselves.
+    type_filter (e.g. "type ne 'occurrence'") is sent as $filter and not dropped on a 400.
+
+    Each page is retried per `retry`; once a shard gives up, its exception (HTTPError,
+    transport errors, invalid JSON) is raised at once: shards not started yet are cancelled
+    and the ones in flight are not waited for.
+    """
+    t0 = _time.monotonic()
+    shards = time_shards(start, end, shard_days)
+    sizer = PageSizer()
+    workers = max(1, min(max_workers, len(shards)))
+    labels = ["%d/%d" % (i + 1, len(shards)) for i in range(len(shards))]
+    fetch = functools.partial(
+        _fetch_shard,
+        base_url,
+        token,
+        tz_name,
+        calendar_path=calendar_path,
+        timeouts=timeouts,
+        to_item=to_item,
+        sizer=sizer,
+        retry=retry,
+        select=select,
+        type_filter=type_filter,
+    )
+    if workers == 1:
+        results = [fetch(s, l) for s, l in zip(shards, labels)]
+    else:
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="graph-shard")
+        futures = [pool.submit(fetch, s, l) for s, l in zip(shards, labels)]
+        try:
+            results = [f.result() for f in futures]
+        except Exception:
+            # Queued shards are dropped; the ones in flight finish in the background.
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+
+    events: List[Any] = []
+    seen = set()
+    duplicates = 0
+    pages = 0
+    received = 0
+    for batch, n_pages, n_received in results:
+        pages += n_pages
+        received += n_received
+        for ev_id, item in batch:
+            if ev_id is not None:
+                if ev_id in seen:
+                    duplicates += 1
+                    continue
+                seen.add(ev_id)
+            events.append(item)
+    stats = FetchStats(
+        len(shards),
+        workers,
+        pages,
+        duplicates,
+        int((_time.monotonic() - t0) * 1000),
+        received - duplicates,
+        type_filter is None and base_url not in _FILTER_REJECTED,
+        sizer.summary(),
+    )
+    return events, stats
+
+
+def fetch_calendar_view_progressive(
+    token: str,
+    tz_name: str,
+    start: datetime,
+    end: datetime,
+    on_page: Callable[[List[Any]], bool],
+    base_url: str = GRAPH_BASE_URL,
+    calendar_path: str = "/me",
+    timeouts: Optional[Timeouts] = None,
+    to_item: Optional[Callable[[Dict[str, Any]], Any]] = None,
+    retry: Optional[RetryPolicy] = None,
+) -> FetchStats:
+    """
+    calendarView over [start, end) as one chronological sequence of pages (sorted by start,
+    no shards), handing each page's items to on_page until it returns True or the pages end.
+    """
+    t0 = _time.monotonic()
+    sizer = PageSizer()
+    _, pages, received = _fetch_shard(
+        base_url,
+        token,
+        tz_name,
+        (start, end),
+        "1/1",
+        calendar_path=calendar_path,
+        timeouts=timeouts,
+        to_item=to_item,
+        sizer=sizer,
+        retry=retry,
+        on_page=on_page,
+    )
+    return FetchStats(
+        1,
+        1,
+        pages,
+        0,
+        int((_time.monotonic() - t0) * 1000),
+        received,
+        base_url not in _FILTER_REJECTED,
+        sizer.summary(),
+    )
+
+
+# calendarFetchMode "series": series masters with their rule, and everything but occurrences.
+_MASTER_SELECT = "id,start,end,showAs,recurrence,changeKey"
+SERIES_VIEW_SELECT = _SELECT + ",type,seriesMasterId,originalStart"
+SERIES_VIEW_FILTER = "type ne 'occurrence'"
+
+
+# Masters changed within this margin before the last listing are listed again (clock skew).
+_MASTERS_SKEW = timedelta(minutes=5)
+# Incremental listings cannot see deleted series, so the full list is re-read this often.
+_MASTERS_FULL_REFRESH_S = 3600.0
+
+
+class SeriesMasterCache:
+    """
+    seriesMaster lists per (base_url, calendar, user), refreshed incrementally: later runs only
+    list masters with lastModifiedDateTime after the previous listing and merge them by id.
+    A full listing runs every _MASTERS_FULL_REFRESH_S (deleted series stay busy until then)
+    and whenever Graph refuses the lastModifiedDateTime filter.
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data: Dict[Tuple[str, str, str], Tuple[Dict[str, Dict[str, Any]], datetime, float]] = {}
+        self.full = 0
+        self.incremental = 0
+
+    def get(self, key: Tuple[str, str, str]):
+        """(masters by id, listed_at) when an incremental listing may be used, else None."""
+        with self._lock:
+            entry = self._data.get(key)
+        if entry is None or _time.monotonic() - entry[2] > _MASTERS_FULL_REFRESH_S:
+            return None
+        return dict(entry[0]), entry[1]
+
+    def put(
+        self,
+        key: Tuple[str, str, str],
+        masters: Dict[str, Dict[str, Any]],
+        listed_at: datetime,
+        full: bool,
+    ) -> None:
+        with self._lock:
+            old = self._data.pop(key, None)
+            full_at = _time.monotonic() if full or old is None else old[2]
+            self._data[key] = (masters, listed_at, full_at)
+            while len(self._data) > self.maxsize:
+                del self._data[next(iter(self._data))]
+            if full:
+                self.full += 1
+            else:
+                self.incremental += 1
+
+    def stats(self) -> str:
+        with self._lock:
+            return "masters_full=%d masters_incremental=%d" % (self.full, self.incremental)
+
+
+SERIES_MASTERS = SeriesMasterCache()
+
+
+def _list_masters(
+    url: Optional[str],
+    token: str,
+    tz_name: str,
+    timeouts: Optional[Timeouts],
+    retry: Optional[RetryPolicy],
+) -> Tuple[List[Dict[str, Any]], int]:
+    masters: List[Dict[str, Any]] = []
+    pages = 0
+    while url:
+        mark = len(masters)
+        rest, _ = _stream_page(
+            url,
+            token,
+            tz_name,
+            masters.append,
+            timeouts=timeouts,
+            retry=retry,
+            rewind=lambda: masters.__delitem__(slice(mark, None)),
+        )
+        pages += 1
+        url = rest.get("@odata.nextLink")
+    return masters, pages
+
+
+def fetch_series_masters(
+    token: str,
+    tz_name: str,
+    base_url: str = GRAPH_BASE_URL,
+    calendar_path: str = "/me",
+    timeouts: Optional[Timeouts] = None,
+    retry: Optional[RetryPolicy] = None,
+    cache: Optional[SeriesMasterCache] = None,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    All seriesMaster events of the calendar (not time-bounded); returns (masters, pages).
+    With a cache, only masters modified since the cached listing are requested.
+    """
+    url = base_url.rstrip("/") + calendar_path + "/events?"
+    key = (base_url, calendar_path, token_identity(token))
+    listed_at = datetime.now(timezone.utc)
+    cached = cache.get(key) if cache is not None else None
+    if cached is not None:
+        known, since = cached
+        server_filter = "type eq 'seriesMaster' and lastModifiedDateTime ge %s" % graph_time(
+            since - _MASTERS_SKEW
+        )
+        try:
+            changed, pages = _list_masters(
+                url
+                + urllib.parse.urlencode(
+                    {"$filter": server_filter, "$select": _MASTER_SELECT, "$top": str(_PAGE_SIZE)}
+                ),
+                token,
+                tz_name,
+                timeouts,
+                retry,
+            )
+        except HTTPError as e:
+            # Filters on lastModifiedDateTime refused: fall back to a full listing.
+            if e.code != 400:
+                raise
+        else:
+            for master in changed:
+                known[str(master.get("id"))] = master
+            cache.put(key, known, listed_at, full=False)
+            return list(known.values()), pages
+    masters, pages = _list_masters(
+        url
+        + urllib.parse.urlencode(
+            {"$filter": "type eq 'seriesMaster'", "$select": _MASTER_SELECT, "$top": str(_PAGE_SIZE)}
+        ),
+        token,
+        tz_name,
+        timeouts,
+        retry,
+    )
+    if cache is not None:
+        cache.put(key, {str(m.get("id")): m for m in masters}, listed_at, full=True)
+    return masters, pages
+
+
+# getSchedule accepts at most 20 schedules and a 62-day range per request.
+_SCHEDULE_BATCH = 20
+_SCHEDULE_MAX_DAYS = 62
+_SCHEDULE_INTERVAL_MIN = 15
+# availabilityView digits: 0 free, 1 tentative, 2 busy, 3 oof, 4 workingElsewhere.
+_VIEW_STATUS = {"1": "tentative", "2": "busy", "3": "oof", "4": "workingElsewhere"}
+
+# HTTP statuses meaning "getSchedule is not available here", answered by falling back to
+# calendarView; anything else (401, throttling, network) is a real failure.
+SCHEDULE_FALLBACK_STATUSES = (400, 403, 404, 501)
+
+
+class ScheduleResult(NamedTuple):
+    items: Dict[str, List[Dict[str, Any]]]
+    errors: Dict[str, str]
+    requests: int
+    elapsed_ms: int
+
+
+def _view_items(
+    view: str, start: datetime, interval_min: int
+) -> List[Dict[str, Any]]:
+    """availabilityView digits -> scheduleItems-shaped dicts (UTC), adjacent equal runs joined."""
+    items: List[Dict[str, Any]] = []
+    step = timedelta(minutes=interval_min)
+    i = 0
+    while i < len(view):
+        j = i
+        while j + 1 < len(view) and view[j + 1] == view[i]:
+            j += 1
+        status = _VIEW_STATUS.get(view[i])
+        if status:
+            s = start.astimezone(timezone.utc) + i * step
+            e = start.astimezone(timezone.utc) + (j + 1) * step
+            items.append(
+                {
+                    "status": status,
+                    "start": {"dateTime": s.strftime("%Y-%m-%dT%H:%M:%S"), "timeZone": "UTC"},
+                    "end": {"dateTime": e.strftime("%Y-%m-%dT%H:%M:%S"), "timeZone": "UTC"},
+                }
+            )
+        i = j + 1
+    return items
+
+
+def fetch_schedule(
+    token: str,
+    tz_name: str,
+    mailboxes: List[str],
+    start: datetime,
+    end: datetime,
+    base_url: str = GRAPH_BASE_URL,
+    timeouts: Optional[Timeouts] = None,
+    retry: Optional[RetryPolicy] = None,
+) -> ScheduleResult:
+    """
+    Free/busy of many mailboxes via POST /me/calendar/getSchedule, in as few requests as the
+    20-schedule / 62-day limits allow. Items are scheduleItems ({status, start, end}); when a
+    schedule only has an availabilityView (no item access), the view is turned into items.
+    Per-mailbox errors are returned in `errors` (those mailboxes get no items); HTTP errors
+    of the request itself propagate.
+    """
+    t0 = _time.monotonic()
+    url = base_url.rstrip("/") + "/me/calendar/getSchedule"
+    items: Dict[str, List[Dict[str, Any]]] = {m: [] for m in mailboxes}
+    errors: Dict[str, str] = {}
+    requests = 0
+    for shard in time_shards(start, end, _SCHEDULE_MAX_DAYS):
+        for k in range(0, len(mailboxes), _SCHEDULE_BATCH):
+            body = {
+                "schedules": mailboxes[k : k + _SCHEDULE_BATCH],
+                "startTime": {"dateTime": graph_time(shard[0])[:19], "timeZone": "UTC"},
+                "endTime": {"dateTime": graph_time(shard[1])[:19], "timeZone": "UTC"},
+                "availabilityViewInterval": _SCHEDULE_INTERVAL_MIN,
+            }
+            data = _request_json(url, token, tz_name, body, timeouts=timeouts, retry=retry)
+            requests += 1
+            for sched in data.get("value") or []:
+                mailbox = sched.get("scheduleId")
+                if mailbox not in items:
+                    continue
+                if sched.get("error"):
+                    err = sched["error"]
+                    errors[mailbox] = str(
+                        err.get("responseCode") or err.get("message") if isinstance(err, dict) else err
+                    )[:500]
+                    continue
+                if "scheduleItems" in sched:
+                    items[mailbox].extend(sched.get("scheduleItems") or [])
+                else:
+                    items[mailbox].extend(
+                        _view_items(sched.get("availabilityView") or "", shard[0], _SCHEDULE_INTERVAL_MIN)
+                    )
+    for mailbox in errors:
+        items.pop(mailbox, None)
+    return ScheduleResult(items, errors, requests, int((_time.monotonic() - t0) * 1000))
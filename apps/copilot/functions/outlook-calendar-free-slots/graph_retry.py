@@ -0,0 +1,197 @@
+"""
+Retries and client-side throttling for the Graph calls of outlook-calendar-free-slots.
+
+Every request first takes a token from its tenant's bucket (process-wide, so concurrent
+shards and overlapping runs in a warm container share the tenant's budget). 429 and 5xx
+answers and transport failures are retried: after Retry-After when Graph sends it (a 429
+also pauses the whole tenant bucket for that long), otherwise after exponential backoff with
+full jitter. Callers retry single pages, so pages fetched before the failure are kept.
+retry_stats() summarizes attempts and waits for the "done" log line.
+"""
+from __future__ import annotations
+
+import email.utils
+import http.client
+import logging
+import random
+import threading
+import time as _time
+from typing import Callable, Dict, List, NamedTuple, Optional, TypeVar
+
+from copilot_http import HTTPError
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Transport failures worth another attempt (timeouts, resets, bodies cut off mid-page).
+_RETRY_ERRORS = (OSError, http.client.HTTPException)
+
+T = TypeVar("T")
+
+
+class RetryPolicy(NamedTuple):
+    max_retries: int = 4
+    base_delay: float = 0.5
+    # A single wait longer than this (e.g. a huge Retry-After) is not sat out: the error is raised.
+    max_delay: float = 60.0
+    # Per-tenant token bucket: sustained requests per second and burst size (Graph allows
+    # about 10000 requests per 10 minutes per mailbox and app).
+    rate: float = 15.0
+    burst: int = 30
+
+
+DEFAULT_RETRY = RetryPolicy()
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int) -> None:
+        self._lock = threading.Lock()
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = _time.monotonic()
+        self._paused_until = 0.0
+
+    def acquire(self) -> float:
+        """Take one token, sleeping as long as needed; returns the seconds waited."""
+        with self._lock:
+            now = _time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            # Reserve now, pay later: a negative balance is the queue ahead of us.
+            self._tokens -= 1
+            wait = max(self._paused_until - now, -self._tokens / self.rate if self._tokens < 0 else 0.0)
+        if wait > 0:
+            _time.sleep(wait)
+        return max(wait, 0.0)
+
+    def pause(self, seconds: float) -> None:
+        """No tokens for anyone until `seconds` from now (server asked us to back off)."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, _time.monotonic() + seconds)
+
+
+_BUCKETS: Dict[str, TokenBucket] = {}
+_BUCKETS_LOCK = threading.Lock()
+
+
+def bucket_for(tenant: str, policy: RetryPolicy = DEFAULT_RETRY) -> TokenBucket:
+    with _BUCKETS_LOCK:
+        bucket = _BUCKETS.get(tenant)
+        if bucket is None:
+            bucket = _BUCKETS[tenant] = TokenBucket(policy.rate, policy.burst)
+        else:
+            bucket.rate, bucket.burst = policy.rate, policy.burst
+        return bucket
+
+
+def retry_after_seconds(headers) -> Optional[float]:
+    """Retry-After as seconds (delta-seconds or HTTP-date), or None."""
+    raw = (headers.get("Retry-After") if headers is not None else None) or ""
+    raw = raw.strip()
+    if not raw:
+        return None
+    try:
+        return max(0.0, float(raw))
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(raw)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when.timestamp() - _time.time())
+
+
+class _RetryStats:
+    # Upper bounds (ms) of the wait histogram buckets; the last bucket is open.
+    _WAIT_BOUNDS = (0, 100, 1000, 10000)
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._retries: List[int] = [0, 0, 0, 0]  # 0, 1, 2, 3+
+        self._waits: List[int] = [0] * (len(self._WAIT_BOUNDS) + 1)
+        self._wait_ms = 0.0
+        self._throttled = 0
+        self._gave_up = 0
+
+    def record(self, retries: int, wait_s: float, throttled: int, gave_up: bool) -> None:
+        ms = wait_s * 1000
+        slot = next((i for i, b in enumerate(self._WAIT_BOUNDS) if ms <= b), len(self._WAIT_BOUNDS))
+        with self._lock:
+            self._retries[min(retries, 3)] += 1
+            self._waits[slot] += 1
+            self._wait_ms += ms
+            self._throttled += throttled
+            self._gave_up += int(gave_up)
+
+    def summary(self) -> str:
+        with self._lock:
+            r, w = list(self._retries), list(self._waits)
+            wait_ms, throttled, gave_up = self._wait_ms, self._throttled, self._gave_up
+        return (
+            "calls=%d retries=[0:%d 1:%d 2:%d 3+:%d] wait_ms=[0:%d <100:%d <1000:%d <10000:%d more:%d] "
+            "wait_total_ms=%d throttled=%d gave_up=%d" % (sum(r), *r, *w, wait_ms, throttled, gave_up)
+        )
+
+
+_STATS = _RetryStats()
+
+
+def retry_stats() -> str:
+    """Process-wide, e.g. "calls=40 retries=[0:38 1:2 2:0 3+:0] wait_ms=[0:37 ...] ..."."""
+    return _STATS.summary()
+
+
+def call_with_retries(
+    op: Callable[[], T],
+    tenant: str,
+    what: str,
+    policy: Optional[RetryPolicy] = None,
+    before_retry: Optional[Callable[[], None]] = None,
+) -> T:
+    """
+    Run op() under the tenant's token bucket, retrying throttling, server and transport
+    errors per `policy`. before_retry() runs before every new attempt (e.g. to drop items a
+    half-read page already delivered). The last error is raised once retries are used up.
+    """
+    policy = policy or DEFAULT_RETRY
+    bucket = bucket_for(tenant, policy)
+    attempt = 0
+    waited = 0.0
+    throttled = 0
+    while True:
+        waited += bucket.acquire()
+        try:
+            result = op()
+        except (HTTPError, *_RETRY_ERRORS) as e:
+            status = e.code if isinstance(e, HTTPError) else None
+            if isinstance(e, HTTPError) and status not in RETRY_STATUSES:
+                _STATS.record(attempt, waited, throttled, False)
+                raise
+            delay = retry_after_seconds(e.headers) if isinstance(e, HTTPError) else None
+            if status == 429:
+                throttled += 1
+                if delay is not None:
+                    bucket.pause(delay)
+            if delay is None:
+                delay = random.uniform(0, min(policy.max_delay, policy.base_delay * 2 ** attempt))
+            if attempt >= policy.max_retries or delay > policy.max_delay:
+                _STATS.record(attempt, waited, throttled, True)
+                raise
+            attempt += 1
+            logger.warning(
+                "outlook-calendar-free-slots: graph retry %s attempt=%d/%d status=%s wait_s=%.2f error=%s",
+                what,
+                attempt,
+                policy.max_retries,
+                status,
+                delay,
+                str(e)[:200],
+            )
+            _time.sleep(delay)
+            waited += delay
+            if before_retry is not None:
+                before_retry()
+            continue
+        _STATS.record(attempt, waited, throttled, False)
+        return result
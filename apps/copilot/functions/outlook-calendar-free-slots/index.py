@@ -1,18 +1,53 @@
 """
 Microsoft Graph calendarView → busy intervals → free slot suggestions.
+The horizon is fetched as concurrent time shards (see graph_calendar), or with
+calendarFetchMode "getSchedule" as compact free/busy for one or many scheduleMailboxes, or
+with "delta" from a local event store kept current by calendarView/delta (see calendar_sync),
+or with "series" from locally expanded recurring series plus single events (see recurrence).
+With "progressive", pages are read in start order and slots confirmed after each one, so the
+fetch stops once enough slots are certain (or at calendarDeadlineSeconds, with partial results).
 Skips when provider is not OUTLOOK, scheduling is off, or token is missing.
 """
 from __future__ import annotations
 
-import json
 import logging
+import threading
+import time as _time
 import urllib.parse
-import urllib.request
-from datetime import datetime, timedelta, time
-from typing import Any, Dict, List, Optional
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
 from zoneinfo import ZoneInfo
 
-from slot_math import build_calendar_availability_from_busy_intervals
+from copilot_http import HTTPError, default_client, timeouts_from_inputs
+from scheduling_core import (
+    ProgressiveAvailability,
+    build_calendar_availability_batch,
+    build_calendar_availability_from_busy_intervals,
+    cache_stats,
+    get_zone,
+    wall_us,
+)
+
+from calendar_sync import open_store, sync_busy_intervals, sync_window
+from graph_calendar import (
+    DEFAULT_MAX_WORKERS,
+    DEFAULT_SHARD_DAYS,
+    DEFAULT_TIMEOUTS,
+    GRAPH_BASE_URL,
+    SCHEDULE_FALLBACK_STATUSES,
+    SERIES_MASTERS,
+    SERIES_VIEW_FILTER,
+    SERIES_VIEW_SELECT,
+    fetch_calendar_view,
+    fetch_calendar_view_progressive,
+    fetch_schedule,
+    fetch_series_masters,
+    graph_time,
+    token_identity,
+    token_upn,
+)
+from graph_retry import DEFAULT_RETRY, RetryPolicy, retry_stats
+from recurrence import SERIES_CACHE
 
 logger = logging.getLogger(__name__)
 
@@ -27,9 +62,9 @@ def _localize_graph_dt(
         return None
     tzname = (ev_tz_name or fallback_tz or "UTC").strip()
     try:
-        z = ZoneInfo(tzname)
+        z = get_zone(tzname)
     except Exception:
-        z = ZoneInfo("UTC")
+        z = get_zone("UTC")
     base = dt_str.split(".")[0].replace("Z", "")
     if len(base) < 19:
         return None
@@ -37,6 +72,438 @@ def _localize_graph_dt(
     return naive.replace(tzinfo=z)
 
 
+def _event_busy(ev: Dict[str, Any], tz: ZoneInfo, tz_name: str) -> Optional[Dict[str, str]]:
+    """calendarView event (showAs) or getSchedule item (status) -> busy interval; None if free or unusable."""
+    if (ev.get("showAs") or ev.get("status") or "").lower() == "free":
+        return None
+    s = ev.get("start") or {}
+    e = ev.get("end") or {}
+    st = _localize_graph_dt(s.get("dateTime"), s.get("timeZone"), tz_name)
+    en = _localize_graph_dt(e.get("dateTime"), e.get("timeZone"), tz_name)
+    if not st or not en or en <= st:
+        return None
+    return {
+        "start": st.astimezone(tz).isoformat(),
+        "end": en.astimezone(tz).isoformat(),
+    }
+
+
+def _event_epochs(ev: Dict[str, Any], tz_name: str) -> Optional[Tuple[int, int]]:
+    """Same as _event_busy, but straight to UTC epoch microseconds (scheduling_core busyEpochs)."""
+    if (ev.get("showAs") or ev.get("status") or "").lower() == "free":
+        return None
+    s = ev.get("start") or {}
+    e = ev.get("end") or {}
+    st = wall_us(s.get("dateTime"), (s.get("timeZone") or tz_name or "UTC").strip())
+    en = wall_us(e.get("dateTime"), (e.get("timeZone") or tz_name or "UTC").strip())
+    if st is None or en is None or en <= st:
+        return None
+    return st, en
+
+
+def _busy_from_events(
+    events: List[Dict[str, Any]], tz: ZoneInfo, tz_name: str
+) -> List[Dict[str, str]]:
+    """Events or getSchedule items -> busyIntervals, free ones dropped."""
+    busy_intervals: List[Dict[str, str]] = []
+    for ev in events:
+        busy = _event_busy(ev, tz, tz_name)
+        if busy is not None:
+            busy_intervals.append(busy)
+    return busy_intervals
+
+
+def _log_stats(mode: str, paging: str = "") -> None:
+    """Process-wide cache, HTTP and Graph retry counters plus this run's page sizing."""
+    logger.info(
+        "outlook-calendar-free-slots: stats mode=%s caches=[%s] http=[%s] graph=[%s] paging=[%s]",
+        mode,
+        cache_stats(),
+        default_client().stats(),
+        retry_stats(),
+        paging or "-",
+    )
+
+
+def _log_done(
+    out: Dict[str, Any],
+    events_n: int,
+    busy_n: int,
+    inputs: Dict[str, Any],
+    mode: str,
+    paging: str = "",
+) -> None:
+    cal = out.get("calendarAvailability")
+    if isinstance(out.get("calendarAvailabilityByMailbox"), dict):
+        slot_n = sum(len(c.get("slots") or []) for c in out["calendarAvailabilityByMailbox"].values())
+    else:
+        slot_n = len((cal or {}).get("slots") or []) if isinstance(cal, dict) else 0
+    if slot_n == 0:
+        logger.warning(
+            "outlook-calendar-free-slots: done reason=no_free_slots_in_window "
+            "free_slots=0 graph_events=%d busy_intervals=%d — check workday %s-%s, "
+            "duration_min, horizon_days, or calendar density",
+            events_n,
+            busy_n,
+            inputs.get("appointmentWorkdayStart"),
+            inputs.get("appointmentWorkdayEnd"),
+        )
+    else:
+        logger.info(
+            "outlook-calendar-free-slots: done free_slots=%d calendarError=%s",
+            slot_n,
+            out.get("calendarError"),
+        )
+    _log_stats(mode, paging)
+
+
+def _retry_policy(inputs: Dict[str, Any]) -> RetryPolicy:
+    retries = inputs.get("graphMaxRetries")
+    rate = inputs.get("graphRequestsPerSecond")
+    return DEFAULT_RETRY._replace(
+        max_retries=DEFAULT_RETRY.max_retries if retries is None else max(0, int(retries)),
+        rate=float(rate) if rate and float(rate) > 0 else DEFAULT_RETRY.rate,
+    )
+
+
+def _schedule_mailboxes(inputs: Dict[str, Any]) -> List[str]:
+    raw = inputs.get("scheduleMailboxes")
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    out: List[str] = []
+    for m in raw or []:
+        m = str(m or "").strip()
+        if m and m not in out:
+            out.append(m)
+    return out
+
+
+def _schedule_handler(
+    inputs: Dict[str, Any],
+    token: str,
+    tz: ZoneInfo,
+    tz_name: str,
+    start_utc: datetime,
+    end_utc: datetime,
+    mailboxes: List[str],
+    fetch_kw: Dict[str, Any],
+) -> Dict[str, Any]:
+    """getSchedule free/busy for all mailboxes; calendarView for those getSchedule refuses."""
+    try:
+        res = fetch_schedule(
+            token,
+            tz_name,
+            mailboxes,
+            start_utc,
+            end_utc,
+            fetch_kw["base_url"],
+            timeouts=fetch_kw["timeouts"],
+            retry=fetch_kw["retry"],
+        )
+        items, errors = res.items, dict(res.errors)
+        requests, elapsed_ms = res.requests, res.elapsed_ms
+    except HTTPError as e:
+        if e.code not in SCHEDULE_FALLBACK_STATUSES:
+            logger.exception(
+                "outlook-calendar-free-slots: getSchedule failed reason=graph_http_error error=%s",
+                str(e)[:500],
+            )
+            return {"calendarAvailability": None, "calendarError": str(e)[:500]}
+        items, errors = {}, {m: "HTTP %d" % e.code for m in mailboxes}
+        requests, elapsed_ms = 1, 0
+    except Exception as e:
+        logger.exception(
+            "outlook-calendar-free-slots: getSchedule failed reason=graph_http_error error=%s",
+            str(e)[:500],
+        )
+        return {"calendarAvailability": None, "calendarError": str(e)[:500]}
+
+    own = token_upn(token)
+    paging: List[str] = []
+    for mailbox, err in errors.items():
+        # Only the token's own mailbox is /me; others need Calendars.Read.Shared.
+        if own is not None and mailbox.lower() == own:
+            path = "/me"
+        else:
+            path = "/users/" + urllib.parse.quote(mailbox)
+        logger.warning(
+            "outlook-calendar-free-slots: getSchedule unavailable mailbox=%s error=%s — "
+            "falling back to calendarView path=%s",
+            mailbox,
+            err,
+            path,
+        )
+        try:
+            items[mailbox], view_stats = fetch_calendar_view(
+                token, tz_name, start_utc, end_utc, calendar_path=path, **fetch_kw
+            )
+            paging.append(view_stats.paging)
+        except Exception as e:
+            logger.exception(
+                "outlook-calendar-free-slots: Graph request failed reason=graph_http_error "
+                "mailbox=%s error=%s",
+                mailbox,
+                str(e)[:500],
+            )
+            return {"calendarAvailability": None, "calendarError": str(e)[:500]}
+
+    busy_by_mailbox = {m: _busy_from_events(items.get(m) or [], tz, tz_name) for m in mailboxes}
+    events_n = sum(len(v) for v in items.values())
+    busy_n = sum(len(v) for v in busy_by_mailbox.values())
+    logger.info(
+        "outlook-calendar-free-slots: getSchedule mailboxes=%d requests=%d fallbacks=%d items=%d "
+        "busy_intervals=%d elapsed_ms=%d",
+        len(mailboxes),
+        requests,
+        len(errors),
+        events_n,
+        busy_n,
+        elapsed_ms,
+    )
+
+    base = {**inputs, "calendarFetchOutcome": "ok"}
+    if len(mailboxes) == 1:
+        out = build_calendar_availability_from_busy_intervals(
+            {**base, "busyIntervals": busy_by_mailbox[mailboxes[0]]}
+        )
+    else:
+        out = build_calendar_availability_batch({**base, "busyIntervalsByMailbox": busy_by_mailbox})
+    _log_done(out, events_n, busy_n, inputs, "getSchedule", "; ".join(paging))
+    return out
+
+
+def _delta_handler(
+    inputs: Dict[str, Any],
+    token: str,
+    tz: ZoneInfo,
+    tz_name: str,
+    start_day: date,
+    end_day: date,
+    fetch_kw: Dict[str, Any],
+) -> Dict[str, Any]:
+    """Busy intervals from the local event store, brought up to date with calendarView/delta."""
+
+    def to_busy(ev: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+        busy = _event_busy(ev, tz, tz_name)
+        return (busy["start"], busy["end"]) if busy else None
+
+    try:
+        store = open_store(inputs.get("calendarSyncStore"))
+        rows, stats = sync_busy_intervals(
+            store,
+            token_identity(token) + "|" + tz_name,
+            token,
+            tz_name,
+            sync_window(start_day, end_day, tz),
+            to_busy,
+            base_url=fetch_kw["base_url"],
+            timeouts=fetch_kw["timeouts"],
+            retry=fetch_kw["retry"],
+        )
+    except Exception as e:
+        logger.exception(
+            "outlook-calendar-free-slots: delta sync failed reason=graph_http_error error=%s",
+            str(e)[:500],
+        )
+        return {"calendarAvailability": None, "calendarError": str(e)[:500]}
+    busy_intervals = [{"start": s, "end": e} for s, e in rows]
+    logger.info(
+        "outlook-calendar-free-slots: delta sync full=%s pages=%d upserts=%d removed=%d "
+        "pruned_scopes=%d busy_intervals=%d elapsed_ms=%d",
+        stats.full,
+        stats.pages,
+        stats.upserts,
+        stats.removed,
+        stats.pruned,
+        len(busy_intervals),
+        stats.elapsed_ms,
+    )
+    out = build_calendar_availability_from_busy_intervals(
+        {**inputs, "calendarFetchOutcome": "ok", "busyIntervals": busy_intervals}
+    )
+    _log_done(out, stats.upserts + stats.removed, len(busy_intervals), inputs, "delta")
+    return out
+
+
+def _series_handler(
+    inputs: Dict[str, Any],
+    token: str,
+    tz_name: str,
+    start_utc: datetime,
+    end_utc: datetime,
+    fetch_kw: Dict[str, Any],
+) -> Optional[Dict[str, Any]]:
+    """
+    Busy intervals from series masters expanded locally plus calendarView without plain
+    occurrences. None when Graph refuses the filters, so the caller uses calendarView.
+    """
+    window = (wall_us(graph_time(start_utc), "UTC"), wall_us(graph_time(end_utc), "UTC"))
+
+    def to_item(ev: Dict[str, Any]) -> Tuple[Optional[Tuple[int, int]], Optional[Tuple[str, int]]]:
+        # An exception replaces the occurrence that was planned at its originalStart.
+        replaced = None
+        if (ev.get("type") or "").lower() == "exception" and ev.get("seriesMasterId"):
+            original = wall_us(ev.get("originalStart"), "UTC")
+            if original is not None:
+                replaced = (ev["seriesMasterId"], original)
+        return _event_epochs(ev, tz_name), replaced
+
+    try:
+        masters, master_pages = fetch_series_masters(
+            token,
+            tz_name,
+            fetch_kw["base_url"],
+            timeouts=fetch_kw["timeouts"],
+            retry=fetch_kw["retry"],
+            cache=SERIES_MASTERS,
+        )
+        items, stats = fetch_calendar_view(
+            token,
+            tz_name,
+            start_utc,
+            end_utc,
+            to_item=to_item,
+            select=SERIES_VIEW_SELECT,
+            type_filter=SERIES_VIEW_FILTER,
+            **fetch_kw,
+        )
+    except HTTPError as e:
+        if e.code not in SCHEDULE_FALLBACK_STATUSES:
+            raise
+        logger.warning(
+            "outlook-calendar-free-slots: series mode unavailable status=%d — using calendarView",
+            e.code,
+        )
+        return None
+
+    busy_epochs = [epochs for epochs, _ in items if epochs is not None]
+    replaced = {r for _, r in items if r is not None}
+    expanded = 0
+    for master in masters:
+        if (master.get("showAs") or "").lower() == "free":
+            continue
+        for st, en in SERIES_CACHE.expand(master, tz_name, window):
+            expanded += 1
+            if (master.get("id"), st) not in replaced:
+                busy_epochs.append((st, en))
+    logger.info(
+        "outlook-calendar-free-slots: series masters=%d master_pages=%d occurrences=%d "
+        "exceptions=%d view_events=%d view_pages=%d busy_intervals=%d elapsed_ms=%d %s %s",
+        len(masters),
+        master_pages,
+        expanded,
+        len(replaced),
+        stats.events,
+        stats.pages,
+        len(busy_epochs),
+        stats.elapsed_ms,
+        SERIES_CACHE.stats(),
+        SERIES_MASTERS.stats(),
+    )
+    out = build_calendar_availability_from_busy_intervals(
+        {
+            **inputs,
+            "calendarFetchOutcome": "ok",
+            "busyEpochs": ([s for s, _ in busy_epochs], [e for _, e in busy_epochs]),
+        }
+    )
+    _log_done(out, stats.events + expanded, len(busy_epochs), inputs, "series", stats.paging)
+    return out
+
+
+def _deadline_seconds(inputs: Dict[str, Any]) -> Optional[float]:
+    try:
+        value = float(inputs.get("calendarDeadlineSeconds"))
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def _progressive_handler(
+    inputs: Dict[str, Any],
+    token: str,
+    tz_name: str,
+    start_utc: datetime,
+    end_utc: datetime,
+    fetch_kw: Dict[str, Any],
+) -> Dict[str, Any]:
+    """
+    calendarView page by page in start order with slots confirmed after every page. Stops
+    once maxSchedulingRecommendations slots are confirmed; at calendarDeadlineSeconds the
+    slots confirmed so far are returned (calendarAvailability.coveredUntil says up to when).
+    """
+    t0 = _time.monotonic()
+    deadline = _deadline_seconds(inputs)
+    progress = ProgressiveAvailability(inputs)
+    lock = threading.Lock()
+    stop = threading.Event()
+    finished = threading.Event()
+    outcome: Dict[str, Any] = {"pages": 0}
+
+    def on_page(items: List[Tuple[int, int]]) -> bool:
+        with lock:
+            outcome["pages"] += 1
+            # Pages are sorted by start: nothing unseen starts before this page's last event.
+            if items and progress.add(items, max(s for s, _ in items)):
+                outcome["enough"] = True
+                return True
+        return stop.is_set()
+
+    def run() -> None:
+        try:
+            outcome["stats"] = fetch_calendar_view_progressive(
+                token,
+                tz_name,
+                start_utc,
+                end_utc,
+                on_page,
+                fetch_kw["base_url"],
+                timeouts=fetch_kw["timeouts"],
+                to_item=lambda ev: _event_epochs(ev, tz_name),
+                retry=fetch_kw["retry"],
+            )
+            with lock:
+                if not stop.is_set():
+                    progress.add([], None)
+        except Exception as e:
+            outcome["error"] = e
+        finally:
+            finished.set()
+
+    threading.Thread(target=run, name="graph-progressive", daemon=True).start()
+    in_time = finished.wait(deadline)
+    stop.set()
+    with lock:
+        if "error" in outcome:
+            e = outcome["error"]
+            logger.error(
+                "outlook-calendar-free-slots: Graph request failed reason=graph_http_error error=%s",
+                str(e)[:500],
+                exc_info=e,
+            )
+            return {"calendarAvailability": None, "calendarError": str(e)[:500]}
+        reason = "enough_slots" if outcome.get("enough") else "complete" if in_time else "deadline"
+        out = progress.result()
+        pages, received = outcome["pages"], progress.received
+    if reason == "deadline":
+        logger.warning(
+            "outlook-calendar-free-slots: progressive deadline_s=%s reached — returning slots "
+            "confirmed until %s",
+            deadline,
+            out["calendarAvailability"]["coveredUntil"],
+        )
+    stats = outcome.get("stats")
+    logger.info(
+        "outlook-calendar-free-slots: progressive stop=%s pages=%d busy_intervals=%d elapsed_ms=%d",
+        reason,
+        pages,
+        received,
+        int((_time.monotonic() - t0) * 1000),
+    )
+    _log_done(out, received, received, inputs, "progressive", stats.paging if stats else "")
+    return out
+
+
 def handler(inputs: Dict[str, Any]) -> Dict[str, Any]:
     inputs = inputs or {}
     provider = (inputs.get("emailProvider") or "").strip().upper()
@@ -70,9 +537,9 @@ def handler(inputs: Dict[str, Any]) -> Dict[str, Any]:
 
     tz_name = (inputs.get("appointmentTimeZone") or "Europe/Berlin").strip()
     try:
-        tz = ZoneInfo(tz_name)
+        tz = get_zone(tz_name)
     except Exception:
-        tz = ZoneInfo("Europe/Berlin")
+        tz = get_zone("Europe/Berlin")
         tz_name = "Europe/Berlin"
 
     horizon = int(inputs.get("appointmentHorizonDays") or 14)
@@ -80,10 +547,10 @@ def handler(inputs: Dict[str, Any]) -> Dict[str, Any]:
     start_day = now.date()
     end_day = start_day + timedelta(days=max(1, horizon))
 
-    start_utc = datetime.combine(start_day, time.min, tzinfo=tz).astimezone(ZoneInfo("UTC"))
-    end_utc = datetime.combine(end_day, time(23, 59, 59), tzinfo=tz).astimezone(ZoneInfo("UTC"))
-    start_utc_s = start_utc.strftime("%Y-%m-%dT%H:%M:%S.000Z")
-    end_utc_s = end_utc.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+    start_utc = datetime.combine(start_day, time.min, tzinfo=tz).astimezone(timezone.utc)
+    end_utc = datetime.combine(end_day, time(23, 59, 59), tzinfo=tz).astimezone(timezone.utc)
+    start_utc_s = graph_time(start_utc)
+    end_utc_s = graph_time(end_utc)
 
     logger.info(
         "outlook-calendar-free-slots: graph range start=%s end=%s tz=%s horizon_days=%d workday=%s-%s duration_min=%s",
@@ -96,91 +563,80 @@ def handler(inputs: Dict[str, Any]) -> Dict[str, Any]:
         inputs.get("appointmentDurationMinutes"),
     )
 
-    events: List[Dict[str, Any]] = []
-    url = "https://graph.microsoft.com/v1.0/me/calendarView?" + urllib.parse.urlencode(
-        {
-            "startDateTime": start_utc_s,
-            "endDateTime": end_utc_s,
-            "$select": "start,end,subject,showAs,isAllDay",
-            "$top": "100",
-        }
-    )
-    safe_pref = tz_name.replace('"', "")
-    while url:
-        req = urllib.request.Request(
-            url,
-            headers={
-                "Authorization": "Bearer " + token,
-                "Prefer": 'outlook.timezone="' + safe_pref + '"',
-            },
+    fetch_kw = {
+        "base_url": (inputs.get("graphBaseUrl") or GRAPH_BASE_URL).strip(),
+        "shard_days": int(inputs.get("graphShardDays") or DEFAULT_SHARD_DAYS),
+        "max_workers": int(inputs.get("graphMaxWorkers") or DEFAULT_MAX_WORKERS),
+        "timeouts": timeouts_from_inputs(inputs, read_default=DEFAULT_TIMEOUTS.read),
+        "retry": _retry_policy(inputs),
+    }
+    mode = (inputs.get("calendarFetchMode") or "calendarView").strip()
+    if mode == "delta":
+        return _delta_handler(inputs, token, tz, tz_name, start_day, end_day, fetch_kw)
+    if mode == "getSchedule":
+        mailboxes = _schedule_mailboxes(inputs)
+        if mailboxes:
+            return _schedule_handler(
+                inputs, token, tz, tz_name, start_utc, end_utc, mailboxes, fetch_kw
+            )
+        logger.warning(
+            "outlook-calendar-free-slots: calendarFetchMode=getSchedule without scheduleMailboxes "
+            "— using calendarView"
         )
+    if mode == "progressive":
+        return _progressive_handler(inputs, token, tz_name, start_utc, end_utc, fetch_kw)
+    if mode == "series":
         try:
-            with urllib.request.urlopen(req, timeout=60) as resp:
-                data = json.loads(resp.read().decode())
+            out = _series_handler(inputs, token, tz_name, start_utc, end_utc, fetch_kw)
         except Exception as e:
             logger.exception(
-                "outlook-calendar-free-slots: Graph request failed reason=graph_http_error "
-                "page=%d error=%s",
-                len(events),
+                "outlook-calendar-free-slots: series fetch failed reason=graph_http_error error=%s",
                 str(e)[:500],
             )
             return {"calendarAvailability": None, "calendarError": str(e)[:500]}
-        batch = data.get("value") or []
-        events.extend(batch)
-        logger.info(
-            "outlook-calendar-free-slots: graph page events=%d total_so_far=%d has_next=%s",
-            len(batch),
-            len(events),
-            bool(data.get("@odata.nextLink")),
-        )
-        url = data.get("@odata.nextLink")
+        if out is not None:
+            return out
 
-    busy_intervals: List[Dict[str, str]] = []
-    for ev in events:
-        if (ev.get("showAs") or "").lower() == "free":
-            continue
-        s = ev.get("start") or {}
-        e = ev.get("end") or {}
-        st = _localize_graph_dt(s.get("dateTime"), s.get("timeZone"), tz_name)
-        en = _localize_graph_dt(e.get("dateTime"), e.get("timeZone"), tz_name)
-        if not st or not en or en <= st:
-            continue
-        busy_intervals.append(
-            {
-                "start": st.astimezone(tz).isoformat(),
-                "end": en.astimezone(tz).isoformat(),
-            }
+    try:
+        # Events become epoch intervals while each page is parsed; free ones are never kept.
+        busy_epochs, stats = fetch_calendar_view(
+            token,
+            tz_name,
+            start_utc,
+            end_utc,
+            to_item=lambda ev: _event_epochs(ev, tz_name),
+            **fetch_kw,
         )
+    except Exception as e:
+        logger.exception(
+            "outlook-calendar-free-slots: Graph request failed reason=graph_http_error error=%s",
+            str(e)[:500],
+        )
+        return {"calendarAvailability": None, "calendarError": str(e)[:500]}
+    logger.info(
+        "outlook-calendar-free-slots: graph fetched events=%d shards=%d workers=%d pages=%d "
+        "duplicates=%d elapsed_ms=%d server_filter=%s",
+        stats.events,
+        stats.shards,
+        stats.workers,
+        stats.pages,
+        stats.duplicates,
+        stats.elapsed_ms,
+        stats.server_filter,
+    )
 
     logger.info(
         "outlook-calendar-free-slots: busy_intervals=%d from_events=%d",
-        len(busy_intervals),
-        len(events),
+        len(busy_epochs),
+        stats.events,
     )
 
     out = build_calendar_availability_from_busy_intervals(
         {
             **inputs,
             "calendarFetchOutcome": "ok",
-            "busyIntervals": busy_intervals,
+            "busyEpochs": ([s for s, _ in busy_epochs], [e for _, e in busy_epochs]),
         }
     )
-    cal = out.get("calendarAvailability")
-    slot_n = len((cal or {}).get("slots") or []) if isinstance(cal, dict) else 0
-    if slot_n == 0:
-        logger.warning(
-            "outlook-calendar-free-slots: done reason=no_free_slots_in_window "
-            "free_slots=0 graph_events=%d busy_intervals=%d — check workday %s-%s, "
-            "duration_min, horizon_days, or calendar density",
-            len(events),
-            len(busy_intervals),
-            inputs.get("appointmentWorkdayStart"),
-            inputs.get("appointmentWorkdayEnd"),
-        )
-    else:
-        logger.info(
-            "outlook-calendar-free-slots: done free_slots=%d calendarError=%s",
-            slot_n,
-            out.get("calendarError"),
-        )
+    _log_done(out, stats.events, len(busy_epochs), inputs, "calendarView", stats.paging)
     return out
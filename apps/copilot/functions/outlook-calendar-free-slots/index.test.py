@@ -0,0 +1,536 @@
+import base64
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+import urllib.parse
+from datetime import date, datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import calendar_sync
+import graph_calendar
+import graph_retry
+import recurrence
+from graph_calendar import fetch_calendar_view
+from index import handler
+
+
+def _graph_dt(dt):
+    return {"dateTime": dt.strftime("%Y-%m-%dT%H:%M:%S.0000000"), "timeZone": "UTC"}
+
+
+def _make_events():
+    day0 = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    events = []
+    for d in range(16):
+        for h in (7, 9, 13):
+            start = day0 + timedelta(days=d, hours=h)
+            events.append(
+                {
+                    "id": "ev-%d-%d" % (d, h),
+                    "start": _graph_dt(start),
+                    "end": _graph_dt(start + timedelta(minutes=45)),
+                    "showAs": "busy",
+                }
+            )
+    # Free time must not block a slot, whether the server or the client drops it.
+    events.append(
+        {
+            "id": "focus",
+            "start": _graph_dt(day0 + timedelta(days=1, hours=10)),
+            "end": _graph_dt(day0 + timedelta(days=1, hours=12)),
+            "showAs": "free",
+        }
+    )
+    # Spans several shards; must come back once.
+    events.append(
+        {
+            "id": "offsite",
+            "start": _graph_dt(day0 + timedelta(days=3)),
+            "end": _graph_dt(day0 + timedelta(days=6)),
+            "showAs": "oof",
+        }
+    )
+    return events
+
+
+def _make_series():
+    """Two series masters and the occurrences/exceptions calendarView would return for them."""
+    day0 = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    weekly = {
+        "pattern": {"type": "weekly", "interval": 1, "daysOfWeek": ["monday", "wednesday"]},
+        "range": {"type": "noEnd", "startDate": day0.date().isoformat(), "recurrenceTimeZone": "UTC"},
+    }
+    every_other_day = {
+        "pattern": {"type": "daily", "interval": 2},
+        "range": {
+            "type": "numbered",
+            "startDate": day0.date().isoformat(),
+            "numberOfOccurrences": 5,
+            "recurrenceTimeZone": "UTC",
+        },
+    }
+    starts = {
+        "weekly": [day0 + timedelta(days=d, hours=11) for d in range(20) if (day0 + timedelta(days=d)).weekday() in (0, 2)],
+        "daily": [day0 + timedelta(days=2 * k, hours=8) for k in range(5)],
+    }
+    minutes = {"weekly": 60, "daily": 30}
+    masters, events = [], []
+    for sid, rule in (("weekly", weekly), ("daily", every_other_day)):
+        first = starts[sid][0]
+        masters.append(
+            {
+                "id": sid,
+                "changeKey": sid + "-v1",
+                "start": _graph_dt(first),
+                "end": _graph_dt(first + timedelta(minutes=minutes[sid])),
+                "showAs": "busy",
+                "recurrence": rule,
+            }
+        )
+        for i, st in enumerate(starts[sid]):
+            ev = {
+                "id": "%s-%d" % (sid, i),
+                "type": "occurrence",
+                "seriesMasterId": sid,
+                "start": _graph_dt(st),
+                "end": _graph_dt(st + timedelta(minutes=minutes[sid])),
+                "showAs": "busy",
+            }
+            if i == 0:
+                # Moved (weekly) or marked free (daily): replaces the planned occurrence.
+                ev["type"] = "exception"
+                ev["originalStart"] = st.strftime("%Y-%m-%dT%H:%M:%SZ")
+                if sid == "weekly":
+                    ev["start"] = _graph_dt(st + timedelta(hours=3))
+                    ev["end"] = _graph_dt(st + timedelta(hours=4))
+                else:
+                    ev["showAs"] = "free"
+            events.append(ev)
+    return masters, events
+
+
+def _parse_graph_dt(value):
+    return datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
+
+
+def _state_rows(store):
+    with sqlite3.connect(store.path) as db:
+        return db.execute("SELECT scope, window, delta_link FROM sync_state").fetchall()
+
+
+class _StubGraph(BaseHTTPRequestHandler):
+    events = []
+    page_size = 5
+    schedule_status = 200
+    reject_filter = False
+    view_requests = []
+    view_paths = []
+    # Series masters served by /events?$filter=type eq 'seriesMaster' (and lastModifiedDateTime ge ...).
+    masters = []
+    master_filters = []
+    # Seconds to stall before answering a calendarView page.
+    delay = 0
+    # Answers for the next follow-up (nextLink) pages: a status, or "cut" for a truncated body.
+    failures = []
+    # Delta log: (version, event or {"@removed": ..., "id": ...}).
+    changes = []
+    delta_requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, body):
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def _delta(self, q):
+        self.delta_requests.append(q)
+        version = len(self.changes)
+        if "$deltatoken" in q:
+            if q["$deltatoken"] == "expired":
+                self._send_json(410, {"error": {"code": "SyncStateNotFound"}})
+                return
+            value = [ev for v, ev in self.changes if v >= int(q["$deltatoken"])]
+            body = {"value": value}
+        else:
+            lo, hi = q["startDateTime"][:19], q["endDateTime"][:19]
+            hits = [e for e in self.events if e["start"]["dateTime"][:19] < hi and e["end"]["dateTime"][:19] > lo]
+            skip = int(q.get("$skiptoken", 0))
+            body = {"value": hits[skip : skip + self.page_size]}
+            if skip + self.page_size < len(hits):
+                body["@odata.nextLink"] = self._link(dict(q, **{"$skiptoken": str(skip + self.page_size)}))
+                self._send_json(200, body)
+                return
+        body["@odata.deltaLink"] = self._link({"$deltatoken": str(version)})
+        self._send_json(200, body)
+
+    def _link(self, q):
+        return "http://%s:%d/v1.0/me/calendarView/delta?%s" % (
+            self.server.server_address + (urllib.parse.urlencode(q),)
+        )
+
+    def do_POST(self):
+        if self.schedule_status != 200:
+            self._send_json(self.schedule_status, {"error": {"code": "ErrorAccessDenied"}})
+            return
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        lo = _parse_graph_dt(body["startTime"]["dateTime"])
+        hi = _parse_graph_dt(body["endTime"]["dateTime"])
+        interval = timedelta(minutes=body["availabilityViewInterval"])
+        busy = [
+            (_parse_graph_dt(e["start"]["dateTime"]), _parse_graph_dt(e["end"]["dateTime"]), e)
+            for e in self.events
+        ]
+        busy = [(s, en, e) for s, en, e in busy if s < hi and en > lo and e["showAs"] != "free"]
+        value = []
+        for mailbox in body["schedules"]:
+            if mailbox.startswith("ann"):
+                items = [{"status": e["showAs"], "start": e["start"], "end": e["end"]} for _, _, e in busy]
+                value.append({"scheduleId": mailbox, "availabilityView": "", "scheduleItems": items})
+            elif mailbox.startswith("bob"):
+                # Free/busy-only access: no scheduleItems, just the view.
+                view, t = "", lo
+                while t < hi:
+                    view += "2" if any(s < t + interval and en > t for s, en, _ in busy) else "0"
+                    t += interval
+                value.append({"scheduleId": mailbox, "availabilityView": view})
+            else:
+                value.append({"scheduleId": mailbox, "error": {"responseCode": "ErrorMailboxNotFound"}})
+        self._send_json(200, {"value": value})
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        # "good" or a JWT-shaped "good.<claims>.sig".
+        if (self.headers.get("Authorization") or "").split(".")[0] != "Bearer good":
+            self.send_response(401)
+            self.end_headers()
+            self.wfile.write(b'{"error": {"code": "InvalidAuthenticationToken"}}')
+            return
+        q = dict(urllib.parse.parse_qsl(url.query))
+        if url.path.endswith("/calendarView/delta"):
+            self._delta(q)
+            return
+        if url.path.endswith("/events"):
+            self.master_filters.append(q.get("$filter"))
+            kind, _, since = (q.get("$filter") or "").partition(" and lastModifiedDateTime ge ")
+            if kind != "type eq 'seriesMaster'" or self.reject_filter:
+                self._send_json(400, {"error": {"code": "ErrorInvalidProperty"}})
+                return
+            value = [m for m in self.masters if not since or m.get("lastModifiedDateTime", "") >= since]
+            self._send_json(200, {"value": value})
+            return
+        self.view_requests.append(dict(q))
+        self.view_paths.append(url.path)
+        time.sleep(self.delay)
+        if "$skip" in q and self.failures:
+            failure = self.failures.pop(0)
+            if failure == "cut":
+                self.send_response(200)
+                self.send_header("Content-Length", "4000")
+                self.end_headers()
+                self.wfile.write(b'{"value": [{"id": "partial", "start": {}, "end": {}}, ')
+            else:
+                self.send_response(failure)
+                self.send_header("Retry-After", "0")
+                self.end_headers()
+            return
+        if "$filter" in q and self.reject_filter:
+            self._send_json(400, {"error": {"code": "ErrorInvalidProperty"}})
+            return
+        lo = q["startDateTime"][:19]
+        hi = q["endDateTime"][:19]
+        hits = sorted(
+            (e for e in self.events if e["start"]["dateTime"][:19] < hi and e["end"]["dateTime"][:19] > lo),
+            key=lambda e: e["start"]["dateTime"],
+        )
+        if q.get("$filter") == "showAs ne 'free'":
+            hits = [e for e in hits if e["showAs"] != "free"]
+        elif q.get("$filter") == "type ne 'occurrence'":
+            hits = [e for e in hits if e.get("type") != "occurrence"]
+        skip = int(q.get("$skip", 0))
+        # Pages are capped like Graph caps $top, so the tests see many of them.
+        top = min(int(q.get("$top", self.page_size)), self.page_size)
+        body = {"value": [{k: e[k] for k in q["$select"].split(",") if k in e} for e in hits[skip : skip + top]]}
+        if skip + top < len(hits):
+            q["$skip"] = str(skip + top)
+            body["@odata.nextLink"] = "http://%s:%d%s?%s" % (
+                self.server.server_address + (url.path, urllib.parse.urlencode(q))
+            )
+        self._send_json(200, body)
+
+
+class TestHandlerFunction(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        _StubGraph.events = _make_events()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _StubGraph)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = "http://127.0.0.1:%d/v1.0" % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def _inputs(self, **overrides):
+        inputs = {
+            "emailProvider": "OUTLOOK",
+            "scheduleAppointments": True,
+            "outlookToken": "good",
+            "graphBaseUrl": self.base_url,
+            "appointmentTimeZone": "UTC",
+            "appointmentHorizonDays": 14,
+            "appointmentWorkdayStart": "07:00",
+            "appointmentWorkdayEnd": "15:00",
+            "maxSchedulingRecommendations": 40,
+            # The stub's 5-event pages would otherwise be paced by the tenant bucket.
+            "graphRequestsPerSecond": 10000,
+        }
+        inputs.update(overrides)
+        return inputs
+
+    def test_sharded_fetch_keeps_order_and_dedupes(self):
+        start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        end = start + timedelta(days=15)
+        single, single_stats = fetch_calendar_view("good", "UTC", start, end, self.base_url, shard_days=30)
+        sharded, stats = fetch_calendar_view("good", "UTC", start, end, self.base_url, shard_days=2)
+        self.assertEqual([e["id"] for e in sharded], [e["id"] for e in single])
+        self.assertEqual(single_stats.shards, 1)
+        self.assertEqual(stats.shards, 8)
+        self.assertGreater(stats.duplicates, 0)
+        self.assertEqual(len({e["id"] for e in sharded}), len(sharded))
+
+    def test_failed_shard_cancels_the_queued_ones(self):
+        start = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        _StubGraph.reject_filter = True
+        _StubGraph.delay = 0.05
+        self.addCleanup(setattr, _StubGraph, "reject_filter", False)
+        self.addCleanup(setattr, _StubGraph, "delay", 0)
+        del _StubGraph.view_requests[:]
+        with self.assertRaises(graph_calendar.HTTPError):
+            fetch_calendar_view(
+                "good",
+                "UTC",
+                start,
+                start + timedelta(days=15),
+                self.base_url,
+                shard_days=1,
+                max_workers=2,
+                type_filter="type ne 'occurrence'",
+            )
+        # 15 shards on 2 workers: the error comes back after the first round, not the last.
+        self.assertLessEqual(len(_StubGraph.view_requests), 4)
+
+    def test_slots_do_not_depend_on_sharding(self):
+        one = handler(self._inputs(graphShardDays=30))
+        many = handler(self._inputs(graphShardDays=1, graphMaxWorkers=8))
+        self.assertEqual(one, many)
+        self.assertEqual(len(one["calendarAvailability"]["slots"]), 40)
+
+    def test_get_schedule_matches_calendar_view(self):
+        view = handler(self._inputs())
+        for mailbox in ("ann@example.com", "bob@example.com"):
+            sched = handler(self._inputs(calendarFetchMode="getSchedule", scheduleMailboxes=[mailbox]))
+            self.assertEqual(sched, view)
+
+    def test_get_schedule_falls_back_to_calendar_view(self):
+        view = handler(self._inputs())
+        _StubGraph.schedule_status = 403
+        try:
+            sched = handler(self._inputs(calendarFetchMode="getSchedule", scheduleMailboxes=["ann@example.com"]))
+        finally:
+            _StubGraph.schedule_status = 200
+        self.assertEqual(sched, view)
+
+    def test_get_schedule_fallback_reads_the_given_mailbox(self):
+        claims = base64.urlsafe_b64encode(json.dumps({"upn": "Ann@example.com"}).encode()).decode()
+        own_token = "good.%s.sig" % claims.rstrip("=")
+        view = handler(self._inputs())
+        _StubGraph.schedule_status = 403
+        self.addCleanup(setattr, _StubGraph, "schedule_status", 200)
+        for token, mailbox, path in (
+            ("good", "carol@example.com", "/v1.0/users/carol%40example.com/calendarView"),
+            (own_token, "carol@example.com", "/v1.0/users/carol%40example.com/calendarView"),
+            (own_token, "ann@example.com", "/v1.0/me/calendarView"),
+        ):
+            del _StubGraph.view_paths[:]
+            sched = handler(
+                self._inputs(outlookToken=token, calendarFetchMode="getSchedule", scheduleMailboxes=[mailbox])
+            )
+            self.assertEqual(sched, view)
+            self.assertEqual(set(_StubGraph.view_paths), {path})
+
+    def test_get_schedule_many_mailboxes(self):
+        out = handler(
+            self._inputs(
+                calendarFetchMode="getSchedule",
+                scheduleMailboxes=["ann@example.com", "bob@example.com", "carol@example.com"],
+            )
+        )
+        by_mailbox = out["calendarAvailabilityByMailbox"]
+        self.assertEqual(list(by_mailbox), ["ann@example.com", "bob@example.com", "carol@example.com"])
+        self.assertEqual(by_mailbox["ann@example.com"], by_mailbox["bob@example.com"])
+        # carol is unknown to getSchedule and read through /users/{mailbox}/calendarView.
+        self.assertEqual(by_mailbox["carol@example.com"], by_mailbox["ann@example.com"])
+
+    def test_delta_sync_transfers_only_changes(self):
+        original = list(_StubGraph.events)
+        self.addCleanup(setattr, _StubGraph, "events", original)
+        store = "sqlite:" + os.path.join(tempfile.mkdtemp(), "sync.sqlite3")
+        delta = self._inputs(calendarFetchMode="delta", calendarSyncStore=store)
+
+        self.assertEqual(handler(delta), handler(self._inputs()))
+
+        # Cancel the first event of tomorrow, add a long one the day after.
+        removed = _StubGraph.events[3]
+        day2 = _parse_graph_dt(_StubGraph.events[6]["start"]["dateTime"])
+        added = {
+            "id": "workshop",
+            "start": _graph_dt(day2 + timedelta(hours=2)),
+            "end": _graph_dt(day2 + timedelta(hours=6)),
+            "showAs": "busy",
+        }
+        _StubGraph.events = [e for e in original if e is not removed] + [added]
+        _StubGraph.changes = [(0, {"@removed": {"reason": "deleted"}, "id": removed["id"]}), (0, added)]
+        self.addCleanup(setattr, _StubGraph, "changes", [])
+        del _StubGraph.delta_requests[:]
+
+        self.assertEqual(handler(delta), handler(self._inputs()))
+        self.assertEqual([q.get("$deltatoken") for q in _StubGraph.delta_requests], ["0"])
+
+        # An expired deltaLink triggers a full resync.
+        sync_store = calendar_sync.open_store(store)
+        for scope, window, link in _state_rows(sync_store):
+            sync_store.apply(scope, window, link.replace("deltatoken=2", "deltatoken=expired"), {}, [], False)
+        del _StubGraph.delta_requests[:]
+        self.assertEqual(handler(delta), handler(self._inputs()))
+        self.assertEqual(_StubGraph.delta_requests[0].get("$deltatoken"), "expired")
+        self.assertNotIn("$deltatoken", _StubGraph.delta_requests[1])
+
+    def test_delta_sync_prunes_stale_scopes(self):
+        store = "sqlite:" + os.path.join(tempfile.mkdtemp(), "sync.sqlite3")
+        sync_store = calendar_sync.open_store(store)
+        sync_store.apply("gone|UTC", "old-window", "link", {"x": ("a", "b")}, [], True)
+        with sqlite3.connect(sync_store.path) as db:
+            db.execute("UPDATE sync_state SET updated_at = updated_at - 60 * 86400")
+        handler(self._inputs(calendarFetchMode="delta", calendarSyncStore=store))
+        self.assertNotIn("gone|UTC", [row[0] for row in _state_rows(sync_store)])
+        self.assertEqual(len(_state_rows(sync_store)), 1)
+        with sqlite3.connect(sync_store.path) as db:
+            self.assertEqual(db.execute("SELECT COUNT(*) FROM busy WHERE scope = 'gone|UTC'").fetchone()[0], 0)
+
+    def test_server_filter_falls_back_and_page_size_adapts(self):
+        del _StubGraph.view_requests[:]
+        filtered = handler(self._inputs(graphShardDays=30))
+        self.assertTrue(all(q["$filter"] == "showAs ne 'free'" for q in _StubGraph.view_requests))
+        self.assertEqual(_StubGraph.view_requests[0]["$top"], "100")
+        self.assertGreater(int(_StubGraph.view_requests[-1]["$top"]), 100)
+
+        _StubGraph.reject_filter = True
+        self.addCleanup(setattr, _StubGraph, "reject_filter", False)
+        self.addCleanup(graph_calendar._FILTER_REJECTED.clear)
+        del _StubGraph.view_requests[:]
+        self.assertEqual(handler(self._inputs(graphShardDays=30)), filtered)
+        self.assertIn("$filter", _StubGraph.view_requests[0])
+        self.assertNotIn("$filter", _StubGraph.view_requests[1])
+        self.assertNotIn("$filter", _StubGraph.view_requests[-1])
+
+    def test_failed_pages_are_retried_in_place(self):
+        expected = handler(self._inputs(graphShardDays=30))
+        del _StubGraph.view_requests[:]
+        _StubGraph.failures = [429, "cut", 503]
+        self.addCleanup(setattr, _StubGraph, "failures", [])
+        self.assertEqual(handler(self._inputs(graphShardDays=30)), expected)
+        self.assertEqual(_StubGraph.failures, [])
+        skips = [q.get("$skip") for q in _StubGraph.view_requests]
+        # One first page; the failing follow-up page is requested again, not the shard.
+        self.assertEqual(skips.count(None), 1)
+        self.assertEqual(skips[1:5], [skips[1]] * 4)
+        self.assertIn("throttled=", graph_retry.retry_stats())
+
+    def test_series_mode_matches_calendar_view(self):
+        masters, series_events = _make_series()
+        saved = _StubGraph.events
+        _StubGraph.events = saved + series_events
+        _StubGraph.masters = masters
+        try:
+            view = handler(self._inputs())
+            del _StubGraph.view_requests[:]
+            del _StubGraph.master_filters[:]
+            hits = recurrence.SERIES_CACHE.hits
+            first = handler(self._inputs(calendarFetchMode="series"))
+            second = handler(self._inputs(calendarFetchMode="series"))
+            _StubGraph.reject_filter = True
+            refused = handler(self._inputs(calendarFetchMode="series"))
+        finally:
+            _StubGraph.events = saved
+            _StubGraph.masters = []
+            _StubGraph.reject_filter = False
+            graph_calendar._FILTER_REJECTED.discard(self.base_url)
+        self.assertEqual(first, view)
+        self.assertEqual(second, view)
+        self.assertEqual(refused, view)
+        self.assertEqual(recurrence.SERIES_CACHE.hits - hits, 2)
+        # The second run only lists masters modified since the first.
+        self.assertIn("lastModifiedDateTime ge", _StubGraph.master_filters[1])
+        self.assertIn("type ne 'occurrence'", _StubGraph.view_requests[0]["$filter"])
+
+    def test_series_expansion_skips_to_the_window(self):
+        until = date(2026, 6, 30)
+        since = date(2026, 5, 17)
+        patterns = [
+            {"type": "daily", "interval": 3},
+            {"type": "weekly", "interval": 2, "daysOfWeek": ["tuesday", "friday"], "firstDayOfWeek": "monday"},
+            {"type": "absoluteMonthly", "interval": 5, "dayOfMonth": 31},
+            {"type": "relativeMonthly", "interval": 1, "daysOfWeek": ["thursday"], "index": "last"},
+            {"type": "absoluteYearly", "interval": 1, "month": 6, "dayOfMonth": 2},
+        ]
+        for pattern in patterns:
+            rng = {"type": "noEnd", "startDate": "2003-02-11"}
+            rule = {"pattern": pattern, "range": rng}
+            walked = [d for d in recurrence._series_dates(rule, until) if d >= since]
+            self.assertEqual(
+                [d for d in recurrence._series_dates(rule, until, since) if d >= since], walked, pattern
+            )
+            # A numbered range still counts from its start.
+            numbered = {"pattern": pattern, "range": dict(rng, type="numbered", numberOfOccurrences=3)}
+            self.assertEqual(
+                list(recurrence._series_dates(numbered, until, since)),
+                list(recurrence._series_dates(numbered, until)),
+            )
+
+    def test_progressive_stops_early_with_the_same_slots(self):
+        del _StubGraph.view_requests[:]
+        view = handler(self._inputs())["calendarAvailability"]
+        view_pages = len(_StubGraph.view_requests)
+        del _StubGraph.view_requests[:]
+        progressive = handler(self._inputs(calendarFetchMode="progressive"))["calendarAvailability"]
+        self.assertEqual(progressive["slots"], view["slots"])
+        self.assertIsNone(progressive["coveredUntil"])
+        self.assertLess(len(_StubGraph.view_requests), view_pages)
+
+        # At the deadline, the slots confirmed so far come back.
+        _StubGraph.delay = 0.2
+        self.addCleanup(setattr, _StubGraph, "delay", 0)
+        partial = handler(self._inputs(calendarFetchMode="progressive", calendarDeadlineSeconds=0.3))
+        cal = partial["calendarAvailability"]
+        self.assertIsNotNone(cal["coveredUntil"])
+        self.assertLess(len(cal["slots"]), len(view["slots"]))
+        self.assertEqual(cal["slots"], view["slots"][: len(cal["slots"])])
+
+    def test_graph_error_is_reported(self):
+        out = handler(self._inputs(outlookToken="expired"))
+        self.assertIsNone(out["calendarAvailability"])
+        self.assertIn("401", out["calendarError"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+"""
+Local expansion of Graph recurring series (seriesMaster.recurrence) into busy intervals,
+for calendarFetchMode "series".
+
+Instead of downloading every occurrence through calendarView, the series masters are read
+(incrementally after the first run, see graph_calendar.SeriesMasterCache) and expanded
+here; calendarView is only asked for single instances and exceptions (type ne
+'occurrence'). An exception replaces the occurrence whose start equals its
+originalStart. Expansions are cached per (master content, zone, window), so as long as a
+series is unchanged (same changeKey/recurrence) later runs reuse them.
+
+Supported patterns are Graph's: daily, weekly, absoluteMonthly, relativeMonthly,
+absoluteYearly, relativeYearly with endDate / noEnd / numbered ranges. Occurrences are laid
+out on the wall clock of range.recurrenceTimeZone (the mailbox zone when Graph reports a
+non-IANA name). Deleted single occurrences are not reported by Graph v1.0 and stay busy.
+"""
+from __future__ import annotations
+
+import calendar
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from scheduling_core import get_zone, wall_us
+
+_WEEKDAYS = {
+    "monday": 0,
+    "tuesday": 1,
+    "wednesday": 2,
+    "thursday": 3,
+    "friday": 4,
+    "saturday": 5,
+    "sunday": 6,
+}
+_INDEX = {"first": 0, "second": 1, "third": 2, "fourth": 3, "last": -1}
+
+Occurrence = Tuple[int, int]
+
+
+def _days(pattern: Dict[str, Any]) -> List[int]:
+    return sorted({_WEEKDAYS[d.lower()] for d in pattern.get("daysOfWeek") or [] if d.lower() in _WEEKDAYS})
+
+
+def _nth_weekday(year: int, month: int, days: Sequence[int], index: str) -> Optional[date]:
+    """The first/second/.../last day of the month whose weekday is one of `days`."""
+    n = calendar.monthrange(year, month)[1]
+    hits = [date(year, month, d) for d in range(1, n + 1) if date(year, month, d).weekday() in days]
+    i = _INDEX.get((index or "first").lower(), 0)
+    return hits[i] if hits and (i < 0 or i < len(hits)) else None
+
+
+def _add_months(year: int, month: int, k: int) -> Tuple[int, int]:
+    m = month - 1 + k
+    return year + m // 12, m % 12 + 1
+
+
+def _candidate_dates(
+    pattern: Dict[str, Any], start: date, until: date, since: Optional[date] = None
+) -> Iterator[date]:
+    """
+    Dates matching the pattern in [start, until], ascending. With `since`, the iteration
+    jumps to the last pattern period beginning on or before it (the pattern stays anchored
+    at start), so old series are not walked from their first occurrence.
+    """
+    kind = (pattern.get("type") or "").lower()
+    interval = max(1, int(pattern.get("interval") or 1))
+    skip = (since - start).days if since is not None and since > start else 0
+    if kind == "daily":
+        d = start + timedelta(days=skip // interval * interval)
+        while d <= until:
+            yield d
+            d += timedelta(days=interval)
+    elif kind == "weekly":
+        days = _days(pattern) or [start.weekday()]
+        first_dow = _WEEKDAYS.get((pattern.get("firstDayOfWeek") or "sunday").lower(), 6)
+        week = start - timedelta(days=(start.weekday() - first_dow) % 7)
+        if skip:
+            week += timedelta(weeks=(since - week).days // 7 // interval * interval)
+        offsets = sorted((d - first_dow) % 7 for d in days)
+        while week <= until:
+            for off in offsets:
+                d = week + timedelta(days=off)
+                if start <= d <= until:
+                    yield d
+            week += timedelta(weeks=interval)
+    elif kind in ("absolutemonthly", "relativemonthly", "absoluteyearly", "relativeyearly"):
+        yearly = kind.endswith("yearly")
+        step = 12 * interval if yearly else interval
+        month = int(pattern.get("month") or start.month) if yearly else start.month
+        y, m = start.year, month
+        if skip:
+            behind = (since.year - y) * 12 + since.month - m
+            y, m = _add_months(y, m, max(0, behind) // step * step)
+        while date(y, m, 1) <= until:
+            if kind.startswith("absolute"):
+                dom = int(pattern.get("dayOfMonth") or start.day)
+                d = date(y, m, dom) if dom <= calendar.monthrange(y, m)[1] else None
+            else:
+                d = _nth_weekday(y, m, _days(pattern), pattern.get("index"))
+            if d is not None and start <= d <= until:
+                yield d
+            y, m = _add_months(y, m, step)
+
+
+def _series_dates(
+    recurrence: Dict[str, Any], until: date, since: Optional[date] = None
+) -> Iterator[date]:
+    """
+    Occurrence dates up to `until`. Dates before `since` may be skipped, except for numbered
+    ranges, whose count only works from the range start.
+    """
+    pattern = recurrence.get("pattern") or {}
+    rng = recurrence.get("range") or {}
+    start = date.fromisoformat(rng["startDate"][:10])
+    kind = (rng.get("type") or "noEnd").lower()
+    if kind == "enddate" and rng.get("endDate") and not rng["endDate"].startswith("0001"):
+        until = min(until, date.fromisoformat(rng["endDate"][:10]))
+    count = int(rng.get("numberOfOccurrences") or 0) if kind == "numbered" else None
+    if count is not None:
+        since = None
+    for n, d in enumerate(_candidate_dates(pattern, start, until, since)):
+        if count is not None and n >= count:
+            return
+        yield d
+
+
+def _zone_name(name: Optional[str], fallback: str) -> str:
+    if name:
+        try:
+            get_zone(name)
+            return name
+        except Exception:
+            pass
+    return fallback
+
+
+def expand_series(master: Dict[str, Any], tz_name: str, window: Tuple[int, int]) -> List[Occurrence]:
+    """(start, end) epoch µs of every occurrence of `master` overlapping window, ascending."""
+    recurrence = master.get("recurrence") or {}
+    s = master.get("start") or {}
+    e = master.get("end") or {}
+    first = wall_us(s.get("dateTime"), (s.get("timeZone") or tz_name).strip())
+    first_end = wall_us(e.get("dateTime"), (e.get("timeZone") or tz_name).strip())
+    if first is None or first_end is None or first_end <= first or not recurrence.get("range"):
+        return []
+    duration = first_end - first
+    rtz = _zone_name((recurrence.get("range") or {}).get("recurrenceTimeZone"), tz_name)
+    wall = datetime.fromtimestamp(first / 1e6, get_zone(rtz)).strftime("T%H:%M:%S")
+    until = datetime.fromtimestamp(window[1] / 1e6, timezone.utc).date() + timedelta(days=1)
+    # A day of slack for the zone offset, plus the days an occurrence can reach into the window.
+    since = datetime.fromtimestamp(window[0] / 1e6, timezone.utc).date() - timedelta(
+        days=1 + duration // 86_400_000_000
+    )
+    out: List[Occurrence] = []
+    for d in _series_dates(recurrence, until, since):
+        st = wall_us(d.isoformat() + wall, rtz)
+        if st is None:
+            continue
+        if st < window[1] and st + duration > window[0]:
+            out.append((st, st + duration))
+    return out
+
+
+class SeriesCache:
+    """Bounded LRU of expand_series results; hits/misses go to the done log line."""
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._data: "OrderedDict[Tuple[str, str, int, int], List[Occurrence]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _version(master: Dict[str, Any]) -> str:
+        # changeKey changes with every edit; without it, hash what the expansion depends on.
+        if master.get("changeKey"):
+            return master["changeKey"]
+        raw = json.dumps([master.get(k) for k in ("start", "end", "recurrence")], sort_keys=True)
+        return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+    def expand(self, master: Dict[str, Any], tz_name: str, window: Tuple[int, int]) -> List[Occurrence]:
+        key = (str(master.get("id")), self._version(master) + "|" + tz_name, window[0], window[1])
+        with self._lock:
+            found = self._data.get(key)
+            if found is not None:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return found
+            self.misses += 1
+        occurrences = expand_series(master, tz_name, window)
+        with self._lock:
+            self._data[key] = occurrences
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return occurrences
+
+    def stats(self) -> str:
+        with self._lock:
+            return "series=%d/%d" % (self.hits, self.misses)
+
+
+SERIES_CACHE = SeriesCache()
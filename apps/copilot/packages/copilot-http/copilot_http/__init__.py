@@ -0,0 +1,30 @@
+"""
+Shared HTTP transport for the copilot functions (Graph, generate-response, Airtable, scraping).
+
+One process-wide HttpClient keeps idle keep-alive connections per host, so warm function
+containers skip the TCP/TLS handshake on every page or API call after the first.
+parse_json_stream() consumes streamed bodies of the {"value": [...]} kind element by element.
+"""
+from .client import (
+    HTTPError,
+    HttpClient,
+    Response,
+    StreamingResponse,
+    Timeouts,
+    default_client,
+    timeouts_from_inputs,
+)
+from .json_stream import parse_json_stream
+from .version import __version__
+
+__all__ = [
+    "HTTPError",
+    "HttpClient",
+    "Response",
+    "StreamingResponse",
+    "Timeouts",
+    "__version__",
+    "default_client",
+    "parse_json_stream",
+    "timeouts_from_inputs",
+]
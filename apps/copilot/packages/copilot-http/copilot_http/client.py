@@ -0,0 +1,507 @@
+"""
+Keep-alive connection pool over http.client (stdlib only; brotli decoding when installed).
+
+HttpClient.request() takes an idle connection for the URL's host (or opens one), sends the
+request, reads and decodes the whole body and parks the connection again unless the server
+closes it. HttpClient.stream() stops after the headers and hands out the decoded body chunk
+by chunk, so large responses can be parsed while they arrive. A reused connection that turns
+out to be closed by the server is retried once on a fresh one, but only for idempotent
+methods (or with retry_stale=True): the server may have processed a POST before the reset.
+Every response carries its timing; HttpClient.stats() sums them for log lines.
+"""
+from __future__ import annotations
+
+import http.client
+import json
+import logging
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+import zlib
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from .version import __version__
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 60.0
+MAX_IDLE_PER_HOST = 8
+_MAX_REDIRECTS = 5
+_REDIRECTS = (301, 302, 303, 307, 308)
+# Failures of a pooled connection the server already closed; resent once on a fresh one
+# when the method is idempotent (or the caller says the request is safe to repeat).
+_STALE_ERRORS = (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError)
+_IDEMPOTENT_METHODS = frozenset(("GET", "HEAD", "OPTIONS", "PUT", "DELETE"))
+
+ACCEPT_ENCODING = "gzip, deflate" + (", br" if brotli is not None else "")
+_SSL_CONTEXT = ssl.create_default_context()
+
+
+class Timeouts(NamedTuple):
+    connect: float
+    read: float
+
+
+def timeouts_from_inputs(
+    inputs: Dict[str, Any],
+    read_default: float = DEFAULT_READ_TIMEOUT,
+    connect_default: float = DEFAULT_CONNECT_TIMEOUT,
+) -> Timeouts:
+    """httpConnectTimeoutSeconds / httpReadTimeoutSeconds from function inputs, else the defaults."""
+
+    def pick(key: str, default: float) -> float:
+        raw = (inputs or {}).get(key)
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            return default
+        return value if value > 0 else default
+
+    return Timeouts(
+        pick("httpConnectTimeoutSeconds", connect_default),
+        pick("httpReadTimeoutSeconds", read_default),
+    )
+
+
+class Timing(NamedTuple):
+    connect_ms: float
+    # Request sent -> status line received (server time + one round trip).
+    wait_ms: float
+    total_ms: float
+    reused: bool
+
+
+class Response:
+    def __init__(
+        self,
+        status: int,
+        reason: str,
+        url: str,
+        headers: http.client.HTTPMessage,
+        body: bytes,
+        wire_bytes: int,
+        timing: Timing,
+    ) -> None:
+        self.status = status
+        self.reason = reason
+        self.url = url
+        self.headers = headers
+        self.body = body
+        self.wire_bytes = wire_bytes
+        self.timing = timing
+
+    def text(self, errors: str = "strict") -> str:
+        return self.body.decode(self.headers.get_content_charset() or "utf-8", errors=errors)
+
+    def json(self) -> Any:
+        return json.loads(self.body.decode("utf-8"))
+
+
+class HTTPError(Exception):
+    """Status >= 400. str() matches urllib's "HTTP Error 404: Not Found"."""
+
+    def __init__(self, response: Response) -> None:
+        super().__init__("HTTP Error %d: %s" % (response.status, response.reason))
+        self.response = response
+        self.code = response.status
+        self.headers = response.headers
+
+    @property
+    def text(self) -> str:
+        return self.response.body.decode("utf-8", errors="replace")
+
+
+class _StreamDecoder:
+    """Incremental counterpart of _decode() for one response body."""
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = (encoding or "").strip().lower()
+        self._obj: Any = None
+        if self.encoding in ("gzip", "x-gzip"):
+            self._obj = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.encoding == "br" and brotli is not None:
+            self._obj = brotli.Decompressor()
+        elif self.encoding not in ("", "identity", "deflate"):
+            raise ValueError("unsupported Content-Encoding %r" % encoding)
+
+    def feed(self, chunk: bytes) -> bytes:
+        if self.encoding in ("", "identity") or not chunk:
+            return chunk
+        if self._obj is None:
+            # deflate: zlib-wrapped as the RFC says, or raw from some servers.
+            self._obj = zlib.decompressobj()
+            try:
+                return self._obj.decompress(chunk)
+            except zlib.error:
+                self._obj = zlib.decompressobj(-zlib.MAX_WBITS)
+        if self.encoding == "br":
+            return self._obj.process(chunk)
+        return self._obj.decompress(chunk)
+
+    def flush(self) -> bytes:
+        if self._obj is None or self.encoding == "br":
+            return b""
+        return self._obj.flush()
+
+
+class StreamingResponse:
+    """
+    Response whose body has not been read yet. Iterate iter_bytes() for decoded chunks (or
+    read() the whole Response), then close() -- also done by `with` and at the end of the
+    body. Only a completely read body lets the connection go back to the pool.
+    """
+
+    def __init__(
+        self,
+        client: "HttpClient",
+        key: "_PoolKey",
+        conn: http.client.HTTPConnection,
+        resp: http.client.HTTPResponse,
+        method: str,
+        parsed: urllib.parse.SplitResult,
+        reused: bool,
+        marks: Tuple[float, float, float],
+    ) -> None:
+        self.status = resp.status
+        self.reason = resp.reason
+        self.url = urllib.parse.urlunsplit(parsed)
+        self.headers = resp.msg
+        self.wire_bytes = 0
+        self.timing: Optional[Timing] = None
+        self._client = client
+        self._key = key
+        self._conn = conn
+        self._resp = resp
+        self._method = method
+        self._parsed = parsed
+        self._reused = reused
+        self._marks = marks
+        self._decoded = 0
+        self._complete = False
+
+    def __enter__(self) -> "StreamingResponse":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    def iter_bytes(self, chunk_size: int = 64 * 1024):
+        """Decoded body chunks as they arrive (at most chunk_size wire bytes each)."""
+        decoder = _StreamDecoder(self.headers.get("Content-Encoding", ""))
+        try:
+            while True:
+                raw = self._resp.read1(chunk_size)
+                if not raw:
+                    if self._resp.length:
+                        # Connection ended before Content-Length; read1() doesn't flag it.
+                        raise http.client.IncompleteRead(b"", self._resp.length)
+                    break
+                self.wire_bytes += len(raw)
+                data = decoder.feed(raw)
+                if data:
+                    self._decoded += len(data)
+                    yield data
+            tail = decoder.flush()
+            if tail:
+                self._decoded += len(tail)
+                yield tail
+            self._complete = True
+        finally:
+            self.close()
+
+    def read(self) -> Response:
+        """Whole decoded body as a Response; closes the stream."""
+        body = b"".join(self.iter_bytes())
+        return Response(
+            self.status, self.reason, self.url, self.headers, body, self.wire_bytes, self.timing
+        )
+
+    def close(self) -> None:
+        if self.timing is None:
+            self.timing = self._client._finish(self, self._complete, self._decoded)
+
+
+_PoolKey = Tuple[str, str, int]
+
+
+class HttpClient:
+    def __init__(self, max_idle_per_host: int = MAX_IDLE_PER_HOST, user_agent: Optional[str] = None):
+        self.max_idle_per_host = max_idle_per_host
+        self.user_agent = user_agent or "copilot-http/" + __version__
+        self._lock = threading.Lock()
+        self._idle: Dict[_PoolKey, List[http.client.HTTPConnection]] = {}
+        self._stats = {"requests": 0, "reused": 0, "connects": 0, "retries": 0, "bytes": 0, "wire": 0}
+        self._ms = {"connect": 0.0, "wait": 0.0, "total": 0.0}
+
+    # -- pool -------------------------------------------------------------------------------
+
+    def _checkout(self, key: _PoolKey) -> Optional[http.client.HTTPConnection]:
+        with self._lock:
+            idle = self._idle.get(key)
+            return idle.pop() if idle else None
+
+    def _checkin(self, key: _PoolKey, conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def _connect(self, key: _PoolKey, timeouts: Timeouts) -> http.client.HTTPConnection:
+        scheme, host, port = key
+        proxy = _proxy_for(scheme, host)
+        if scheme == "https":
+            if proxy:
+                conn = http.client.HTTPSConnection(
+                    proxy[0], proxy[1], timeout=timeouts.connect, context=_SSL_CONTEXT
+                )
+                conn.set_tunnel(host, port)
+            else:
+                conn = http.client.HTTPSConnection(
+                    host, port, timeout=timeouts.connect, context=_SSL_CONTEXT
+                )
+        else:
+            conn = http.client.HTTPConnection(
+                *(proxy or (host, port)), timeout=timeouts.connect
+            )
+        conn._copilot_absolute_form = bool(proxy) and scheme == "http"  # type: ignore[attr-defined]
+        conn.connect()
+        return conn
+
+    def close(self) -> None:
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
+
+    # -- requests ---------------------------------------------------------------------------
+
+    def _open(
+        self,
+        method: str,
+        parsed: urllib.parse.SplitResult,
+        headers: Dict[str, str],
+        body: Optional[bytes],
+        timeouts: Timeouts,
+        retry_stale: bool,
+    ) -> "StreamingResponse":
+        """Send the request and read the status line and headers; the body is left on the socket."""
+        scheme = parsed.scheme.lower()
+        port = parsed.port or (443 if scheme == "https" else 80)
+        key = (scheme, parsed.hostname or "", port)
+        target = parsed.path or "/"
+        if parsed.query:
+            target += "?" + parsed.query
+
+        for attempt in (0, 1):
+            t0 = time.perf_counter()
+            conn = self._checkout(key) if attempt == 0 else None
+            reused = conn is not None
+            if conn is None:
+                conn = self._connect(key, timeouts)
+                with self._lock:
+                    self._stats["connects"] += 1
+            t1 = time.perf_counter()
+            conn.sock.settimeout(timeouts.read)
+            path = urllib.parse.urlunsplit(parsed._replace(fragment="")) if getattr(
+                conn, "_copilot_absolute_form", False
+            ) else target
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                resp = conn.getresponse()
+            except _STALE_ERRORS:
+                conn.close()
+                if reused and retry_stale:
+                    with self._lock:
+                        self._stats["retries"] += 1
+                    continue
+                raise
+            except BaseException:
+                conn.close()
+                raise
+            return StreamingResponse(
+                self, key, conn, resp, method, parsed, reused, (t0, t1, time.perf_counter())
+            )
+        raise AssertionError("unreachable")
+
+    def _finish(self, sresp: "StreamingResponse", reusable: bool, decoded: int) -> Timing:
+        """Return the connection to the pool (or close it) and book the exchange in stats()."""
+        t0, t1, t2 = sresp._marks
+        t3 = time.perf_counter()
+        if reusable and not sresp._resp.will_close:
+            # read1() stops at Content-Length without marking the response closed.
+            sresp._resp.close()
+            self._checkin(sresp._key, sresp._conn)
+        else:
+            sresp._conn.close()
+        timing = Timing(
+            round((t1 - t0) * 1000, 1),
+            round((t2 - t1) * 1000, 1),
+            round((t3 - t0) * 1000, 1),
+            sresp._reused,
+        )
+        with self._lock:
+            self._stats["requests"] += 1
+            self._stats["reused"] += int(sresp._reused)
+            self._stats["bytes"] += decoded
+            self._stats["wire"] += sresp.wire_bytes
+            self._ms["connect"] += timing.connect_ms
+            self._ms["wait"] += timing.wait_ms
+            self._ms["total"] += timing.total_ms
+        logger.debug(
+            "copilot_http: %s %s://%s%s status=%d total_ms=%.1f connect_ms=%.1f reused=%s "
+            "wire=%d bytes=%d",
+            sresp._method,
+            sresp._key[0],
+            sresp._key[1],
+            sresp._parsed.path,
+            sresp.status,
+            timing.total_ms,
+            timing.connect_ms,
+            sresp._reused,
+            sresp.wire_bytes,
+            decoded,
+        )
+        return timing
+
+    def _follow(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]],
+        body: Union[bytes, str, None],
+        json_body: Any,
+        timeouts: Optional[Timeouts],
+        retry_stale: Optional[bool],
+    ) -> "StreamingResponse":
+        """Open the request, following up to 5 redirects; returns the final unread response."""
+        timeouts = timeouts or Timeouts(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
+        hdrs = {"User-Agent": self.user_agent, "Accept-Encoding": ACCEPT_ENCODING}
+        hdrs.update(headers or {})
+        if json_body is not None:
+            body = json.dumps(json_body, ensure_ascii=False)
+            hdrs.setdefault("Content-Type", "application/json")
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+
+        parsed = urllib.parse.urlsplit(url)
+        for _ in range(_MAX_REDIRECTS + 1):
+            if retry_stale is None:
+                resend = method.upper() in _IDEMPOTENT_METHODS
+            else:
+                resend = retry_stale
+            sresp = self._open(method, parsed, hdrs, body, timeouts, resend)
+            location = sresp.headers.get("Location")
+            if sresp.status not in _REDIRECTS or not location:
+                break
+            sresp.read()
+            target = urllib.parse.urlsplit(urllib.parse.urljoin(urllib.parse.urlunsplit(parsed), location))
+            if target.hostname != parsed.hostname:
+                hdrs.pop("Authorization", None)
+            if sresp.status == 303 or (sresp.status in (301, 302) and method == "POST"):
+                method, body = "GET", None
+                hdrs.pop("Content-Type", None)
+            parsed = target
+        return sresp
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Union[bytes, str, None] = None,
+        json_body: Any = None,
+        timeouts: Optional[Timeouts] = None,
+        raise_for_status: bool = True,
+        retry_stale: Optional[bool] = None,
+    ) -> Response:
+        """
+        Send one request (following up to 5 redirects) and return the decoded response.
+        Raises HTTPError for status >= 400 unless raise_for_status is False, and the usual
+        OSError family (socket.timeout, ConnectionError, ssl.SSLError) on transport failures.
+        retry_stale: resend once on a fresh connection when a pooled one turns out to be
+        closed; by default only for GET, HEAD, OPTIONS, PUT and DELETE. Pass True for a POST
+        that is safe to repeat (a read-only query), False to never resend.
+        """
+        resp = self._follow(method, url, headers, body, json_body, timeouts, retry_stale).read()
+        if raise_for_status and resp.status >= 400:
+            raise HTTPError(resp)
+        return resp
+
+    def stream(
+        self,
+        method: str,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        body: Union[bytes, str, None] = None,
+        json_body: Any = None,
+        timeouts: Optional[Timeouts] = None,
+        raise_for_status: bool = True,
+        retry_stale: Optional[bool] = None,
+    ) -> "StreamingResponse":
+        """
+        Like request(), but returns as soon as the headers are in; the body is consumed with
+        StreamingResponse.iter_bytes() and the connection goes back to the pool on close().
+        Error responses (>= 400) are read completely before HTTPError is raised.
+        """
+        sresp = self._follow(method, url, headers, body, json_body, timeouts, retry_stale)
+        if raise_for_status and sresp.status >= 400:
+            raise HTTPError(sresp.read())
+        return sresp
+
+    # -- metrics ----------------------------------------------------------------------------
+
+    def stats(self) -> str:
+        """e.g. "requests=12 reused=11 connects=1 retries=0 kb=480/120 ms=2300 wait_ms=2100 connect_ms=85"."""
+        with self._lock:
+            s, ms = dict(self._stats), dict(self._ms)
+        return "requests=%d reused=%d connects=%d retries=%d kb=%d/%d ms=%d wait_ms=%d connect_ms=%d" % (
+            s["requests"],
+            s["reused"],
+            s["connects"],
+            s["retries"],
+            s["bytes"] // 1024,
+            s["wire"] // 1024,
+            ms["total"],
+            ms["wait"],
+            ms["connect"],
+        )
+
+    def reset_stats(self) -> None:
+        with self._lock:
+            for k in self._stats:
+                self._stats[k] = 0
+            for k in self._ms:
+                self._ms[k] = 0.0
+
+
+def _proxy_for(scheme: str, host: str) -> Optional[Tuple[str, int]]:
+    """(host, port) of the environment proxy for this scheme/host, as urllib would use."""
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or urllib.request.proxy_bypass(host):
+        return None
+    parsed = urllib.parse.urlsplit(proxy if "://" in proxy else "http://" + proxy)
+    return parsed.hostname or "", parsed.port or 80
+
+
+_DEFAULT: Optional[HttpClient] = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def default_client() -> HttpClient:
+    """Process-wide client; its pool survives across warm invocations of a function."""
+    global _DEFAULT
+    with _DEFAULT_LOCK:
+        if _DEFAULT is None:
+            _DEFAULT = HttpClient()
+        return _DEFAULT
@@ -0,0 +1,114 @@
+"""
+Incremental parser for JSON objects that wrap one large array, e.g. Graph pages
+{"@odata.context": ..., "value": [...], "@odata.nextLink": ...}.
+
+parse_json_stream() hands every element of the array to a callback as soon as its closing
+brace has arrived and returns the object's other members; only the current element and the
+unparsed rest of the last chunk are held in memory, never the whole body or the whole list.
+Elements themselves are decoded with the stdlib (C) scanner.
+"""
+from __future__ import annotations
+
+import codecs
+import json
+from typing import Any, Callable, Dict, Iterable, Iterator
+
+_WS = " \t\n\r"
+_DECODER = json.JSONDecoder()
+# Drop the consumed prefix of the buffer once it is this long.
+_COMPACT_AT = 64 * 1024
+
+
+class _Reader:
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks: Iterator[bytes] = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        if self.pos >= _COMPACT_AT:
+            self.buf, self.pos = self.buf[self.pos :], 0
+        try:
+            chunk = next(self._chunks)
+        except StopIteration:
+            self.buf += self._utf8.decode(b"", final=True)
+            self.eof = True
+        else:
+            self.buf += self._utf8.decode(chunk)
+        return True
+
+    def _error(self, msg: str) -> json.JSONDecodeError:
+        return json.JSONDecodeError(msg, self.buf, self.pos)
+
+    def peek(self) -> str:
+        """Next non-whitespace character ("" at the end of the input), not consumed."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WS:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        c = self.peek()
+        if not c or c not in chars:
+            raise self._error("Expecting one of %r" % chars)
+        self.pos += 1
+        return c
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            else:
+                # A value that ends with the buffer may be cut off (a number) -- read on.
+                if end < len(self.buf) or self.eof:
+                    self.pos = end
+                    return value
+            self._fill()
+
+
+def parse_json_stream(
+    chunks: Iterable[bytes], array_key: str, on_item: Callable[[Any], None]
+) -> Dict[str, Any]:
+    """
+    Parse a UTF-8 JSON object from byte chunks. Elements of the array under `array_key` go
+    to on_item() one by one (in order); the returned dict has every other member. Raises
+    json.JSONDecodeError (a ValueError) on malformed or truncated input.
+    """
+    r = _Reader(chunks)
+    out: Dict[str, Any] = {}
+    r.expect("{")
+    if r.peek() == "}":
+        r.pos += 1
+    else:
+        while True:
+            key = r.value()
+            if not isinstance(key, str):
+                raise r._error("Expecting property name")
+            r.expect(":")
+            if key == array_key and r.peek() == "[":
+                r.pos += 1
+                if r.peek() == "]":
+                    r.pos += 1
+                else:
+                    while True:
+                        on_item(r.value())
+                        if r.expect(",]") == "]":
+                            break
+            else:
+                out[key] = r.value()
+            if r.expect(",}") == "}":
+                break
+    if r.peek():
+        raise r._error("Extra data")
+    return out
@@ -0,0 +1,142 @@
+import gzip
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from copilot_http import HTTPError, HttpClient, Timeouts, parse_json_stream, timeouts_from_inputs
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    posts = []
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, **headers):
+        self.send_response(status)
+        for k, v in headers.items():
+            self.send_header(k.replace("_", "-"), v)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/page":
+            page = {"@odata.context": "x", "value": [{"id": i, "s": "ü" * i} for i in range(300)], "n": 1.5}
+            self._send(200, gzip.compress(json.dumps(page).encode()), Content_Encoding="gzip")
+        elif self.path == "/gzip":
+            self._send(200, gzip.compress(b'{"ok": true}'), Content_Encoding="gzip")
+        elif self.path == "/moved":
+            self._send(302, b"", Location="/plain")
+        elif self.path == "/missing":
+            self._send(404, b"nope")
+        elif self.path == "/drop":
+            # Answers, then closes without announcing it: the pooled socket goes stale.
+            self._send(200, b"dropped")
+            self.close_connection = True
+        else:
+            self._send(200, self.headers.get("Accept-Encoding", "").encode())
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        self.posts.append(json.loads(body))
+        if self.path == "/drop":
+            self._send(200, b"dropped")
+            self.close_connection = True
+            return
+        self._send(200, json.dumps({"echo": json.loads(body)}).encode())
+
+
+class TestHttpClient(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = "http://127.0.0.1:%d" % cls.server.server_address[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.client = HttpClient()
+        self.addCleanup(self.client.close)
+
+    def test_keep_alive_reuses_connection(self):
+        first = self.client.request("GET", self.base + "/plain")
+        second = self.client.request("GET", self.base + "/plain")
+        self.assertFalse(first.timing.reused)
+        self.assertTrue(second.timing.reused)
+        self.assertIn("gzip", second.text())
+        self.assertIn("requests=2 reused=1 connects=1", self.client.stats())
+
+    def test_gzip_is_decoded(self):
+        resp = self.client.request("GET", self.base + "/gzip")
+        self.assertEqual(resp.json(), {"ok": True})
+        self.assertLess(resp.wire_bytes, 40)
+
+    def test_json_post_and_redirect(self):
+        resp = self.client.request("POST", self.base + "/echo", json_body={"a": "ä"})
+        self.assertEqual(resp.json(), {"echo": {"a": "ä"}})
+        moved = self.client.request("GET", self.base + "/moved")
+        self.assertEqual(moved.url, self.base + "/plain")
+
+    def test_http_error(self):
+        with self.assertRaises(HTTPError) as ctx:
+            self.client.request("GET", self.base + "/missing")
+        self.assertEqual(ctx.exception.code, 404)
+        self.assertEqual(ctx.exception.text, "nope")
+        self.assertEqual(str(ctx.exception), "HTTP Error 404: Not Found")
+
+    def test_stale_pooled_connection_is_retried(self):
+        self.client.request("GET", self.base + "/drop")
+        resp = self.client.request("GET", self.base + "/plain")
+        self.assertEqual(resp.status, 200)
+        self.assertIn("retries=1", self.client.stats())
+
+    def test_stale_connection_is_not_resent_for_post(self):
+        self.client.request("POST", self.base + "/drop", json_body={"n": 0})
+        del _Handler.posts[:]
+        with self.assertRaises(ConnectionError):
+            self.client.request("POST", self.base + "/echo", json_body={"n": 1})
+        self.assertIn("retries=0", self.client.stats())
+        # A repeatable POST may opt in.
+        self.client.request("POST", self.base + "/drop", json_body={"n": 2})
+        resp = self.client.request("POST", self.base + "/echo", json_body={"n": 3}, retry_stale=True)
+        self.assertEqual(resp.json(), {"echo": {"n": 3}})
+        self.assertIn("retries=1", self.client.stats())
+
+    def test_stream_parses_page_incrementally(self):
+        items = []
+        with self.client.stream("GET", self.base + "/page") as resp:
+            chunks = resp.iter_bytes(chunk_size=97)
+            rest = parse_json_stream(chunks, "value", items.append)
+        self.assertEqual(rest, {"@odata.context": "x", "n": 1.5})
+        self.assertEqual([it["id"] for it in items], list(range(300)))
+        self.assertEqual(items[299]["s"], "ü" * 299)
+        # Fully read, so the connection went back to the pool.
+        self.client.request("GET", self.base + "/plain")
+        self.assertIn("requests=2 reused=1 connects=1", self.client.stats())
+
+    def test_parse_json_stream_rejects_truncated_input(self):
+        body = b'{"value": [{"a": 1}, {"a": 2}], "next": 12345}'
+        seen = []
+        rest = parse_json_stream((body[i : i + 1] for i in range(len(body))), "value", seen.append)
+        self.assertEqual((seen, rest), ([{"a": 1}, {"a": 2}], {"next": 12345}))
+        with self.assertRaises(ValueError):
+            parse_json_stream([body[:-8]], "value", seen.append)
+
+    def test_timeouts_from_inputs(self):
+        self.assertEqual(timeouts_from_inputs({}, read_default=90), Timeouts(10.0, 90))
+        self.assertEqual(
+            timeouts_from_inputs({"httpConnectTimeoutSeconds": "3", "httpReadTimeoutSeconds": 0}, 45),
+            Timeouts(3.0, 45),
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
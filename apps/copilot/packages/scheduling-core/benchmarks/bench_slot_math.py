@@ -0,0 +1,143 @@
+"""
+Time build_calendar_availability_from_busy_intervals on synthetic calendars.
+
+    python benchmarks/bench_slot_math.py --out results.json
+    python benchmarks/bench_slot_math.py --baseline results.json --fail-over 1.25
+
+Every (scenario, size, maxSchedulingRecommendations) case is run once right after
+clear_caches() ("cold", as in a fresh container) and --repeat more times ("warm"). Results
+are written as JSON; with --baseline, warm medians are compared case by case and the exit
+status is 1 when any case is slower than --fail-over times the baseline.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+from typing import Any, Dict, List
+from unittest import mock
+
+from generators import GENERATORS
+
+from scheduling_core import __version__, build_calendar_availability_from_busy_intervals, slot_math
+from scheduling_core.caches import clear_caches
+
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+
+
+def _time_case(now, inputs: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    with mock.patch.object(slot_math, "_now", lambda tz: now.astimezone(tz)):
+        clear_caches()
+        t0 = time.perf_counter()
+        out = build_calendar_availability_from_busy_intervals(inputs)
+        cold = time.perf_counter() - t0
+        warm: List[float] = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            build_calendar_availability_from_busy_intervals(inputs)
+            warm.append(time.perf_counter() - t0)
+    return {
+        "coldMs": round(cold * 1000, 3),
+        "warmMedianMs": round(statistics.median(warm) * 1000, 3) if warm else None,
+        "warmMinMs": round(min(warm) * 1000, 3) if warm else None,
+        "slots": len(out["calendarAvailability"]["slots"]),
+    }
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    cases: List[Dict[str, Any]] = []
+    for name in args.scenarios:
+        for size in args.sizes:
+            now, inputs = GENERATORS[name](size, args.seed)
+            for max_recs in args.max_recs:
+                timing = _time_case(
+                    now, dict(inputs, maxSchedulingRecommendations=max_recs), args.repeat
+                )
+                case = {
+                    "scenario": name,
+                    "size": size,
+                    "maxRecommendations": max_recs,
+                    "horizonDays": inputs["appointmentHorizonDays"],
+                    **timing,
+                }
+                cases.append(case)
+                print(
+                    "%-10s n=%-7d max_recs=%-5d cold=%9.3f ms warm=%9.3f ms slots=%d"
+                    % (name, size, max_recs, case["coldMs"], case["warmMedianMs"] or 0, case["slots"]),
+                    file=sys.stderr,
+                )
+    try:
+        import numpy
+
+        numpy_version = numpy.__version__
+    except ImportError:
+        numpy_version = None
+    return {
+        "schedulingCoreVersion": __version__,
+        "python": platform.python_version(),
+        "numpy": numpy_version,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "cases": cases,
+    }
+
+
+def _key(case: Dict[str, Any]) -> tuple:
+    return case["scenario"], case["size"], case["maxRecommendations"]
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], fail_over: float) -> int:
+    before = {_key(c): c for c in baseline.get("cases", [])}
+    slower = 0
+    for case in results["cases"]:
+        old = before.get(_key(case))
+        if not old or not old.get("warmMedianMs") or not case.get("warmMedianMs"):
+            continue
+        ratio = case["warmMedianMs"] / old["warmMedianMs"]
+        flag = ""
+        if ratio > fail_over:
+            slower += 1
+            flag = "  SLOWER"
+        if old.get("slots") != case["slots"]:
+            flag += "  slots %s -> %s" % (old.get("slots"), case["slots"])
+        print(
+            "%-10s n=%-7d max_recs=%-5d %9.3f -> %9.3f ms  x%.2f%s"
+            % (*_key(case), old["warmMedianMs"], case["warmMedianMs"], ratio, flag)
+        )
+    print(
+        "baseline %s -> %s: %d case(s) slower than x%.2f"
+        % (baseline.get("schedulingCoreVersion"), results["schedulingCoreVersion"], slower, fail_over)
+    )
+    return 1 if slower else 0
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=list(DEFAULT_SIZES))
+    parser.add_argument("--max-recs", nargs="+", type=int, default=[3, 500])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--fail-over", type=float, default=1.25)
+    args = parser.parse_args(argv)
+
+    # Zero-slot warnings and per-call info lines would dominate the output.
+    logging.disable(logging.WARNING)
+    results = run(args)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            return compare(results, json.load(f), args.fail_over)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Time Graph-style event conversion: the ISO round trip against wall_us + busyEpochs.
+
+    python benchmarks/bench_wall_clock.py --sizes 1000 10000 --repeat 5
+
+Events of the GENERATORS scenarios are rewritten the way Graph sends them with
+Prefer: outlook.timezone ({"dateTime": "2026-10-05T09:30:00.0000000", "timeZone": ...}).
+"iso" is the former outlook-calendar-free-slots path (strptime + ZoneInfo per timestamp,
+astimezone().isoformat(), busyIntervals parsed again by slot_math); "epoch" converts with
+wall_us() and passes busyEpochs. Both must produce the same slots; convert and end-to-end
+(convert + slot computation) warm medians are reported, with caches cleared before each run.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import statistics
+import sys
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from unittest import mock
+
+from generators import GENERATORS, TZ, TZ_NAME
+
+from scheduling_core import build_calendar_availability_from_busy_intervals, get_zone, slot_math, wall_us
+from scheduling_core.caches import clear_caches
+
+Event = Dict[str, Any]
+
+
+def graph_events(rows: List[Dict[str, str]]) -> List[Event]:
+    def part(iso: str) -> Dict[str, str]:
+        local = datetime.fromisoformat(iso).astimezone(TZ)
+        return {"dateTime": local.strftime("%Y-%m-%dT%H:%M:%S.0000000"), "timeZone": TZ_NAME}
+
+    return [{"start": part(r["start"]), "end": part(r["end"]), "showAs": "busy"} for r in rows]
+
+
+def _localize(dt_str: Optional[str], ev_tz: Optional[str]) -> Optional[datetime]:
+    if not dt_str or "T" not in dt_str:
+        return None
+    base = dt_str.strip().split(".")[0].replace("Z", "")
+    if len(base) < 19:
+        return None
+    return datetime.strptime(base[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=get_zone(ev_tz or TZ_NAME))
+
+
+def convert_iso(events: List[Event]) -> Dict[str, Any]:
+    rows = []
+    for ev in events:
+        st = _localize(ev["start"]["dateTime"], ev["start"]["timeZone"])
+        en = _localize(ev["end"]["dateTime"], ev["end"]["timeZone"])
+        if st and en and en > st:
+            rows.append({"start": st.astimezone(TZ).isoformat(), "end": en.astimezone(TZ).isoformat()})
+    return {"busyIntervals": rows}
+
+
+def convert_epoch(events: List[Event]) -> Dict[str, Any]:
+    starts: List[int] = []
+    ends: List[int] = []
+    for ev in events:
+        st = wall_us(ev["start"]["dateTime"], ev["start"]["timeZone"])
+        en = wall_us(ev["end"]["dateTime"], ev["end"]["timeZone"])
+        if st is not None and en is not None and en > st:
+            starts.append(st)
+            ends.append(en)
+    return {"busyEpochs": (starts, ends)}
+
+
+PATHS: Dict[str, Callable[[List[Event]], Dict[str, Any]]] = {"iso": convert_iso, "epoch": convert_epoch}
+
+
+def _time_path(
+    now: datetime, base: Dict[str, Any], events: List[Event], convert, repeat: int
+) -> Tuple[Dict[str, Any], float, float]:
+    conv: List[float] = []
+    total: List[float] = []
+    with mock.patch.object(slot_math, "_now", lambda tz: now.astimezone(tz)):
+        for _ in range(repeat):
+            clear_caches()
+            t0 = time.perf_counter()
+            busy = convert(events)
+            t1 = time.perf_counter()
+            out = build_calendar_availability_from_busy_intervals({**base, **busy})
+            t2 = time.perf_counter()
+            conv.append(t1 - t0)
+            total.append(t2 - t0)
+    return out, statistics.median(conv) * 1000, statistics.median(total) * 1000
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", nargs="+", choices=sorted(GENERATORS), default=list(GENERATORS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000])
+    parser.add_argument("--max-recs", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="write results JSON here")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    cases = []
+    mismatches = 0
+    for name in args.scenarios:
+        for size in args.sizes:
+            now, inputs = GENERATORS[name](size, args.seed)
+            events = graph_events(inputs.pop("busyIntervals"))
+            base = dict(inputs, maxSchedulingRecommendations=args.max_recs)
+            case: Dict[str, Any] = {"scenario": name, "size": size, "events": len(events)}
+            slots = {}
+            for path, convert in PATHS.items():
+                out, conv_ms, total_ms = _time_path(now, base, events, convert, args.repeat)
+                slots[path] = out["calendarAvailability"]["slots"]
+                case[path] = {"convertMs": round(conv_ms, 3), "totalMs": round(total_ms, 3)}
+            case["sameSlots"] = slots["iso"] == slots["epoch"]
+            mismatches += not case["sameSlots"]
+            cases.append(case)
+            print(
+                "%-10s n=%-7d convert %9.3f -> %8.3f ms (x%.1f)  total %9.3f -> %8.3f ms (x%.1f)%s"
+                % (
+                    name,
+                    size,
+                    case["iso"]["convertMs"],
+                    case["epoch"]["convertMs"],
+                    case["iso"]["convertMs"] / max(case["epoch"]["convertMs"], 1e-6),
+                    case["iso"]["totalMs"],
+                    case["epoch"]["totalMs"],
+                    case["iso"]["totalMs"] / max(case["epoch"]["totalMs"], 1e-6),
+                    "" if case["sameSlots"] else "  SLOTS DIFFER",
+                )
+            )
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"seed": args.seed, "repeat": args.repeat, "cases": cases}, f, indent=2)
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Seeded synthetic calendars for the slot_math benchmarks.
+
+Each generator returns (now, inputs): a fixed "now" for slot_math._now and the function
+inputs with busyIntervals of roughly `n` rows. The same (n, seed) always yields the same
+calendar, so timings of two runs (or two commits) are comparable.
+"""
+from __future__ import annotations
+
+import random
+from datetime import datetime, time, timedelta
+from typing import Any, Callable, Dict, List, Tuple
+from zoneinfo import ZoneInfo
+
+TZ_NAME = "Europe/Berlin"
+TZ = ZoneInfo(TZ_NAME)
+# Monday; the DST scenario starts the week before the October switch instead.
+NOW = datetime(2026, 10, 5, 7, 0, tzinfo=TZ)
+
+Calendar = Tuple[datetime, Dict[str, Any]]
+
+
+def _horizon_days(n: int, per_day: int) -> int:
+    return max(14, min(365, n // per_day))
+
+
+def _inputs(rows: List[Dict[str, str]], horizon: int, **overrides: Any) -> Dict[str, Any]:
+    inputs = {
+        "calendarFetchOutcome": "ok",
+        "busyIntervals": rows,
+        "appointmentTimeZone": TZ_NAME,
+        "appointmentHorizonDays": horizon,
+        "appointmentDurationMinutes": 30,
+        "appointmentWorkdayStart": "08:00",
+        "appointmentWorkdayEnd": "18:00",
+        "appointmentWorkdays": ["mon", "tue", "wed", "thu", "fri"],
+    }
+    inputs.update(overrides)
+    return inputs
+
+
+def _row(start: datetime, end: datetime) -> Dict[str, str]:
+    return {"start": start.isoformat(), "end": end.isoformat()}
+
+
+def dense_blocks(n: int, seed: int) -> Calendar:
+    """Back-to-back meetings of 15-90 min with short gaps, spread over the workdays."""
+    rnd = random.Random(seed)
+    horizon = _horizon_days(n, 40)
+    per_day = max(1, n // horizon)
+    rows: List[Dict[str, str]] = []
+    day = NOW.date()
+    while len(rows) < n:
+        cursor = datetime.combine(day, time(7, 30), tzinfo=TZ)
+        for _ in range(per_day):
+            if len(rows) >= n:
+                break
+            cursor += timedelta(minutes=rnd.choice((0, 0, 0, 5, 10, 30)))
+            end = cursor + timedelta(minutes=rnd.choice((15, 30, 30, 45, 60, 90)))
+            rows.append(_row(cursor, end))
+            # Dense days run past the workday and into the night; slot_math clips them.
+            cursor = end - timedelta(minutes=rnd.choice((0, 0, 5)))
+        day += timedelta(days=1)
+    return NOW, _inputs(rows, horizon)
+
+
+def recurring_series(n: int, seed: int) -> Calendar:
+    """Daily/weekly series at fixed wall times whose occurrences overlap each other."""
+    rnd = random.Random(seed)
+    horizon = _horizon_days(n, 20)
+    rows: List[Dict[str, str]] = []
+    while len(rows) < n:
+        every = rnd.choice((1, 1, 7, 7, 14))
+        at = time(rnd.randrange(7, 19), rnd.choice((0, 15, 30, 45)))
+        minutes = rnd.choice((15, 30, 60, 120))
+        day = NOW.date() + timedelta(days=rnd.randrange(every))
+        while len(rows) < n and (day - NOW.date()).days <= horizon:
+            start = datetime.combine(day, at, tzinfo=TZ)
+            rows.append(_row(start, start + timedelta(minutes=minutes)))
+            day += timedelta(days=every)
+    # Calendar APIs return occurrences series by series; slot_math must sort them.
+    return NOW, _inputs(rows, horizon)
+
+
+def all_day_events(n: int, seed: int) -> Calendar:
+    """Mostly timed meetings plus single- and multi-day all-day blocks (in UTC, as Graph sends them)."""
+    rnd = random.Random(seed)
+    horizon = _horizon_days(n, 25)
+    rows: List[Dict[str, str]] = []
+    utc = ZoneInfo("UTC")
+    while len(rows) < n:
+        day = NOW.date() + timedelta(days=rnd.randrange(horizon + 1))
+        if rnd.random() < 0.1:
+            start = datetime.combine(day, time(0), tzinfo=utc)
+            end = start + timedelta(days=rnd.choice((1, 1, 1, 2, 5)))
+        else:
+            start = datetime.combine(day, time(rnd.randrange(6, 20), rnd.choice((0, 30))), tzinfo=TZ)
+            end = start + timedelta(minutes=rnd.choice((30, 60)))
+        rows.append(_row(start, end))
+    return NOW, _inputs(rows, horizon)
+
+
+def dst_horizon(n: int, seed: int) -> Calendar:
+    """Night windows across the 2026-10-25 switch, so wall-clock tiling is exercised."""
+    rnd = random.Random(seed)
+    now = datetime(2026, 10, 19, 7, 0, tzinfo=TZ)
+    horizon = _horizon_days(n, 40)
+    rows: List[Dict[str, str]] = []
+    while len(rows) < n:
+        start = (now + timedelta(minutes=5 * rnd.randrange(horizon * 288))).astimezone(TZ)
+        rows.append(_row(start, start + timedelta(minutes=rnd.choice((10, 20, 45)))))
+    return now, _inputs(
+        rows,
+        horizon,
+        appointmentWorkdayStart="00:00",
+        appointmentWorkdayEnd="05:00",
+        appointmentWorkdays=None,
+        appointmentDurationMinutes=20,
+    )
+
+
+GENERATORS: Dict[str, Callable[[int, int], Calendar]] = {
+    "dense": dense_blocks,
+    "recurring": recurring_series,
+    "allday": all_day_events,
+    "dst": dst_horizon,
+}
@@ -0,0 +1,30 @@
+"""
+Shared scheduling core for the copilot calendar functions.
+
+Both calendar-slots-from-busy-intervals and outlook-calendar-free-slots install this
+package (see their requirements.txt) instead of carrying their own slot_math copy.
+"""
+from .availability_index import build_calendar_availability_incremental
+from .caches import cache_stats, get_zone
+from .progressive import ProgressiveAvailability
+from .slot_math import (
+    DEFAULT_MAX_RECOMMENDATIONS,
+    build_calendar_availability_batch,
+    build_calendar_availability_from_busy_intervals,
+    iter_calendar_slots,
+)
+from .version import __version__
+from .wallclock import wall_us
+
+__all__ = [
+    "DEFAULT_MAX_RECOMMENDATIONS",
+    "ProgressiveAvailability",
+    "__version__",
+    "build_calendar_availability_batch",
+    "build_calendar_availability_from_busy_intervals",
+    "build_calendar_availability_incremental",
+    "cache_stats",
+    "get_zone",
+    "iter_calendar_slots",
+    "wall_us",
+]
@@ -0,0 +1,222 @@
+"""
+Incremental availability: a serializable index of busy intervals and per-window slots that
+is updated from a delta of added/removed busy intervals.
+
+Steady-state polling runs only recompute the workday windows a changed interval touches
+(plus windows new to the horizon and the window holding the lead-time cutoff); every other
+window reuses its slots from the previous index.
+
+Index layout (JSON-safe, version _INDEX_VERSION):
+
+    {"v": 1,
+     "settings": "<hash of timezone, duration, workday spec, holidays>",
+     "busy": [[start_us, end_us], ...],     # raw intervals, sorted, epoch microseconds
+     "maxLen": <longest interval in busy>,  # bounds the per-window lookup
+     "windows": {"<window start_us>": [[slot_start_iso, slot_end_iso], ...]}}
+
+A missing, malformed or differently configured index is rebuilt from busyIntervals.
+"""
+from __future__ import annotations
+
+import bisect
+import hashlib
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from .caches import cache_stats
+from .slot_math import (
+    _calendar_availability,
+    _merge_epochs,
+    _parse_busy_rows,
+    _read_settings,
+    _skip_result,
+    _SlotSettings,
+    _sweep_free_slots,
+)
+from .windows import Window, to_us
+
+logger = logging.getLogger(__name__)
+
+_INDEX_VERSION = 1
+
+Busy = List[Tuple[int, int]]
+
+
+def _settings_key(st: _SlotSettings) -> str:
+    """What the per-window slots depend on. Horizon, lead time and max_recs only pick windows."""
+    raw = repr((st.tz_name, st.dur_min, st.workdays, sorted(st.holidays)))
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def _load_index(raw: Any, settings_key: str) -> Optional[Dict[str, Any]]:
+    """Return a usable index (busy as tuples) or None when absent, malformed or stale."""
+    if not isinstance(raw, dict):
+        return None
+    if raw.get("v") != _INDEX_VERSION or raw.get("settings") != settings_key:
+        logger.info("availability_index: index is for other settings, rebuilding")
+        return None
+    try:
+        busy = [(int(s), int(e)) for s, e in raw["busy"]]
+        windows = {int(k): v for k, v in raw["windows"].items()}
+        max_len = int(raw.get("maxLen") or 0)
+    except (KeyError, TypeError, ValueError, AttributeError):
+        logger.warning("availability_index: ignoring malformed availabilityIndex")
+        return None
+    return {"busy": busy, "maxLen": max_len, "windows": windows}
+
+
+def _rows_to_pairs(rows: Any) -> Busy:
+    starts, ends = _parse_busy_rows(rows)
+    return list(zip(starts, ends))
+
+
+def _apply_delta(busy: Busy, added: Busy, removed: Busy) -> int:
+    """Update the sorted busy list in place; returns how many removals had no match."""
+    missing = 0
+    for pair in removed:
+        k = bisect.bisect_left(busy, pair)
+        if k < len(busy) and busy[k] == pair:
+            del busy[k]
+        else:
+            missing += 1
+    for pair in added:
+        bisect.insort(busy, pair)
+    return missing
+
+
+def _diff(old: Busy, new: Busy) -> Tuple[Busy, Busy]:
+    """(added, removed) between two busy lists, counting duplicates."""
+    counts: Dict[Tuple[int, int], int] = {}
+    for pair in old:
+        counts[pair] = counts.get(pair, 0) + 1
+    added: Busy = []
+    for pair in new:
+        if counts.get(pair):
+            counts[pair] -= 1
+        else:
+            added.append(pair)
+    removed = [pair for pair, n in counts.items() for _ in range(n)]
+    return added, removed
+
+
+def _touched(windows: List[Window], changes: Busy) -> set:
+    """Starts of the windows that overlap any changed interval."""
+    w_starts = [w.start for w in windows]
+    out = set()
+    for s, e in changes:
+        k = max(bisect.bisect_right(w_starts, s) - 1, 0)
+        while k < len(windows) and windows[k].start < e:
+            if windows[k].end > s:
+                out.add(windows[k].start)
+            k += 1
+    return out
+
+
+def _window_slots(
+    busy: Busy, max_len: int, w: Window, st: _SlotSettings, earliest=None
+) -> List[List[str]]:
+    """Free slots of one window from the raw intervals that can overlap it."""
+    lo = bisect.bisect_left(busy, (w.start - max_len,))
+    hi = bisect.bisect_left(busy, (w.end,))
+    local = [(s, e) for s, e in busy[lo:hi] if e > w.start]
+    merged = _merge_epochs([s for s, _ in local], [e for _, e in local])
+    found = _sweep_free_slots(
+        merged,
+        [w],
+        earliest if earliest is not None else w.day_start,
+        timedelta(minutes=st.dur_min),
+        st.tz,
+    )
+    return [[a.isoformat(), b.isoformat()] for a, b in found]
+
+
+def build_calendar_availability_incremental(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    calendarAvailability plus an updated availabilityIndex.
+
+    With a valid availabilityIndex, busyDelta {"added": [...], "removed": [...]} (rows like
+    busyIntervals) is applied to it; without busyDelta but with busyIntervals, the delta is
+    the difference between the index and busyIntervals. Without a usable index everything
+    is built from busyIntervals (plus busyDelta, if given). Slots equal those of
+    build_calendar_availability_from_busy_intervals; nextCursor is always null here.
+    """
+    skipped = _skip_result(inputs)
+    if skipped is not None:
+        return skipped
+    st = _read_settings(inputs)
+    key = _settings_key(st)
+    delta = inputs.get("busyDelta") if isinstance(inputs.get("busyDelta"), dict) else {}
+    added = _rows_to_pairs(delta.get("added"))
+    removed = _rows_to_pairs(delta.get("removed"))
+
+    index = _load_index(inputs.get("availabilityIndex"), key)
+    if index is None:
+        busy = sorted(_rows_to_pairs(inputs.get("busyIntervals")))
+        cached: Dict[int, List[List[str]]] = {}
+        max_len = 0
+        changes: Busy = []
+    else:
+        busy, cached, max_len = index["busy"], index["windows"], index["maxLen"]
+        if not delta and inputs.get("busyIntervals") is not None:
+            added, removed = _diff(busy, _rows_to_pairs(inputs.get("busyIntervals")))
+        changes = added + removed
+    missing = _apply_delta(busy, added, removed)
+    max_len = max([max_len] + [e - s for s, e in added])
+    if index is None:
+        max_len = max([max_len] + [e - s for s, e in busy])
+
+    # Intervals that end before the cutoff cannot affect any remaining slot.
+    earliest_us = to_us(st.earliest_slot_start)
+    busy = [pair for pair in busy if pair[1] > earliest_us]
+
+    # Windows entirely after the cutoff are cacheable; the one holding it is tiled fresh.
+    horizon = [w for w in st.windows if w.start > earliest_us]
+    touched = _touched(horizon, changes)
+
+    windows: Dict[int, List[List[str]]] = {}
+    recomputed = 0
+    for w in horizon:
+        if w.start in cached and w.start not in touched:
+            windows[w.start] = cached[w.start]
+        else:
+            windows[w.start] = _window_slots(busy, max_len, w, st)
+            recomputed += 1
+
+    slots: List[Dict[str, str]] = []
+    for w in st.windows:
+        if w.start in windows:
+            pairs = windows[w.start]
+        else:
+            # The window holding the lead-time cutoff; tiled from the cutoff, never cached.
+            pairs = _window_slots(busy, max_len, w, st, st.earliest_slot_start)
+        for a, b in pairs:
+            if len(slots) >= st.max_recs:
+                break
+            slots.append({"start": a, "end": b})
+        if len(slots) >= st.max_recs:
+            break
+
+    logger.info(
+        "availability_index: %s busy=%d added=%d removed=%d missing=%d windows=%d "
+        "recomputed=%d reused=%d caches=[%s]",
+        "update" if index is not None else "build",
+        len(busy),
+        len(added),
+        len(removed),
+        missing,
+        len(horizon),
+        recomputed,
+        len(horizon) - recomputed,
+        cache_stats(),
+    )
+    return {
+        "calendarAvailability": _calendar_availability(st, slots, None, len(busy)),
+        "availabilityIndex": {
+            "v": _INDEX_VERSION,
+            "settings": key,
+            "busy": [list(pair) for pair in busy],
+            "maxLen": max_len,
+            "windows": {str(k): v for k, v in windows.items()},
+        },
+    }
@@ -0,0 +1,47 @@
+"""
+Module-level bounded LRU caches shared by the scheduling functions.
+
+They live as long as the Python process, so warm invocations of the same function
+container reuse timezone objects and parsed inputs. cache_stats() renders the hit/miss
+counters for log lines.
+"""
+from __future__ import annotations
+
+import functools
+from typing import Callable, Dict, TypeVar
+from zoneinfo import ZoneInfo
+
+F = TypeVar("F", bound=Callable)
+
+_REGISTRY: Dict[str, Callable] = {}
+
+
+def memoized(name: str, maxsize: int) -> Callable[[F], F]:
+    """functools.lru_cache that also shows up in cache_stats() under `name`."""
+
+    def wrap(fn: F) -> F:
+        cached = functools.lru_cache(maxsize=maxsize)(fn)
+        _REGISTRY[name] = cached
+        return cached  # type: ignore[return-value]
+
+    return wrap
+
+
+@memoized("zone", maxsize=64)
+def get_zone(name: str) -> ZoneInfo:
+    """ZoneInfo(name), cached; raises like ZoneInfo for unknown keys (failures are not cached)."""
+    return ZoneInfo(name)
+
+
+def cache_stats() -> str:
+    """e.g. "zone=41/2 iso=980/120" (hits/misses per cache, in registration order)."""
+    parts = []
+    for name, fn in _REGISTRY.items():
+        info = fn.cache_info()
+        parts.append("%s=%d/%d" % (name, info.hits, info.misses))
+    return " ".join(parts)
+
+
+def clear_caches() -> None:
+    for fn in _REGISTRY.values():
+        fn.cache_clear()
@@ -0,0 +1,105 @@
+"""
+Progressive availability: slots computed while busy intervals are still arriving in
+chronological order (e.g. calendarView pages sorted by start).
+
+Once every interval that starts before a frontier is known, a free slot ending at or before
+that frontier can no longer be taken away, so it is confirmed. The scan resumes after the
+last confirmed slot on every update, and intervals ending before it are dropped. The fetch
+can stop as soon as maxSchedulingRecommendations slots are confirmed, or at a deadline with
+the slots confirmed so far.
+"""
+from __future__ import annotations
+
+import logging
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .caches import cache_stats
+from .slot_math import (
+    _calendar_availability,
+    _iter_free_slots,
+    _merge_epochs,
+    _read_settings,
+    _resume,
+)
+from .windows import from_us, to_us
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressiveAvailability:
+    """
+    Collects busy epochs ((start_us, end_us) pairs) batch by batch via add() and confirms
+    slots up to the frontier each batch guarantees. result() gives calendarAvailability with
+    the confirmed slots, the same as build_calendar_availability_from_busy_intervals would
+    return for them; nextCursor is always null, and coveredUntil is the ISO frontier when
+    the intervals stopped arriving before the horizon was complete (null otherwise).
+    """
+
+    def __init__(self, inputs: Dict[str, Any]) -> None:
+        self._st = _read_settings(inputs)
+        self._busy: List[Tuple[int, int]] = []
+        self._slots: List[Dict[str, str]] = []
+        self._after: Optional[datetime] = None
+        self._frontier: Optional[int] = to_us(self._st.earliest_slot_start)
+        self._complete = False
+        self.received = 0
+        self.updates = 0
+
+    @property
+    def done(self) -> bool:
+        """True once enough slots are confirmed (or the horizon is complete)."""
+        return self._complete or len(self._slots) >= self._st.max_recs
+
+    def add(self, epochs: Iterable[Tuple[int, int]], frontier: Optional[int]) -> bool:
+        """
+        Add busy intervals; every interval starting before `frontier` (epoch µs) must be known
+        by now. frontier=None means nothing more will arrive. Returns self.done.
+        """
+        for s, e in epochs:
+            if e > s:
+                self._busy.append((s, e))
+                self.received += 1
+        self.updates += 1
+        if self.done:
+            return True
+        if frontier is None:
+            self._complete = True
+        elif self._frontier is not None and frontier <= self._frontier:
+            return False
+        self._frontier = frontier
+        self._confirm()
+        return self.done
+
+    def _confirm(self) -> None:
+        st = self._st if self._after is None else _resume(self._st, self._after)
+        cutoff = to_us(st.earliest_slot_start)
+        # Intervals over before the resume point cannot touch a later slot.
+        self._busy = [pair for pair in self._busy if pair[1] > cutoff]
+        merged = _merge_epochs([s for s, _ in self._busy], [e for _, e in self._busy])
+        for slot_start, slot_end in _iter_free_slots(merged, st, st.max_recs - len(self._slots)):
+            if self._frontier is not None and to_us(slot_end) > self._frontier:
+                break
+            self._slots.append({"start": slot_start.isoformat(), "end": slot_end.isoformat()})
+            self._after = slot_end
+            if len(self._slots) >= st.max_recs:
+                break
+
+    def result(self) -> Dict[str, Any]:
+        st = self._st
+        covered = None
+        if not self.done and self._frontier is not None:
+            covered = from_us(self._frontier, st.tz).isoformat()
+        logger.info(
+            "progressive: busy_received=%d updates=%d slots=%d max_recs=%d covered_until=%s "
+            "caches=[%s]",
+            self.received,
+            self.updates,
+            len(self._slots),
+            st.max_recs,
+            covered or "horizon",
+            cache_stats(),
+        )
+        availability = _calendar_availability(st, list(self._slots), None, len(self._busy))
+        availability["coveredUntil"] = covered
+        return {"calendarAvailability": availability}
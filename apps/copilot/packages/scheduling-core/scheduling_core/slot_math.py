@@ -0,0 +1,559 @@
+"""Free-slot computation from busy intervals (timezone + workday window)."""
+from __future__ import annotations
+
+import base64
+import bisect
+import hashlib
+import json
+import logging
+from array import array
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, FrozenSet, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+try:
+    import numpy as np
+except ImportError:  # optional: merging falls back to pure Python over array('q')
+    np = None
+
+from .caches import cache_stats, get_zone, memoized
+from .version import __version__
+from .windows import (
+    US,
+    Window,
+    WorkdaySpec,
+    describe_spec,
+    from_us,
+    parse_holidays,
+    parse_workday_spec,
+    to_us,
+    with_earliest,
+    workday_windows,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RECOMMENDATIONS = 3
+_CURSOR_VERSION = 1
+# Below this many intervals NumPy's call overhead outweighs the vectorized sort/merge.
+_NUMPY_MIN_INTERVALS = 512
+# Requests for fewer slots than this finish faster with the early-exit scalar sweep.
+_VECTOR_MIN_SLOTS = 64
+
+
+def _now(tz: ZoneInfo) -> datetime:
+    return datetime.now(tz)
+
+
+def _parse_iso_to_dt(s: Any) -> Optional[datetime]:
+    if s is None:
+        return None
+    return _parse_iso_text(str(s).strip())
+
+
+@memoized("iso", maxsize=8192)
+def _parse_iso_text(t: str) -> Optional[datetime]:
+    if not t:
+        return None
+    if t.endswith("Z"):
+        t = t[:-1] + "+00:00"
+    try:
+        dt = datetime.fromisoformat(t)
+    except ValueError:
+        return None
+    if dt.tzinfo is None:
+        return None
+    return dt
+
+
+class _Intervals(NamedTuple):
+    """Sorted, non-overlapping busy intervals as parallel epoch-microsecond buffers."""
+
+    starts: "array[int]"
+    ends: "array[int]"
+
+
+def _merge_epochs(starts: Sequence[int], ends: Sequence[int]) -> _Intervals:
+    """Sort by start and merge overlapping/touching intervals."""
+    if np is not None and len(starts) >= _NUMPY_MIN_INTERVALS:
+        s = np.asarray(starts, dtype=np.int64)
+        e = np.asarray(ends, dtype=np.int64)
+        order = np.argsort(s, kind="stable")
+        s = s[order]
+        run_end = np.maximum.accumulate(e[order])
+        first = np.empty(len(s), dtype=bool)
+        first[0] = True
+        np.greater(s[1:], run_end[:-1], out=first[1:])
+        idx = np.flatnonzero(first)
+        last = np.append(idx[1:] - 1, len(s) - 1)
+        out_s, out_e = array("q"), array("q")
+        out_s.frombytes(s[idx].tobytes())
+        out_e.frombytes(run_end[last].tobytes())
+        return _Intervals(out_s, out_e)
+
+    out_s, out_e = array("q"), array("q")
+    for st, en in sorted(zip(starts, ends)):
+        if not out_s or st > out_e[-1]:
+            out_s.append(st)
+            out_e.append(en)
+        elif en > out_e[-1]:
+            out_e[-1] = en
+    return _Intervals(out_s, out_e)
+
+
+def _sweep_free_slots(
+    busy: _Intervals,
+    windows: Iterable[Window],
+    earliest_slot_start: datetime,
+    delta: timedelta,
+    tz: ZoneInfo,
+    seek: bool = True,
+) -> Iterator[Tuple[datetime, datetime]]:
+    """
+    Single pass over sorted, non-overlapping busy intervals and ascending workday windows.
+
+    `i` only moves forward: intervals that end at or before a window start can never touch a
+    later window. With `seek`, the pointer jumps there by binary search over interval ends
+    instead of stepping, which pays off when long stretches (nights, skipped days) hold many
+    events. Everything runs on epoch integers; datetimes are built only for emitted slots.
+    Callers stop consuming once they have enough slots.
+    """
+    starts, ends = busy
+    n = len(starts)
+    earliest = to_us(earliest_slot_start)
+    step = delta // US
+    i = 0
+    for w in windows:
+        if seek:
+            i = bisect.bisect_right(ends, w.start, i)
+        else:
+            while i < n and ends[i] <= w.start:
+                i += 1
+        if w.wall_clock:
+            yield from _tile_wall_clock(busy, i, w, earliest_slot_start, delta, tz)
+            continue
+        cursor = max(w.start, earliest)
+        j = i
+        while j < n and starts[j] < w.end:
+            s = max(starts[j], w.start)
+            while cursor + step <= s:
+                yield from_us(cursor, tz), from_us(cursor + step, tz)
+                cursor += step
+            e = min(ends[j], w.end)
+            if cursor < e:
+                cursor = e
+            j += 1
+        while cursor + step <= w.end:
+            yield from_us(cursor, tz), from_us(cursor + step, tz)
+            cursor += step
+
+
+def _tile_wall_clock(
+    busy: _Intervals,
+    i: int,
+    w: Window,
+    earliest_slot_start: datetime,
+    delta: timedelta,
+    tz: ZoneInfo,
+) -> Iterator[Tuple[datetime, datetime]]:
+    """Datetime tiling for one window that crosses a UTC offset change (slot length in wall time)."""
+    starts, ends = busy
+    n = len(starts)
+    cursor = max(w.day_start, earliest_slot_start)
+    while i < n and starts[i] < w.end:
+        s = from_us(starts[i], tz) if starts[i] > w.start else w.day_start
+        e = from_us(ends[i], tz) if ends[i] <= w.end else w.day_end
+        while cursor + delta <= s:
+            yield cursor, cursor + delta
+            cursor += delta
+        if cursor < e:
+            cursor = e
+        i += 1
+    while cursor + delta <= w.day_end:
+        yield cursor, cursor + delta
+        cursor += delta
+
+
+def _vector_free_slots(
+    busy: _Intervals,
+    windows: List[Window],
+    earliest_slot_start: datetime,
+    delta: timedelta,
+    tz: ZoneInfo,
+    limit: Optional[int] = None,
+) -> Iterator[Tuple[datetime, datetime]]:
+    """
+    NumPy variant of _sweep_free_slots for long horizons / many slots; same output order.
+
+    For window k with overlapping intervals lo..hi-1 the gaps are
+    [c0, S[lo]), [E[lo], S[lo+1]), ..., [E[hi-1], we) clipped to [c0, we), where
+    c0 = max(ws, earliest). All gaps of all windows are built as flat arrays and tiled into
+    duration-sized slots in bulk; wall-clock windows (UTC offset change) are spliced in
+    from the scalar tiler.
+    """
+    S = np.frombuffer(busy.starts, dtype=np.int64) if len(busy.starts) else np.empty(0, np.int64)
+    E = np.frombuffer(busy.ends, dtype=np.int64) if len(busy.ends) else np.empty(0, np.int64)
+    step = delta // US
+    regular = [k for k, w in enumerate(windows) if not w.wall_clock]
+    ws = np.fromiter((windows[k].start for k in regular), dtype=np.int64, count=len(regular))
+    we = np.fromiter((windows[k].end for k in regular), dtype=np.int64, count=len(regular))
+    c0 = np.maximum(ws, to_us(earliest_slot_start))
+
+    lo = np.searchsorted(E, ws, side="right")
+    hi = np.searchsorted(S, we, side="left")
+    per_win = np.maximum(hi - lo, 0) + 1
+    gap_win = np.repeat(np.arange(len(regular)), per_win)
+    pos = np.arange(len(gap_win)) - np.repeat(np.cumsum(per_win) - per_win, per_win)
+    j = lo[gap_win] + pos
+    last = max(len(S) - 1, 0)
+    if len(S):
+        prev_end = E[np.clip(j - 1, 0, last)]
+        next_start = S[np.clip(j, 0, last)]
+    else:
+        prev_end = next_start = np.zeros(len(j), dtype=np.int64)
+    gap_start = np.where(pos == 0, c0[gap_win], np.maximum(prev_end, c0[gap_win]))
+    gap_end = np.where(pos < per_win[gap_win] - 1, np.minimum(next_start, we[gap_win]), we[gap_win])
+    n = np.where(gap_end > gap_start, (gap_end - gap_start) // step, 0)
+
+    if limit is not None:
+        keep = np.searchsorted(np.cumsum(n), limit, side="left") + 1
+        n, gap_start, gap_win = n[:keep], gap_start[:keep], gap_win[:keep]
+    offs = np.cumsum(n) - n
+    slot_start = np.repeat(gap_start, n) + (np.arange(int(n.sum())) - np.repeat(offs, n)) * step
+    bounds = np.searchsorted(np.repeat(gap_win, n), np.arange(len(regular) + 1)).tolist()
+    slot_start = slot_start.tolist()
+
+    r = 0
+    i = 0
+    for w in windows:
+        if w.wall_clock:
+            i = bisect.bisect_right(busy.ends, w.start, i)
+            yield from _tile_wall_clock(busy, i, w, earliest_slot_start, delta, tz)
+            continue
+        for c in slot_start[bounds[r] : bounds[r + 1]]:
+            yield from_us(c, tz), from_us(c + step, tz)
+        r += 1
+
+
+def _iter_free_slots(
+    busy: _Intervals, st: "_SlotSettings", limit: Optional[int] = None
+) -> Iterator[Tuple[datetime, datetime]]:
+    """Free slots in order; vectorized when NumPy is available and many slots are wanted."""
+    delta = timedelta(minutes=st.dur_min)
+    if np is not None and (limit is None or limit >= _VECTOR_MIN_SLOTS):
+        return _vector_free_slots(busy, st.windows, st.earliest_slot_start, delta, st.tz, limit)
+    return _sweep_free_slots(busy, st.windows, st.earliest_slot_start, delta, st.tz)
+
+
+class _SlotSettings(NamedTuple):
+    tz: ZoneInfo
+    tz_name: str
+    horizon: int
+    dur_min: int
+    max_recs: int
+    workdays: WorkdaySpec
+    holidays: FrozenSet[date]
+    lead_hours: float
+    earliest_slot_start: datetime
+    windows: List[Window]
+
+
+def _skip_result(inputs: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Return the null-availability output unless calendarFetchOutcome is "ok"."""
+    outcome = inputs.get("calendarFetchOutcome")
+    if outcome == "ok":
+        return None
+    out: Dict[str, Any] = {"calendarAvailability": None}
+    if inputs.get("calendarError"):
+        out["calendarError"] = inputs["calendarError"]
+    logger.info(
+        "slot_math: skip (outcome!=ok) outcome=%s calendarError=%s",
+        outcome,
+        inputs.get("calendarError"),
+    )
+    return out
+
+
+def _read_settings(inputs: Dict[str, Any]) -> _SlotSettings:
+    tz_name = (inputs.get("appointmentTimeZone") or "Europe/Berlin").strip()
+    try:
+        tz = get_zone(tz_name)
+    except Exception:
+        tz = get_zone("Europe/Berlin")
+        tz_name = "Europe/Berlin"
+
+    horizon = int(inputs.get("appointmentHorizonDays") or 14)
+    dur_min = int(inputs.get("appointmentDurationMinutes") or 30)
+    mr = inputs.get("maxSchedulingRecommendations")
+    if mr is None or str(mr).strip() == "":
+        max_recs = DEFAULT_MAX_RECOMMENDATIONS
+    else:
+        max_recs = max(1, int(mr))
+    workdays = parse_workday_spec(inputs)
+    holidays = parse_holidays(inputs.get("appointmentHolidays"))
+
+    now = _now(tz)
+    raw_lead = inputs.get("appointmentMinimumLeadHours")
+    try:
+        if raw_lead is None or str(raw_lead).strip() == "":
+            lead_hours = 0.0
+        else:
+            lead_hours = float(raw_lead)
+    except (TypeError, ValueError):
+        lead_hours = 0.0
+    lead_hours = max(0.0, lead_hours)
+    earliest_slot_start = now + timedelta(hours=lead_hours)
+
+    start_day = now.date()
+    end_day = start_day + timedelta(days=max(1, horizon))
+    windows = with_earliest(
+        workday_windows(tz_name, workdays, holidays, start_day, end_day), tz, earliest_slot_start
+    )
+    return _SlotSettings(
+        tz, tz_name, horizon, dur_min, max_recs, workdays, holidays, lead_hours,
+        earliest_slot_start, windows,
+    )
+
+
+def _parse_busy_rows(rows: Any) -> Tuple[List[int], List[int]]:
+    """busyIntervals rows -> parallel epoch-microsecond start/end lists (invalid rows dropped)."""
+    starts: List[int] = []
+    ends: List[int] = []
+    for row in rows or []:
+        if not isinstance(row, dict):
+            continue
+        st = _parse_iso_to_dt(row.get("start"))
+        en = _parse_iso_to_dt(row.get("end"))
+        if not st or not en or en <= st:
+            continue
+        starts.append(to_us(st))
+        ends.append(to_us(en))
+    return starts, ends
+
+
+def _ingest_busy(rows: Any, epochs: Any = None) -> Tuple[int, _Intervals]:
+    """
+    Parse busyIntervals rows to epoch integers, add busyEpochs ((starts, ends) in UTC epoch
+    microseconds, already parsed by the caller) and merge; returns (valid_rows, merged).
+    """
+    starts, ends = _parse_busy_rows(rows)
+    if epochs:
+        for s, e in zip(*epochs):
+            if e > s:
+                starts.append(s)
+                ends.append(e)
+    return len(starts), _merge_epochs(starts, ends)
+
+
+def _fingerprint(st: _SlotSettings, merged: _Intervals) -> str:
+    """Hash of everything that determines the slot sequence (except "now")."""
+    h = hashlib.sha256()
+    h.update(
+        repr(
+            (st.tz_name, st.dur_min, st.workdays, sorted(st.holidays), st.horizon, st.lead_hours)
+        ).encode()
+    )
+    h.update(merged.starts.tobytes())
+    h.update(merged.ends.tobytes())
+    return h.hexdigest()[:16]
+
+
+def _encode_cursor(slot_end: datetime, fingerprint: str) -> str:
+    # Wall time + fold rather than an instant: around DST switches the scan continues with
+    # the exact (possibly non-normalized) datetime it would have reached without a cursor.
+    raw = json.dumps(
+        {
+            "v": _CURSOR_VERSION,
+            "end": slot_end.replace(tzinfo=None).isoformat(),
+            "fold": slot_end.fold,
+            "h": fingerprint,
+        }
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(token: Any, fingerprint: str, tz: ZoneInfo) -> Optional[datetime]:
+    """Return the last emitted slot end, or None when the cursor is absent, malformed or stale."""
+    if not token or not isinstance(token, str):
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        data = json.loads(raw)
+        after = datetime.fromisoformat(data["end"]).replace(tzinfo=tz, fold=int(data["fold"]))
+    except (ValueError, KeyError, TypeError):
+        logger.warning("slot_math: ignoring malformed slotCursor")
+        return None
+    if data.get("v") != _CURSOR_VERSION or data.get("h") != fingerprint:
+        logger.info("slot_math: slotCursor is for other inputs (busy set or settings changed), rescanning")
+        return None
+    return after
+
+
+def _resume(st: _SlotSettings, after: datetime) -> _SlotSettings:
+    """Settings that continue the scan right after `after`, skipping finished windows."""
+    earliest = max(st.earliest_slot_start, after)
+    return st._replace(
+        earliest_slot_start=earliest, windows=with_earliest(st.windows, st.tz, earliest)
+    )
+
+
+def _scan(
+    st: _SlotSettings, merged: _Intervals, cursor: Any, limit: Optional[int]
+) -> Tuple[str, bool, Iterator[Tuple[datetime, datetime]]]:
+    """(fingerprint, resumed, slot iterator) — shared by the capped and the lazy API."""
+    fingerprint = _fingerprint(st, merged)
+    after = _decode_cursor(cursor, fingerprint, st.tz)
+    if after is not None:
+        st = _resume(st, after)
+    return fingerprint, after is not None, _iter_free_slots(merged, st, limit)
+
+
+def _availability(
+    st: _SlotSettings,
+    merged: _Intervals,
+    busy_raw: int,
+    label: str = "",
+    cursor: Any = None,
+) -> Dict[str, Any]:
+    logger.info(
+        "slot_math: %sbusy_raw=%d merged_intervals=%d dur_min=%d max_recs=%d horizon_days=%d "
+        "min_lead_h=%s earliest=%s caches=[%s]",
+        label,
+        busy_raw,
+        len(merged.starts),
+        st.dur_min,
+        st.max_recs,
+        st.horizon,
+        st.lead_hours,
+        st.earliest_slot_start.isoformat(),
+        cache_stats(),
+    )
+
+    fingerprint, resumed, found = _scan(st, merged, cursor, st.max_recs + 1)
+    slots: List[Dict[str, str]] = []
+    next_cursor: Optional[str] = None
+    last_end: Optional[datetime] = None
+    for slot_start, slot_end in found:
+        if last_end is not None and len(slots) >= st.max_recs:
+            # A slot beyond the cap exists, so a follow-up call can continue the scan.
+            next_cursor = _encode_cursor(last_end, fingerprint)
+            break
+        slots.append({"start": slot_start.isoformat(), "end": slot_end.isoformat()})
+        last_end = slot_end
+    if resumed:
+        logger.info("slot_math: %sresumed from slotCursor slots=%d", label, len(slots))
+    return _calendar_availability(st, slots, next_cursor, len(merged.starts), label)
+
+
+def _calendar_availability(
+    st: _SlotSettings,
+    slots: List[Dict[str, str]],
+    next_cursor: Optional[str],
+    busy_n: int,
+    label: str = "",
+) -> Dict[str, Any]:
+    if not slots:
+        logger.warning(
+            "slot_math: %szero free slots in horizon workday=%s holidays=%d windows=%d "
+            "dur_min=%d horizon_days=%d busy=%d (calendar full in window or "
+            "no gap >= duration)",
+            label,
+            describe_spec(st.workdays),
+            len(st.holidays),
+            len(st.windows),
+            st.dur_min,
+            st.horizon,
+            busy_n,
+        )
+
+    summary = (
+        "%d freie Zeitoption(en) à %d Min (max. %d Optionen), nächste %d Tage, Zeitzone %s."
+        % (len(slots), st.dur_min, st.max_recs, st.horizon, st.tz_name)
+    )
+    return {
+        "timeZone": st.tz_name,
+        "slots": slots,
+        "summaryText": summary,
+        "reservationMinutes": st.dur_min,
+        "maxRecommendations": st.max_recs,
+        "nextCursor": next_cursor,
+        "schedulingCoreVersion": __version__,
+    }
+
+
+def build_calendar_availability_from_busy_intervals(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    skipped = _skip_result(inputs)
+    if skipped is not None:
+        return skipped
+    st = _read_settings(inputs)
+    busy_raw, merged = _ingest_busy(inputs.get("busyIntervals"), inputs.get("busyEpochs"))
+    return {
+        "calendarAvailability": _availability(
+            st, merged, busy_raw, cursor=inputs.get("slotCursor")
+        )
+    }
+
+
+def iter_calendar_slots(inputs: Dict[str, Any]) -> Iterator[Dict[str, str]]:
+    """
+    Lazily yield every free slot in the horizon, ignoring maxSchedulingRecommendations.
+
+    Each slot carries a "cursor"; passing it back as inputs["slotCursor"] (with the same busy
+    intervals and settings) resumes the scan right after that slot instead of starting over.
+    Yields nothing when calendarFetchOutcome is not "ok".
+    """
+    if _skip_result(inputs) is not None:
+        return
+    st = _read_settings(inputs)
+    _, merged = _ingest_busy(inputs.get("busyIntervals"), inputs.get("busyEpochs"))
+    fingerprint, _, found = _scan(st, merged, inputs.get("slotCursor"), None)
+    for slot_start, slot_end in found:
+        yield {
+            "start": slot_start.isoformat(),
+            "end": slot_end.isoformat(),
+            "cursor": _encode_cursor(slot_end, fingerprint),
+        }
+
+
+def _busy_sets(raw: Any) -> List[Tuple[str, Any]]:
+    """{mailbox: [intervals]} as (mailbox, intervals) pairs, keeping input order."""
+    if isinstance(raw, dict):
+        return [(str(k), v) for k, v in raw.items()]
+    if raw:
+        logger.warning("slot_math: ignoring busyIntervalsByMailbox of type %s", type(raw).__name__)
+    return []
+
+
+def build_calendar_availability_batch(inputs: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Free slots for many calendars in one call, sharing settings, windows and parsing.
+
+    busyIntervalsByMailbox maps mailbox -> busyIntervals. availabilityMode "perMailbox"
+    (default) returns calendarAvailabilityByMailbox; "intersection" returns one
+    calendarAvailability with the slots where every calendar is free.
+    """
+    skipped = _skip_result(inputs)
+    if skipped is not None:
+        return skipped
+    st = _read_settings(inputs)
+    mode = (inputs.get("availabilityMode") or "perMailbox").strip()
+    sets = _busy_sets(inputs.get("busyIntervalsByMailbox"))
+    ingested = [(name, _ingest_busy(rows)) for name, rows in sets]
+    logger.info(
+        "slot_math: batch mode=%s mailboxes=%d windows=%d", mode, len(ingested), len(st.windows)
+    )
+
+    if mode == "intersection":
+        busy_raw = sum(n for _, (n, _) in ingested)
+        union = _merge_epochs(
+            [x for _, (_, merged) in ingested for x in merged.starts],
+            [x for _, (_, merged) in ingested for x in merged.ends],
+        )
+        cal = _availability(st, union, busy_raw, label="intersection ")
+        cal["mailboxes"] = [name for name, _ in ingested]
+        return {"calendarAvailability": cal}
+
+    by_mailbox: Dict[str, Any] = {}
+    for name, (busy_raw, merged) in ingested:
+        by_mailbox[name] = _availability(st, merged, busy_raw, label="mailbox=%s " % name)
+    return {"calendarAvailabilityByMailbox": by_mailbox}
@@ -0,0 +1,3 @@
+"""Reported as calendarAvailability.schedulingCoreVersion; bump on any change to slot output."""
+
+__version__ = "1.6.0"
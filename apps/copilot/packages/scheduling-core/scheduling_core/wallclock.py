@@ -0,0 +1,83 @@
+"""
+Fast wall-clock text -> epoch conversion for calendar feeds that send local times without
+an offset, such as Graph's {"dateTime": "2024-05-06T09:30:00.0000000", "timeZone": "..."}.
+
+wall_us() slices the fixed "YYYY-MM-DDTHH:MM:SS" layout and looks up the UTC instant of the
+local hour in a per-zone cache, so a timestamp costs a dict hit and two int() calls instead
+of strptime, a tz-aware datetime and an isoformat/fromisoformat round trip. Hours in which
+the zone's offset changes are never cached and go through datetime.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+from zoneinfo import ZoneInfo
+
+from .caches import get_zone, memoized
+from .windows import to_us
+
+_SECOND_US = 1_000_000
+
+
+def _zone_or_utc(tz_name: str) -> ZoneInfo:
+    try:
+        return get_zone(tz_name)
+    except Exception:
+        return get_zone("UTC")
+
+
+@memoized("wall_hour", maxsize=16384)
+def _hour_base_us(tz_name: str, hour_text: str) -> Optional[int]:
+    """Epoch µs of local "YYYY-MM-DDTHH":00:00 in tz_name, or None if the offset changes within the hour."""
+    try:
+        start = datetime(
+            int(hour_text[0:4]),
+            int(hour_text[5:7]),
+            int(hour_text[8:10]),
+            int(hour_text[11:13]),
+            tzinfo=_zone_or_utc(tz_name),
+        )
+    except ValueError:
+        return None
+    if start.replace(minute=59, second=59).utcoffset() != start.utcoffset():
+        return None
+    return to_us(start)
+
+
+def _wall_us_slow(text: str, tz_name: str) -> Optional[int]:
+    text = text.strip()
+    if "T" not in text:
+        return None
+    base = text.split(".")[0].replace("Z", "")
+    if len(base) < 19:
+        return None
+    try:
+        naive = datetime.strptime(base[:19], "%Y-%m-%dT%H:%M:%S")
+    except ValueError:
+        return None
+    return to_us(naive.replace(tzinfo=_zone_or_utc(tz_name)))
+
+
+def wall_us(text: Optional[str], tz_name: str) -> Optional[int]:
+    """
+    Local wall time "YYYY-MM-DDTHH:MM:SS[.fffffff][Z]" in tz_name -> UTC epoch microseconds.
+
+    Sub-second digits and a trailing Z are ignored, ambiguous/non-existent local times use
+    fold=0 (the same as naive.replace(tzinfo=zone)), unknown zone names are read as UTC and
+    unparseable text gives None.
+    """
+    if not text:
+        return None
+    if (
+        len(text) >= 19
+        and text[4] == "-"
+        and text[7] == "-"
+        and text[10] == "T"
+        and text[13] == ":"
+        and text[16] == ":"
+    ):
+        base = _hour_base_us(tz_name, text[:13])
+        mm, ss = text[14:16], text[17:19]
+        if base is not None and mm.isdigit() and ss.isdigit() and mm < "60" and ss < "60":
+            return base + (int(mm) * 60 + int(ss)) * _SECOND_US
+    return _wall_us_slow(text, tz_name)
@@ -0,0 +1,200 @@
+"""Bookable workday windows (per-weekday hours, holidays) as a cached, sorted epoch table."""
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, FrozenSet, List, NamedTuple, Optional, Sequence, Tuple
+from zoneinfo import ZoneInfo
+
+from .caches import get_zone, memoized
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+US = timedelta(microseconds=1)
+
+WEEKDAY_KEYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# Hours of one weekday, ((start_h, start_m), (end_h, end_m)), or None when not bookable.
+DayHours = Optional[Tuple[Tuple[int, int], Tuple[int, int]]]
+# Monday..Sunday, indexed by date.weekday().
+WorkdaySpec = Tuple[DayHours, ...]
+
+
+def to_us(dt: datetime) -> int:
+    """Aware datetime -> UTC epoch microseconds."""
+    return (dt - EPOCH) // US
+
+
+def from_us(us: int, tz: ZoneInfo) -> datetime:
+    return (EPOCH + timedelta(microseconds=us)).astimezone(tz)
+
+
+def is_normalized(dt: datetime, tz: ZoneInfo) -> bool:
+    """False for wall times in a DST gap/fold whose offset differs from the round-tripped instant."""
+    return from_us(to_us(dt), tz).utcoffset() == dt.utcoffset()
+
+
+class Window(NamedTuple):
+    start: int
+    end: int
+    day_start: datetime
+    day_end: datetime
+    # Set when the window spans a UTC offset change (or the lead-time cutoff sits in one):
+    # slots there are tiled with wall-clock datetime arithmetic, as the legacy loop did.
+    wall_clock: bool
+
+
+def parse_hhmm(s: Any) -> Tuple[int, int]:
+    return _parse_hhmm_text((str(s or "09:00")).strip())
+
+
+@memoized("hhmm", maxsize=256)
+def _parse_hhmm_text(text: str) -> Tuple[int, int]:
+    parts = text.split(":")
+    h = int(parts[0])
+    m = int(parts[1]) if len(parts) > 1 else 0
+    return h, m
+
+
+def _weekday_index(key: Any) -> Optional[int]:
+    k = str(key).strip().lower()[:3]
+    if k in WEEKDAY_KEYS:
+        return WEEKDAY_KEYS.index(k)
+    if k.isdigit() and int(k) < 7:
+        return int(k)
+    return None
+
+
+def _parse_day_hours(raw: Any) -> DayHours:
+    """ "09:00-17:00" or ["09:00", "17:00"]; empty/null/"off" means not bookable."""
+    if raw is None or raw is False:
+        return None
+    if isinstance(raw, (list, tuple)) and len(raw) == 2:
+        return parse_hhmm(raw[0]), parse_hhmm(raw[1])
+    text = str(raw).strip()
+    if not text or text.lower() in ("off", "closed", "-"):
+        return None
+    start, _, end = text.partition("-")
+    return parse_hhmm(start), parse_hhmm(end)
+
+
+_SPEC_INPUTS = (
+    "appointmentWorkdayStart",
+    "appointmentWorkdayEnd",
+    "appointmentWorkdays",
+    "appointmentWorkdayHours",
+)
+
+
+def parse_workday_spec(inputs: dict) -> WorkdaySpec:
+    """
+    appointmentWorkdayStart/End apply to every day unless narrowed by
+    appointmentWorkdays (["mon", ..., "fri"]) or overridden per day by
+    appointmentWorkdayHours ({"fri": "09:00-13:00", "sat": null}).
+    """
+    key = json.dumps(
+        [inputs.get(k) for k in _SPEC_INPUTS], sort_keys=True, default=str, ensure_ascii=False
+    )
+    return _parse_workday_spec_key(key)
+
+
+@memoized("workday_spec", maxsize=128)
+def _parse_workday_spec_key(key: str) -> WorkdaySpec:
+    start, end, workdays, per_day = json.loads(key)
+    default = (parse_hhmm(start), parse_hhmm(end))
+    days: List[DayHours] = [default] * 7
+
+    if isinstance(workdays, (list, tuple)) and workdays:
+        allowed = {_weekday_index(d) for d in workdays}
+        days = [h if i in allowed else None for i, h in enumerate(days)]
+
+    if isinstance(per_day, dict):
+        for day, raw in per_day.items():
+            i = _weekday_index(day)
+            if i is None:
+                logger.warning("windows: ignoring appointmentWorkdayHours key %r", day)
+                continue
+            days[i] = _parse_day_hours(raw)
+    return tuple(days)
+
+
+def parse_holidays(raw: Any) -> FrozenSet[date]:
+    out = set()
+    for item in raw or []:
+        try:
+            out.add(date.fromisoformat(str(item).strip()[:10]))
+        except ValueError:
+            logger.warning("windows: ignoring appointmentHolidays entry %r", item)
+    return frozenset(out)
+
+
+@memoized("windows", maxsize=64)
+def workday_windows(
+    tz_name: str,
+    spec: WorkdaySpec,
+    holidays: FrozenSet[date],
+    start_day: date,
+    end_day: date,
+) -> Tuple[Window, ...]:
+    """
+    All bookable windows in [start_day, end_day], ascending. Non-working weekdays and
+    holidays are skipped before any datetime is built. Cached: repeated calls with the same
+    timezone, spec, holidays and horizon reuse the table.
+    """
+    tz = get_zone(tz_name)
+    times = [None if h is None else (time(*h[0]), time(*h[1])) for h in spec]
+    out: List[Window] = []
+    d = start_day
+    one_day = timedelta(days=1)
+    while d <= end_day:
+        hours = times[d.weekday()]
+        if hours is not None and d not in holidays:
+            day_start = datetime.combine(d, hours[0], tzinfo=tz)
+            day_end = datetime.combine(d, hours[1], tzinfo=tz)
+            if day_end > day_start:
+                wall_clock = (
+                    day_start.utcoffset() != day_end.utcoffset()
+                    or not is_normalized(day_start, tz)
+                    or not is_normalized(day_end, tz)
+                )
+                out.append(Window(to_us(day_start), to_us(day_end), day_start, day_end, wall_clock))
+        d += one_day
+    return tuple(out)
+
+
+def with_earliest(windows: Sequence[Window], tz: ZoneInfo, earliest: datetime) -> List[Window]:
+    """
+    Windows that can still hold a slot starting at or after `earliest`; the window containing
+    a non-normalized `earliest` (DST gap/fold) is switched to wall-clock tiling.
+    """
+    if is_normalized(earliest, tz):
+        k = bisect.bisect_right([w.end for w in windows], to_us(earliest))
+        return list(windows[k:])
+    # Wall-clock tiling steps through such times (e.g. 02:48 on a spring-forward day, whose
+    # instant lies after the window's 03:30 end), so the window is found by wall time.
+    wall = earliest.replace(tzinfo=None)
+    k = bisect.bisect_right([w.day_end.replace(tzinfo=None) for w in windows], wall)
+    out = list(windows[k:])
+    if out and out[0].day_start.replace(tzinfo=None) < wall:
+        out[0] = out[0]._replace(wall_clock=True)
+    return out
+
+
+def describe_spec(spec: WorkdaySpec) -> str:
+    """Compact log form, e.g. "mon-fri 09:00-17:00, sat-sun off"."""
+    parts: List[str] = []
+    i = 0
+    while i < 7:
+        j = i
+        while j + 1 < 7 and spec[j + 1] == spec[i]:
+            j += 1
+        h = spec[i]
+        label = WEEKDAY_KEYS[i] if i == j else WEEKDAY_KEYS[i] + "-" + WEEKDAY_KEYS[j]
+        hours = "off" if h is None else "%02d:%02d-%02d:%02d" % (h[0] + h[1])
+        parts.append(label + " " + hours)
+        i = j + 1
+    return ", ".join(parts)
+
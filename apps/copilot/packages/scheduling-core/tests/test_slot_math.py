@@ -0,0 +1,292 @@
+import unittest
+from datetime import datetime, timezone
+from unittest import mock
+from zoneinfo import ZoneInfo
+
+from scheduling_core import (
+    __version__,
+    build_calendar_availability_batch,
+    build_calendar_availability_from_busy_intervals,
+    build_calendar_availability_incremental,
+    iter_calendar_slots,
+    wall_us,
+)
+from scheduling_core import ProgressiveAvailability
+from scheduling_core import slot_math
+
+BERLIN = ZoneInfo("Europe/Berlin")
+
+
+def _inputs(**overrides):
+    inputs = {
+        "calendarFetchOutcome": "ok",
+        "busyIntervals": [],
+        "appointmentTimeZone": "Europe/Berlin",
+        "appointmentHorizonDays": 3,
+        "appointmentDurationMinutes": 60,
+        "appointmentWorkdayStart": "09:00",
+        "appointmentWorkdayEnd": "12:00",
+    }
+    inputs.update(overrides)
+    return inputs
+
+
+def _starts(cal):
+    return [s["start"] for s in cal["slots"]]
+
+
+class TestSlotMath(unittest.TestCase):
+
+    def setUp(self):
+        # Monday 2026-10-19, 07:00 Berlin.
+        patcher = mock.patch.object(
+            slot_math, "_now", lambda tz: datetime(2026, 10, 19, 7, 0, tzinfo=BERLIN).astimezone(tz)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_skip_when_outcome_not_ok(self):
+        out = build_calendar_availability_from_busy_intervals(
+            {"calendarFetchOutcome": "error", "calendarError": "boom"}
+        )
+        self.assertEqual(out, {"calendarAvailability": None, "calendarError": "boom"})
+
+    def test_busy_intervals_are_skipped(self):
+        busy = [
+            {"start": "2026-10-19T09:00:00+02:00", "end": "2026-10-19T10:00:00+02:00"},
+            # Overlapping row in another offset, merged with the first one.
+            {"start": "2026-10-19T07:30:00Z", "end": "2026-10-19T08:30:00Z"},
+        ]
+        cal = build_calendar_availability_from_busy_intervals(_inputs(busyIntervals=busy))[
+            "calendarAvailability"
+        ]
+        self.assertEqual(
+            _starts(cal),
+            ["2026-10-19T10:30:00+02:00", "2026-10-20T09:00:00+02:00", "2026-10-20T10:00:00+02:00"],
+        )
+        self.assertEqual(cal["schedulingCoreVersion"], __version__)
+
+    def test_lead_time(self):
+        cal = build_calendar_availability_from_busy_intervals(
+            _inputs(appointmentMinimumLeadHours=3, maxSchedulingRecommendations=1)
+        )["calendarAvailability"]
+        self.assertEqual(_starts(cal), ["2026-10-19T10:00:00+02:00"])
+
+    def test_more_than_three_recommendations(self):
+        cal = build_calendar_availability_from_busy_intervals(
+            _inputs(maxSchedulingRecommendations=7)
+        )["calendarAvailability"]
+        self.assertEqual(len(cal["slots"]), 7)
+        self.assertEqual(cal["maxRecommendations"], 7)
+
+    def test_cursor_pages_match_full_scan(self):
+        inputs = _inputs(
+            busyIntervals=[{"start": "2026-10-20T09:30:00+02:00", "end": "2026-10-20T10:15:00+02:00"}],
+            maxSchedulingRecommendations=2,
+        )
+        full = [s["start"] for s in iter_calendar_slots(inputs)]
+        paged, cursor = [], None
+        while True:
+            cal = build_calendar_availability_from_busy_intervals(dict(inputs, slotCursor=cursor))[
+                "calendarAvailability"
+            ]
+            paged += _starts(cal)
+            cursor = cal["nextCursor"]
+            if not cursor:
+                break
+        self.assertEqual(paged, full)
+        self.assertEqual(len(full), 10)
+
+    def test_stale_cursor_restarts(self):
+        first = next(iter_calendar_slots(_inputs()))
+        changed = _inputs(
+            busyIntervals=[{"start": "2026-10-19T11:00:00+02:00", "end": "2026-10-19T12:00:00+02:00"}],
+            slotCursor=first["cursor"],
+        )
+        self.assertEqual(
+            next(iter_calendar_slots(changed))["start"], "2026-10-19T09:00:00+02:00"
+        )
+
+    def test_dst_window_keeps_wall_clock_tiling(self):
+        with mock.patch.object(
+            slot_math, "_now", lambda tz: datetime(2026, 3, 28, 23, 0, tzinfo=BERLIN)
+        ):
+            cal = build_calendar_availability_from_busy_intervals(
+                _inputs(
+                    appointmentHorizonDays=1,
+                    appointmentWorkdayStart="00:00",
+                    appointmentWorkdayEnd="04:00",
+                    maxSchedulingRecommendations=10,
+                )
+            )["calendarAvailability"]
+        # 2026-03-29 has no 02:00-03:00 local hour; slots are stepped in wall time.
+        self.assertIn("2026-03-29T02:00:00+01:00", _starts(cal))
+
+    def test_cursor_resumes_across_dst_switches(self):
+        inputs = _inputs(
+            appointmentHorizonDays=2,
+            appointmentDurationMinutes=7,
+            appointmentWorkdayStart="00:00",
+            appointmentWorkdayEnd="03:30",
+            busyIntervals=[{"start": "2026-03-29T01:10:00+01:00", "end": "2026-03-29T01:20:00+01:00"}],
+        )
+        # Spring forward (2026-03-29) and fall back (2026-10-25) in Berlin.
+        for now in (
+            datetime(2026, 3, 28, 12, 0, tzinfo=timezone.utc),
+            datetime(2026, 10, 24, 12, 0, tzinfo=timezone.utc),
+        ):
+            with mock.patch.object(slot_math, "_now", lambda tz, now=now: now.astimezone(tz)):
+                full = list(iter_calendar_slots(inputs))
+                starts = [s["start"] for s in full]
+                for k, slot in enumerate(full):
+                    rest = [s["start"] for s in iter_calendar_slots(dict(inputs, slotCursor=slot["cursor"]))]
+                    self.assertEqual(rest, starts[k + 1 :], slot["end"])
+                    page = build_calendar_availability_from_busy_intervals(
+                        dict(inputs, slotCursor=slot["cursor"], maxSchedulingRecommendations=3)
+                    )["calendarAvailability"]
+                    self.assertEqual(_starts(page), starts[k + 1 : k + 4], slot["end"])
+
+    def test_weekday_hours_and_holidays(self):
+        cal = build_calendar_availability_from_busy_intervals(
+            _inputs(
+                appointmentHorizonDays=7,
+                appointmentWorkdays=["mon", "tue", "wed", "thu", "fri"],
+                appointmentWorkdayHours={"tue": "14:00-15:00", "wed": None},
+                appointmentHolidays=["2026-10-22"],
+                maxSchedulingRecommendations=20,
+            )
+        )["calendarAvailability"]
+        days = sorted({s[:10] for s in _starts(cal)})
+        # Wed off, Thu holiday, Sat/Sun not workdays.
+        self.assertEqual(days, ["2026-10-19", "2026-10-20", "2026-10-23", "2026-10-26"])
+        self.assertIn("2026-10-20T14:00:00+02:00", _starts(cal))
+        self.assertNotIn("2026-10-20T09:00:00+02:00", _starts(cal))
+
+    def test_batch_per_mailbox_and_intersection(self):
+        busy = {
+            "ann": [{"start": "2026-10-19T09:00:00+02:00", "end": "2026-10-19T10:00:00+02:00"}],
+            "bob": [{"start": "2026-10-19T10:00:00+02:00", "end": "2026-10-19T11:00:00+02:00"}],
+        }
+        by_mailbox = build_calendar_availability_batch(
+            _inputs(busyIntervalsByMailbox=busy, maxSchedulingRecommendations=1)
+        )["calendarAvailabilityByMailbox"]
+        self.assertEqual(_starts(by_mailbox["ann"]), ["2026-10-19T10:00:00+02:00"])
+        self.assertEqual(_starts(by_mailbox["bob"]), ["2026-10-19T09:00:00+02:00"])
+
+        both = build_calendar_availability_batch(
+            _inputs(
+                busyIntervalsByMailbox=busy,
+                availabilityMode="intersection",
+                maxSchedulingRecommendations=1,
+            )
+        )["calendarAvailability"]
+        self.assertEqual(_starts(both), ["2026-10-19T11:00:00+02:00"])
+        self.assertEqual(both["mailboxes"], ["ann", "bob"])
+
+        # Only the mapping is accepted, as the function interface declares.
+        rows = [{"mailbox": "ann", "busyIntervals": busy["ann"]}]
+        out = build_calendar_availability_batch(_inputs(busyIntervalsByMailbox=rows))
+        self.assertEqual(out["calendarAvailabilityByMailbox"], {})
+
+    def test_incremental_index_matches_full_rebuild(self):
+        first = {"start": "2026-10-19T09:00:00+02:00", "end": "2026-10-19T10:00:00+02:00"}
+        second = {"start": "2026-10-21T10:00:00+02:00", "end": "2026-10-21T11:00:00+02:00"}
+        inputs = _inputs(maxSchedulingRecommendations=20)
+        built = build_calendar_availability_incremental(dict(inputs, busyIntervals=[first]))
+        updated = build_calendar_availability_incremental(
+            dict(
+                inputs,
+                availabilityIndex=built["availabilityIndex"],
+                busyDelta={"added": [second], "removed": [first]},
+            )
+        )
+        full = build_calendar_availability_from_busy_intervals(dict(inputs, busyIntervals=[second]))
+        self.assertEqual(updated["calendarAvailability"], full["calendarAvailability"])
+        self.assertEqual(len(updated["availabilityIndex"]["busy"]), 1)
+        # Tuesday is untouched by the delta and carried over as is.
+        tuesday = [k for k, v in built["availabilityIndex"]["windows"].items() if v[0][0][:10] == "2026-10-20"]
+        self.assertEqual(
+            updated["availabilityIndex"]["windows"][tuesday[0]],
+            built["availabilityIndex"]["windows"][tuesday[0]],
+        )
+
+    def test_busy_epochs_match_busy_intervals(self):
+        graph = [
+            ("2026-10-19T09:00:00.0000000", "2026-10-19T10:00:00.0000000", "Europe/Berlin"),
+            ("2026-10-20T08:30:00.0000000", "2026-10-20T09:15:00.0000000", "UTC"),
+            # 25 Oct 2026: 02:30 exists twice in Berlin (fold=0 is the CEST one).
+            ("2026-10-25T02:30:00.0000000", "2026-10-25T10:00:00.0000000", "Europe/Berlin"),
+        ]
+        rows = [
+            {"start": datetime.fromisoformat(s[:19]).replace(tzinfo=ZoneInfo(z)).isoformat(),
+             "end": datetime.fromisoformat(e[:19]).replace(tzinfo=ZoneInfo(z)).isoformat()}
+            for s, e, z in graph
+        ]
+        epochs = ([wall_us(s, z) for s, _, z in graph], [wall_us(e, z) for _, e, z in graph])
+        self.assertEqual(epochs[0][2], 1792888200 * 10**6)
+        inputs = _inputs(appointmentHorizonDays=7, maxSchedulingRecommendations=50)
+        self.assertEqual(
+            build_calendar_availability_from_busy_intervals(dict(inputs, busyEpochs=epochs)),
+            build_calendar_availability_from_busy_intervals(dict(inputs, busyIntervals=rows)),
+        )
+
+    def test_progressive_matches_full_scan(self):
+        # One meeting per workday plus a long block across the DST switch (25 Oct 2026).
+        pairs = [
+            (wall_us("2026-10-%02dT%02d:15:00" % (d, 9 + d % 3), "Europe/Berlin"),
+             wall_us("2026-10-%02dT%02d:45:00" % (d, 10 + d % 3), "Europe/Berlin"))
+            for d in range(19, 31)
+        ]
+        pairs.append((wall_us("2026-10-24T11:00:00", "Europe/Berlin"), wall_us("2026-10-26T10:00:00", "Europe/Berlin")))
+        pairs.sort()
+        for max_recs in (5, 200):
+            inputs = _inputs(appointmentHorizonDays=12, appointmentDurationMinutes=45, maxSchedulingRecommendations=max_recs)
+            full = build_calendar_availability_from_busy_intervals(
+                dict(inputs, busyEpochs=([s for s, _ in pairs], [e for _, e in pairs]))
+            )["calendarAvailability"]
+            progressive = ProgressiveAvailability(inputs)
+            batches = 0
+            for k in range(0, len(pairs), 3):
+                batch = pairs[k : k + 3]
+                batches += 1
+                if progressive.add(batch, batch[-1][0]):
+                    break
+            else:
+                progressive.add([], None)
+            cal = progressive.result()["calendarAvailability"]
+            self.assertEqual(cal["slots"], full["slots"])
+            self.assertIsNone(cal["coveredUntil"])
+            if max_recs == 5:
+                self.assertLess(batches, 3)
+
+        # Stopped early (deadline): a prefix of the full scan, up to the frontier.
+        progressive = ProgressiveAvailability(inputs)
+        progressive.add(pairs[:4], pairs[3][0])
+        cal = progressive.result()["calendarAvailability"]
+        self.assertEqual(cal["slots"], full["slots"][: len(cal["slots"])])
+        self.assertEqual(wall_us(cal["coveredUntil"][:19], "Europe/Berlin"), pairs[3][0])
+        self.assertLessEqual(cal["slots"][-1]["end"], cal["coveredUntil"])
+
+    @unittest.skipIf(slot_math.np is None, "numpy not installed")
+    def test_vectorized_path_matches_scalar(self):
+        busy = [
+            {"start": "2026-10-%02dT%02d:%02d:00+02:00" % (d, h, m), "end": "2026-10-%02dT%02d:50:00+02:00" % (d, h)}
+            for d in range(19, 31)
+            for h, m in ((9, 10), (11, 0), (13, 30))
+        ]
+        inputs = _inputs(
+            busyIntervals=busy,
+            appointmentHorizonDays=20,
+            appointmentDurationMinutes=25,
+            appointmentWorkdayEnd="18:00",
+            maxSchedulingRecommendations=500,
+        )
+        vector = build_calendar_availability_from_busy_intervals(inputs)
+        with mock.patch.object(slot_math, "np", None):
+            scalar = build_calendar_availability_from_busy_intervals(inputs)
+        self.assertEqual(vector, scalar)
+        self.assertGreater(len(vector["calendarAvailability"]["slots"]), 64)
+
+
+if __name__ == '__main__':
+    unittest.main()